@@ -1,8 +1,19 @@
-from fastapi import APIRouter, Depends, BackgroundTasks, status
-from fastapi.responses import JSONResponse
+from typing import Any
+
+from fastapi import APIRouter, Body, Depends, HTTPException, Query, status
+from fastapi.responses import FileResponse, JSONResponse, StreamingResponse
+from pydantic import BaseModel, Field, field_validator
 
 from app.api.dependencies import validate_admin_key
-from app.infrastructure.search.indexer import run_indexer
+from app.core.config import get_settings
+from app.infrastructure.search.export import fetch_documents_page, iter_ndjson
+from app.infrastructure.search.indexer import ReindexScope, parse_doc_id
+from app.infrastructure.search.jobs import ReindexBusyError, job_manager
+from app.infrastructure.search.profiling import artifact_path, list_artifacts
+from app.infrastructure.search.scheduler import scheduler
+from app.infrastructure.search.task_monitor import summarize_tasks, task_monitor
+from app.infrastructure.search.updates import ChangeBatch, coalescer
+from app.infrastructure.search.searcher import SearchBackendError
 import logging
 
 router = APIRouter(prefix="/api/admin", tags=["Admin"])
@@ -15,39 +26,242 @@ async def admin_info() -> dict:
     return {
         "service": "BRX Search (admin)",
         "reindex": "POST /api/admin/reindex con header X-Admin-API-Key",
+        "reindex_status": "GET /api/admin/reindex/{job_id}",
+        "changes": "POST /api/admin/documents/changes (aggiornamenti mirati)",
+        "export": "GET /api/admin/export (NDJSON) con header X-Admin-API-Key",
+        "scheduler": "GET /api/admin/scheduler",
+        "tasks": "GET /api/admin/tasks (coda e task Meilisearch)",
+        "profiles": "GET /api/admin/profiles (POST /api/admin/reindex?profile=true o ?sql_profile=true per profilare un run)",
     }
 
 
-def background_reindex():
-    """Wrapper per gestire eccezioni nel background task"""
-    try:
-        logger.info("Starting background reindex...")
-        result = run_indexer()
-        if result.get("error"):
-            logger.error(f"Reindex failed: {result['error']}")
-        else:
-            logger.info(f"Reindex success: {result}")
-    except Exception as e:
-        logger.exception("Critical error during reindex")
+class ReindexRequest(BaseModel):
+    """Reindex parziale: filtri in AND. Corpo assente o vuoto = reindex totale."""
+
+    games: list[str] = Field(default_factory=list, description="Slug dei giochi, es. [\"mtg\"]")
+    set_ids: list[int] = Field(default_factory=list, description="sets.id da reindicizzare")
+    ids: list[str] = Field(default_factory=list, description="Id documento, es. [\"mtg_123\", \"sealed_7\"]")
+
+    @field_validator("ids")
+    @classmethod
+    def _valid_ids(cls, v: list[str]) -> list[str]:
+        for doc_id in v:
+            parse_doc_id(doc_id)
+        return v
 
 
 @router.post(
     "/reindex",
-    summary="Avvia reindex totale (async)",
-    description="Avvia il reindex totale. Richiede l'header X-Admin-API-Key.",
+    summary="Avvia reindex totale o parziale (async)",
+    description=(
+        "Avvia il reindex come job e ritorna il suo id. Senza corpo: reindex totale. Con corpo JSON "
+        "{games, set_ids, ids}: solo i documenti selezionati. Se un reindex che copre la richiesta è già in corso "
+        "ritorna il job esistente (coalesced=true), altrimenti 409. Con profile=true il run gira sotto profiler "
+        "(CPU, stack campionati, allocazioni): artefatti in result.profile, da GET /api/admin/profiles/{name}. "
+        "Con sql_profile=true registra tempi, righe esaminate e piani EXPLAIN delle query MySQL, con full scan, "
+        "filesort e indici mancanti segnalati: artefatti in result.sql_profile. "
+        "Richiede l'header X-Admin-API-Key."
+    ),
     status_code=status.HTTP_202_ACCEPTED,
 )
 async def reindex(
-    background_tasks: BackgroundTasks,
+    body: ReindexRequest | None = Body(None),
+    profile: bool = Query(False, description="Profila il run (più lento: tracemalloc attivo)"),
+    sql_profile: bool = Query(False, description="Cattura le query SQL del run con i loro piani EXPLAIN"),
     _: None = Depends(validate_admin_key),
 ) -> JSONResponse:
-    # Lancia il processo in background e risponde SUBITO
-    background_tasks.add_task(background_reindex)
-
+    scope = ReindexScope(games=body.games, set_ids=body.set_ids, doc_ids=body.ids) if body else None
+    try:
+        job, created = job_manager.submit(scope, profile=profile, sql_profile=sql_profile)
+    except ReindexBusyError as e:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Reindex {e.job.id} già in corso: riprovare al termine",
+        )
     return JSONResponse(
         status_code=status.HTTP_202_ACCEPTED,
         content={
             "status": "accepted",
-            "message": "Reindexing started in background. Check logs for progress."
+            "job_id": job.id,
+            "scope": job.scope.to_dict() if job.scope else None,
+            "coalesced": not created,
+            "status_url": f"/api/admin/reindex/{job.id}",
+            "message": "Reindexing started in background." if created else "Reindex already running: returning the current job.",
         },
     )
+
+
+@router.get("/reindex", summary="Job di reindex recenti")
+async def reindex_jobs(
+    _: None = Depends(validate_admin_key),
+) -> dict:
+    return {"jobs": [job.to_dict() for job in job_manager.list()]}
+
+
+@router.get(
+    "/reindex/{job_id}",
+    summary="Stato di un job di reindex",
+    description="Stato, progresso per sorgente (docs/sec, ETA) e riepilogo finale di run_indexer().",
+)
+async def reindex_status(
+    job_id: str,
+    _: None = Depends(validate_admin_key),
+) -> dict:
+    job = job_manager.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Job di reindex non trovato")
+    return job.to_dict()
+
+
+@router.get("/profiles", summary="Artefatti dei run profilati")
+async def profiles(
+    _: None = Depends(validate_admin_key),
+) -> dict:
+    return {"profiles": list_artifacts()}
+
+
+@router.get(
+    "/profiles/{name}",
+    summary="Scarica un artefatto di profiling",
+    description=(
+        ".pstats (snakeviz), .pstats.txt, .collapsed (flamegraph.pl / speedscope), .alloc.txt (tracemalloc), "
+        ".sql.txt / .sql.json (query SQL, piani e indici suggeriti)."
+    ),
+)
+async def profile_artifact(
+    name: str,
+    _: None = Depends(validate_admin_key),
+) -> FileResponse:
+    path = artifact_path(name)
+    if path is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Artefatto non trovato")
+    return FileResponse(path, filename=name, media_type="application/octet-stream")
+
+
+@router.get(
+    "/scheduler",
+    summary="Stato dello scheduler del reindex",
+    description="Prossimi sync incrementali e reindex totali, esito degli ultimi turni. leader=false: lo scheduler gira in un altro processo.",
+)
+async def scheduler_status(
+    _: None = Depends(validate_admin_key),
+) -> dict:
+    return scheduler.status()
+
+
+@router.get(
+    "/tasks",
+    summary="Coda e task Meilisearch dei nostri indici",
+    description=(
+        "Task in coda/in elaborazione con età del più vecchio, task falliti e durate dei task di indicizzazione "
+        "degli ultimi window_seconds con documenti al secondo, alert sulle soglie TASK_MONITOR_*. "
+        "monitor: stato del poller che logga gli stessi alert. Richiede l'header X-Admin-API-Key."
+    ),
+)
+async def tasks_status(
+    window_seconds: float | None = Query(None, gt=0, le=86400, description="Finestra dei task conclusi (default TASK_MONITOR_WINDOW_SECONDS)"),
+    _: None = Depends(validate_admin_key),
+) -> dict:
+    try:
+        summary = await summarize_tasks(window_seconds)
+    except SearchBackendError as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail)
+    monitor = task_monitor.status()
+    monitor.pop("last")
+    return {**summary, "monitor": monitor}
+
+
+@router.get(
+    "/export",
+    summary="Export NDJSON dei documenti indicizzati",
+    description=(
+        "Stream NDJSON (chunked) dei documenti dell'indice, un documento per riga. "
+        "Filtro Meilisearch opzionale (es. game_slug = mtg) e lista di campi separati da virgola. "
+        "Richiede l'header X-Admin-API-Key."
+    ),
+)
+async def export_documents(
+    filter: str | None = Query(None, description="Filtro Meilisearch, es. game_slug = mtg AND category_id = 1"),
+    fields: str | None = Query(None, description="Campi da includere, es. id,name,set_name"),
+    _: None = Depends(validate_admin_key),
+) -> StreamingResponse:
+    settings = get_settings()
+    index_name = settings.MEILISEARCH_INDEX_NAME
+    field_list = [f.strip() for f in fields.split(",") if f.strip()] if fields else None
+    try:
+        first_page = await fetch_documents_page(index_name, 0, settings.EXPORT_PAGE_SIZE, filter, field_list)
+    except SearchBackendError as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail)
+    return StreamingResponse(
+        iter_ndjson(index_name, first_page, filter, field_list),
+        media_type="application/x-ndjson",
+        headers={"X-Total-Documents": str(first_page.get("total", ""))},
+    )
+
+
+class DocumentChangesRequest(BaseModel):
+    """Modifiche puntuali dal backend marketplace. Gli id documento sono del tipo mtg_123, op_45, pk_6, sealed_7."""
+
+    upserts: list[str] = Field(default_factory=list, description="Documenti da rileggere da MySQL e reindicizzare")
+    deletes: list[str] = Field(default_factory=list, description="Documenti da rimuovere dall'indice")
+    set_ids: list[int] = Field(default_factory=list, description="Set modificati (set + tutte le stampe/prodotti)")
+    oracle_ids: list[str] = Field(default_factory=list, description="Traduzioni MTG modificate (tutte le stampe)")
+    patches: list[dict[str, Any]] = Field(
+        default_factory=list,
+        description="Aggiornamenti parziali senza passare da MySQL: [{\"id\": \"mtg_123\", \"rarity\": \"mythic\"}]",
+    )
+
+    @field_validator("upserts", "deletes")
+    @classmethod
+    def _valid_ids(cls, v: list[str]) -> list[str]:
+        for doc_id in v:
+            parse_doc_id(doc_id)
+        return v
+
+    @field_validator("patches")
+    @classmethod
+    def _valid_patches(cls, v: list[dict[str, Any]]) -> list[dict[str, Any]]:
+        for patch in v:
+            parse_doc_id(str(patch.get("id", "")))
+            if len(patch) < 2:
+                raise ValueError(f"Patch senza campi per {patch['id']}")
+        return v
+
+
+@router.post(
+    "/documents/changes",
+    summary="Aggiornamenti mirati dell'indice (push)",
+    description=(
+        "Accoda modifiche puntuali (upsert/delete per id, set o oracle_id modificati, patch parziali). "
+        "Le richieste che arrivano entro PUSH_COALESCE_WINDOW_MS vengono accorpate e applicate a Meilisearch "
+        "in un unico flush. Richiede l'header X-Admin-API-Key."
+    ),
+    status_code=status.HTTP_202_ACCEPTED,
+)
+async def document_changes(
+    body: DocumentChangesRequest,
+    _: None = Depends(validate_admin_key),
+) -> JSONResponse:
+    # Prima le patch, poi il resto della richiesta: nella stessa richiesta una delete vince sulla patch dello
+    # stesso id ("l'ultima vince" di merge() vale solo tra invii separati).
+    batch = ChangeBatch()
+    for patch in body.patches:
+        batch.merge(ChangeBatch(patches={patch["id"]: {k: v for k, v in patch.items() if k != "id"}}))
+    batch.merge(ChangeBatch(
+        upserts=set(body.upserts),
+        deletes=set(body.deletes),
+        set_ids=set(body.set_ids),
+        oracle_ids={o.strip() for o in body.oracle_ids if o.strip()},
+    ))
+    coalescer.submit(batch)
+    return JSONResponse(
+        status_code=status.HTTP_202_ACCEPTED,
+        content={"status": "queued", "accepted": batch.summary(), "pending": coalescer.pending},
+    )
+
+
+@router.get("/documents/changes", summary="Stato della coda di aggiornamenti mirati")
+async def document_changes_status(
+    _: None = Depends(validate_admin_key),
+) -> dict:
+    return {"pending": coalescer.pending, **coalescer.stats}
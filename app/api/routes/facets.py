@@ -0,0 +1,39 @@
+from fastapi import APIRouter, HTTPException, Query, status
+from fastapi.responses import JSONResponse
+
+from app.infrastructure.search.facets import combo_key, load_facets
+
+router = APIRouter(prefix="/api", tags=["Search"])
+
+
+@router.get(
+    "/facets",
+    summary="Conteggi facet precalcolati",
+    description=(
+        "Distribuzione di game_slug, category_id, set_name e rarity calcolata durante l'ultimo reindex. "
+        "Filtri supportati: nessuno, game_slug, category_id, game_slug + category_id. Non interroga Meilisearch."
+    ),
+)
+async def facets(
+    game_slug: str | None = Query(None, description="Es. mtg, op, pk"),
+    category_id: int | None = Query(None, description="Es. 1 = Carta Singola"),
+) -> JSONResponse:
+    data = load_facets()
+    if data is None:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Conteggi facet non ancora disponibili: eseguire un reindex.",
+        )
+    filters = {"game_slug": game_slug, "category_id": category_id}
+    # Una combinazione assente significa zero documenti (tutti i valori visti sono precalcolati).
+    entry = data["combos"].get(combo_key(filters), {"total": 0, "facets": {}})
+    return JSONResponse(
+        status_code=status.HTTP_200_OK,
+        content={
+            "filters": {k: v for k, v in filters.items() if v is not None},
+            "total": entry["total"],
+            "facets": entry["facets"],
+            "generated_at": data["generated_at"],
+        },
+        headers={"Cache-Control": "public, max-age=60"},
+    )
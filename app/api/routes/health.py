@@ -1,6 +1,8 @@
 from fastapi import APIRouter, status
 from fastapi.responses import JSONResponse
 
+from app.infrastructure.search.readiness import readiness
+
 router = APIRouter(tags=["Health"])
 
 
@@ -18,3 +20,19 @@ async def liveness_check() -> JSONResponse:
         status_code=status.HTTP_200_OK,
         content={"status": "alive"},
     )
+
+
+@router.get(
+    "/health/ready",
+    summary="Readiness: Meilisearch, MySQL e indice pronti",
+    description=(
+        "200 se Meilisearch e MySQL rispondono e l'indice carte ha documenti, altrimenti 503 con i controlli falliti "
+        "in failed. Esito in cache per HEALTH_READY_CACHE_SECONDS (age_seconds): il polling non aggiunge carico."
+    ),
+)
+async def readiness_check() -> JSONResponse:
+    result = await readiness()
+    return JSONResponse(
+        status_code=status.HTTP_200_OK if result["status"] == "ready" else status.HTTP_503_SERVICE_UNAVAILABLE,
+        content=result,
+    )
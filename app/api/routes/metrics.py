@@ -0,0 +1,12 @@
+from fastapi import APIRouter, Response
+
+from app.infrastructure.search.metrics import render_latest
+
+router = APIRouter(tags=["Metrics"])
+
+
+@router.get("/metrics", include_in_schema=False)
+async def metrics() -> Response:
+    """Metriche Prometheus: reindex (per sorgente) e latenza delle richieste."""
+    body, content_type = render_latest()
+    return Response(content=body, media_type=content_type)
@@ -0,0 +1,74 @@
+from typing import Any, Literal
+
+from fastapi import APIRouter, HTTPException, status
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel, ConfigDict, Field, field_validator
+from pydantic.alias_generators import to_camel
+
+from app.core.config import get_settings
+from app.infrastructure.search import server_timing
+from app.infrastructure.search.searcher import SearchBackendError, search_queries
+
+router = APIRouter(prefix="/api/search", tags=["Search"])
+
+
+class SearchQuery(BaseModel):
+    """Sottoinsieme dei parametri di ricerca Meilisearch (stessi nomi camelCase). index: cards (stampe) o sets."""
+
+    model_config = ConfigDict(alias_generator=to_camel, populate_by_name=True, extra="forbid")
+
+    index: Literal["cards", "sets"] = "cards"
+    q: str = ""
+    filter: str | list[str | list[str]] | None = None
+    sort: list[str] | None = None
+    limit: int = Field(default=20, ge=0, le=100)
+    offset: int = Field(default=0, ge=0, le=10000)
+    facets: list[str] | None = None
+    attributes_to_retrieve: list[str] | None = None
+    attributes_to_highlight: list[str] | None = None
+    matching_strategy: str | None = None
+
+
+class MultiSearchRequest(BaseModel):
+    queries: list[SearchQuery] = Field(..., min_length=1)
+    debug: bool = Field(default=False, description="Aggiunge alla risposta debug.timings_ms (come l'header Server-Timing)")
+
+    @field_validator("queries")
+    @classmethod
+    def _max_queries(cls, v: list[SearchQuery]) -> list[SearchQuery]:
+        limit = get_settings().SEARCH_MULTI_MAX_QUERIES
+        if len(v) > limit:
+            raise ValueError(f"Massimo {limit} query per richiesta")
+        return v
+
+
+def _to_meili_query(query: SearchQuery) -> dict[str, Any]:
+    settings = get_settings()
+    payload = query.model_dump(by_alias=True, exclude_none=True, exclude={"index"})
+    payload["indexUid"] = (
+        settings.MEILISEARCH_SETS_INDEX_NAME if query.index == "sets" else settings.MEILISEARCH_INDEX_NAME
+    )
+    return payload
+
+
+@router.post(
+    "/multi",
+    summary="Batch di ricerche (una sola chiamata Meilisearch)",
+    description=(
+        "Esegue più ricerche con un'unica chiamata multi-search. I risultati sono nello stesso ordine delle query. "
+        "Query identiche già in corso (anche da altri client) vengono condivise invece di essere ripetute. "
+        "L'header Server-Timing scompone la latenza (upstream, meili, serialize, total); con debug=true "
+        "le stesse fasi, fino alla chiamata Meilisearch, sono anche nel campo debug."
+    ),
+)
+async def search_multi(body: MultiSearchRequest) -> JSONResponse:
+    try:
+        results = await search_queries([_to_meili_query(q) for q in body.queries])
+    except SearchBackendError as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail)
+    content: dict[str, Any] = {"results": results}
+    timing = server_timing.current()
+    if body.debug and timing is not None:
+        content["debug"] = {"timings_ms": timing.as_dict(), "elapsed_ms": round(timing.elapsed_ms(), 2)}
+    with server_timing.measure("serialize"):
+        return JSONResponse(status_code=status.HTTP_200_OK, content=content)
@@ -0,0 +1,71 @@
+import hashlib
+import json
+import time
+
+from fastapi import APIRouter, HTTPException, Query, Request, Response, status
+
+from app.core.config import get_settings
+from app.infrastructure.search import server_timing
+from app.infrastructure.search.searcher import SearchBackendError, search_queries
+
+router = APIRouter(prefix="/api", tags=["Search"])
+
+# (game_slug, q, limit) -> (scadenza, body JSON, ETag). Il catalogo set cambia solo a ogni reindex.
+_cache: dict[tuple[str | None, str, int], tuple[float, bytes, str]] = {}
+_CACHE_MAX_ENTRIES = 1000
+
+
+async def _load_sets(game_slug: str | None, q: str, limit: int) -> tuple[bytes, str]:
+    key = (game_slug, q, limit)
+    started = time.perf_counter()
+    cached = _cache.get(key)
+    hit = bool(cached and cached[0] > time.monotonic())
+    server_timing.record("cache", (time.perf_counter() - started) * 1000, "hit" if hit else "miss")
+    if hit:
+        return cached[1], cached[2]
+
+    settings = get_settings()
+    query: dict = {"indexUid": settings.MEILISEARCH_SETS_INDEX_NAME, "q": q, "limit": limit}
+    if game_slug:
+        query["filter"] = f"game_slug = {json.dumps(game_slug)}"
+    if not q:
+        query["sort"] = ["release_date:desc"]
+    try:
+        (result,) = await search_queries([query])
+    except SearchBackendError as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail)
+
+    with server_timing.measure("serialize"):
+        body = json.dumps(
+            {"sets": result["hits"], "total": result.get("estimatedTotalHits", len(result["hits"]))},
+            ensure_ascii=False,
+        ).encode("utf-8")
+        etag = '"' + hashlib.sha1(body).hexdigest() + '"'
+    if len(_cache) >= _CACHE_MAX_ENTRIES:
+        _cache.clear()
+    _cache[key] = (time.monotonic() + settings.SETS_CACHE_TTL_SECONDS, body, etag)
+    return body, etag
+
+
+@router.get(
+    "/sets",
+    summary="Catalogo set",
+    description=(
+        "Set dall'indice dedicato (nome, nomi localizzati, code, release_date, set_icon_uri, game_slug). "
+        "Senza q: tutti i set del gioco dal più recente. Con q: ricerca per nome/traduzioni/code. Supporta If-None-Match."
+    ),
+)
+async def list_sets(
+    request: Request,
+    game_slug: str | None = Query(None, description="Es. mtg, op, pk"),
+    q: str = Query("", max_length=100, description="Ricerca per nome, nome localizzato o code"),
+    limit: int = Query(10000, ge=1, le=10000),
+) -> Response:
+    body, etag = await _load_sets(game_slug, q.strip(), limit)
+    headers = {
+        "ETag": etag,
+        "Cache-Control": f"public, max-age={get_settings().SETS_CACHE_TTL_SECONDS}",
+    }
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
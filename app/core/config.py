@@ -4,10 +4,27 @@ SecretStr ensures secrets are never logged in plain text.
 """
 from functools import lru_cache
 
-from pydantic import Field, SecretStr
+from pydantic import Field, SecretStr, field_validator
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
+def parse_schedule_times(value: str) -> list[tuple[int, int]]:
+    """'03:30,15:00' -> [(3, 30), (15, 0)]. ValueError su formati non validi."""
+    out = []
+    for item in value.split(","):
+        item = item.strip()
+        if not item:
+            continue
+        hour, _, minute = item.partition(":")
+        if not (hour.isdigit() and (minute.isdigit() or not minute)):
+            raise ValueError(f"Orario non valido in SCHEDULER_FULL_REINDEX_AT: {item!r} (atteso HH:MM)")
+        h, m = int(hour), int(minute or 0)
+        if not (0 <= h < 24 and 0 <= m < 60):
+            raise ValueError(f"Orario non valido in SCHEDULER_FULL_REINDEX_AT: {item!r} (atteso HH:MM)")
+        out.append((h, m))
+    return out
+
+
 class Settings(BaseSettings):
     model_config = SettingsConfigDict(
         env_file=".env",
@@ -34,12 +51,148 @@ class Settings(BaseSettings):
     MEILISEARCH_URL: str = Field(..., description="Meilisearch URL (e.g. http://localhost:7700)")
     MEILISEARCH_MASTER_KEY: SecretStr = Field(..., description="Meilisearch master key")
     MEILISEARCH_INDEX_NAME: str = Field(default="cards", description="Meilisearch index name")
+    MEILISEARCH_SETS_INDEX_NAME: str = Field(default="sets", description="Meilisearch index with one document per set")
+
+    # Search API (non-sensitive)
+    SEARCH_TIMEOUT_SECONDS: float = Field(default=5.0, description="Timeout for Meilisearch calls from the search API")
+    SEARCH_MULTI_MAX_QUERIES: int = Field(default=20, description="Max queries per /api/search/multi request")
+    SEARCH_SINGLE_FLIGHT: bool = Field(
+        default=True,
+        description="Coalesce identical concurrent queries into a single Meilisearch call",
+    )
+    SERVER_TIMING_ENABLED: bool = Field(
+        default=True,
+        description="Add a Server-Timing header (cache, upstream, meili, serialize, total) to API responses",
+    )
+    SEARCH_SLOW_LOG_MS: float = Field(
+        default=1000.0,
+        description="Log a warning with the Server-Timing breakdown for search requests slower than this (0 = off)",
+    )
+    SETS_CACHE_TTL_SECONDS: int = Field(default=300, description="In-process cache TTL for /api/sets responses")
+    EXPORT_PAGE_SIZE: int = Field(default=1000, description="Documents per page when streaming /api/admin/export")
+    EXPORT_TIMEOUT_SECONDS: float = Field(default=30.0, description="Timeout per documents page fetched by the export")
+
+    # Readiness (/health/ready)
+    HEALTH_READY_CACHE_SECONDS: float = Field(
+        default=5.0,
+        description="Seconds a readiness probe result is reused before MySQL and Meilisearch are checked again",
+    )
+    HEALTH_READY_TIMEOUT_SECONDS: float = Field(default=2.0, description="Timeout of each readiness probe")
+    HEALTH_READY_MIN_DOCUMENTS: int = Field(
+        default=1,
+        description="Documents the cards index must hold for the instance to be ready",
+    )
+    HEALTH_READY_REQUIRE_IDLE_INDEX: bool = Field(
+        default=False,
+        description="Not ready while Meilisearch reports isIndexing (also true during small pushed updates)",
+    )
+    HEALTH_READY_REQUIRE_MYSQL: bool = Field(
+        default=True,
+        description="Not ready when MySQL is unreachable (searches themselves only need Meilisearch)",
+    )
+
+    # Task monitor Meilisearch (GET /api/admin/tasks, poller con warning nei log)
+    TASK_MONITOR_INTERVAL_SECONDS: float = Field(
+        default=60.0,
+        description="Seconds between polls of the Meilisearch task queue (0 = poller disabled, endpoint still available)",
+    )
+    TASK_MONITOR_WINDOW_SECONDS: float = Field(
+        default=900.0,
+        description="Window of finished tasks used for failures, durations and documents per second",
+    )
+    TASK_MONITOR_MAX_ENQUEUED: int = Field(default=100, description="Enqueued tasks above which a warning is logged")
+    TASK_MONITOR_MAX_ENQUEUED_AGE_SECONDS: float = Field(
+        default=300.0,
+        description="Age of the oldest enqueued task above which a warning is logged",
+    )
+    TASK_MONITOR_MAX_FAILED: int = Field(default=0, description="Failed tasks in the window above which a warning is logged")
 
     # Indexer (non-sensitive)
     INDEXER_BATCH_SIZE: int = Field(
         default=5000,
         description="Number of documents per batch when indexing",
     )
+    INDEXER_PAGE_SIZE: int = Field(
+        default=5000,
+        description="Rows per keyset-paginated MySQL query (WHERE id > last ORDER BY id LIMIT n)",
+    )
+    INDEXER_WORKERS: int = Field(
+        default=1,
+        description="Parallel workers (one MySQL connection each) for sources in INDEXER_PARALLEL_SOURCES",
+    )
+    INDEXER_PARALLEL_SOURCES: str = Field(
+        default="mtg",
+        description="Comma-separated sources read in primary-key ranges by INDEXER_WORKERS workers (full reindex)",
+    )
+    REINDEX_WORKER_PROCESS: bool = Field(
+        default=True,
+        description="Run API-triggered reindex jobs in a spawned worker process instead of a thread of the API process",
+    )
+    SCHEDULER_ENABLED: bool = Field(default=False, description="Run scheduled incremental syncs and full reindexes in the API")
+    SCHEDULER_SYNC_INTERVAL_SECONDS: int = Field(
+        default=300,
+        description="Interval between incremental syncs of new rows (0 = disabled)",
+    )
+    SCHEDULER_FULL_REINDEX_AT: str = Field(
+        default="03:30",
+        description="Comma-separated UTC times (HH:MM) for scheduled full reindexes; empty = none",
+    )
+    SCHEDULER_JITTER_SECONDS: int = Field(default=60, description="Random delay added to every scheduled run")
+    INDEXER_SKIP_UNCHANGED: bool = Field(
+        default=True,
+        description="Full reindex skips sources whose table fingerprints match the last successful run",
+    )
+    INDEXER_FINGERPRINT_UPDATED_COLUMN: str = Field(
+        default="updated_at",
+        description="Timestamp column whose MAX() enters the fingerprint, where the table has it",
+    )
+    INDEXER_FINGERPRINT_CHECKSUM: bool = Field(
+        default=False,
+        description="Add CHECKSUM TABLE to the fingerprint (catches in-place updates, reads the whole table)",
+    )
+    INDEXER_SEND_RETRIES: int = Field(
+        default=3,
+        description="Retries of a failed add_documents (network, timeout, 429, 5xx) before the batch is journaled",
+    )
+    INDEXER_RETRY_BACKOFF_SECONDS: float = Field(default=2.0, description="First retry delay, doubled at each attempt")
+    INDEXER_TASK_TIMEOUT_SECONDS: float = Field(
+        default=600.0,
+        description="Max wait for a Meilisearch batch task before the checkpoint is advanced",
+    )
+    INDEXER_CHECKPOINT_MAX_AGE_HOURS: float = Field(
+        default=24.0,
+        description="Checkpoints of interrupted full reindexes older than this are ignored (run restarts from zero)",
+    )
+    PUSH_COALESCE_WINDOW_MS: int = Field(
+        default=500,
+        description="Window in which pushed document changes are coalesced into one flush",
+    )
+    PUSH_MAX_PENDING: int = Field(default=5000, description="Pending pushed changes that trigger an immediate flush")
+    CDC_SERVER_ID: int = Field(default=4242, description="Replica server_id used by cdc_worker.py (unique per MySQL server)")
+    CDC_FLUSH_INTERVAL_MS: int = Field(default=1000, description="Max time binlog changes wait before being applied")
+    CDC_MAX_PENDING: int = Field(default=5000, description="Pending binlog changes that trigger an immediate flush")
+    INDEXER_STATE_DIR: str = Field(
+        default="state",
+        description="Persistent directory shared by the API, reindex.py and cdc_worker.py (checkpoint, facets, journal, ...)",
+    )
+
+    @field_validator("SCHEDULER_FULL_REINDEX_AT")
+    @classmethod
+    def _check_full_reindex_at(cls, value: str) -> str:
+        # Un orario non valido deve fermare l'avvio, non il loop dello scheduler a runtime.
+        parse_schedule_times(value)
+        return value
+
+    # Tracing OpenTelemetry (opzionale, richiede opentelemetry-sdk)
+    TRACING_EXPORTER: str = Field(
+        default="",
+        description="Span exporter: empty = tracing off, console = stdout, otlp = OTLP/HTTP collector",
+    )
+    TRACING_OTLP_ENDPOINT: str = Field(
+        default="http://localhost:4318/v1/traces",
+        description="OTLP/HTTP traces endpoint used when TRACING_EXPORTER=otlp",
+    )
+    TRACING_SERVICE_NAME: str = Field(default="search-engine", description="service.name attribute of exported spans")
 
     # Admin API Key (per operazioni come reindex). Se assente l'app parte ma reindex ritorna 503.
     SEARCH_ADMIN_API_KEY: SecretStr = Field(
@@ -0,0 +1,178 @@
+"""
+Change-data-capture dal binlog MySQL: legge gli eventi di riga delle tabelle che alimentano l'indice,
+li traduce in ChangeBatch (con fan-out per sets e card_translations) e li applica con apply_changes().
+Dopo ogni flush riuscito viene salvata in INDEXER_STATE_DIR/cdc_position.json la posizione dell'ultimo COMMIT
+letto (XidEvent o QueryEvent "COMMIT"), mai una posizione a metà transazione: al riavvio il worker riparte da lì
+e rilegge l'eventuale transazione parziale (gli upsert rileggono MySQL, quindi rielaborare eventi è innocuo).
+
+Requisiti MySQL: binlog_format=ROW, binlog_row_image=FULL, utente con REPLICATION SLAVE e REPLICATION CLIENT.
+Dipendenza opzionale: mysql-replication (import pymysqlreplication).
+"""
+import json
+import logging
+import os
+import time
+from pathlib import Path
+from typing import Any
+
+from app.core.config import get_settings
+from app.infrastructure.search.indexer import _get_meilisearch_client, _get_mysql_connection
+from app.infrastructure.search.updates import (
+    FLUSH_RETRY_BACKOFF_SECONDS,
+    MAX_FLUSH_ATTEMPTS,
+    ChangeBatch,
+    apply_changes,
+)
+
+logger = logging.getLogger(__name__)
+
+POSITION_FILENAME = "cdc_position.json"
+
+# Tabelle di stampe/prodotti: id riga -> id documento "<prefisso>_<id>".
+PRINT_TABLES = {
+    "cards_prints": "mtg",
+    "op_prints": "op",
+    "pk_prints": "pk",
+    "sealed_products": "sealed",
+}
+# Tabelle con fan-out: una riga cambia più documenti.
+FANOUT_TABLES = ("sets", "card_translations", "cards")
+CDC_TABLES = (*PRINT_TABLES, *FANOUT_TABLES)
+
+
+def changes_for_rows(table: str, kind: str, rows: list[dict[str, Any]]) -> ChangeBatch:
+    """
+    Traduce le righe di un evento binlog (kind: insert | update | delete) in un ChangeBatch.
+    rows: valori delle colonne per riga (per gli update: sia before che after).
+    """
+    batch = ChangeBatch()
+    for values in rows:
+        if table in PRINT_TABLES:
+            doc_id = f"{PRINT_TABLES[table]}_{values['id']}"
+            (batch.deletes if kind == "delete" else batch.upserts).add(doc_id)
+        elif table == "sets":
+            if kind == "delete":
+                batch.set_deletes.add(int(values["id"]))
+            else:
+                batch.set_ids.add(int(values["id"]))
+        elif table == "card_translations":
+            # Solo MTG ha traduzioni indicizzate (entity_id = oracle_id).
+            if values.get("game_slug") == "mtg" and values.get("entity_id"):
+                batch.oracle_ids.add(str(values["entity_id"]).strip())
+        elif table == "cards":
+            if values.get("oracle_id"):
+                batch.oracle_ids.add(str(values["oracle_id"]).strip())
+    return batch
+
+
+def _position_path() -> Path:
+    return Path(get_settings().INDEXER_STATE_DIR) / POSITION_FILENAME
+
+
+def load_position() -> dict[str, Any] | None:
+    path = _position_path()
+    if not path.exists():
+        return None
+    return json.loads(path.read_text(encoding="utf-8"))
+
+
+def save_position(log_file: str, log_pos: int) -> None:
+    path = _position_path()
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(".json.tmp")
+    tmp.write_text(json.dumps({"log_file": log_file, "log_pos": log_pos, "saved_at": time.time()}), encoding="utf-8")
+    os.replace(tmp, path)
+
+
+def _apply_with_retry(conn: Any, client: Any, batch: ChangeBatch) -> dict[str, int]:
+    """
+    apply_changes con i tentativi e il backoff del push (2/4/8/16 s): un errore transitorio (Meilisearch giù,
+    MySQL che cade) non ferma il worker. Esauriti i tentativi l'errore risale e il worker esce senza aver
+    salvato la posizione: al riavvio le modifiche vengono rilette dal binlog.
+    """
+    attempt = 1
+    while True:
+        try:
+            conn.ping(reconnect=True)
+            return apply_changes(conn, client, batch)
+        except Exception as e:
+            if attempt >= MAX_FLUSH_ATTEMPTS:
+                logger.error("CDC flush failed after %d attempts: %s (%s)", attempt, batch.summary(), e)
+                raise
+            delay = FLUSH_RETRY_BACKOFF_SECONDS * 2 ** (attempt - 1)
+            logger.warning("CDC flush failed (attempt %d), retrying in %.0fs: %s", attempt, delay, e)
+            time.sleep(delay)
+            attempt += 1
+
+
+def run_cdc_worker() -> None:
+    """
+    Loop bloccante: stream del binlog, accumulo delle modifiche per CDC_FLUSH_INTERVAL_MS
+    (o fino a CDC_MAX_PENDING), flush su Meilisearch, salvataggio della posizione dell'ultimo COMMIT.
+    Senza posizione salvata parte dalla posizione corrente (indice allineato da un reindex totale).
+    """
+    from pymysqlreplication import BinLogStreamReader
+    from pymysqlreplication.event import HeartbeatLogEvent, QueryEvent, XidEvent
+    from pymysqlreplication.row_event import DeleteRowsEvent, UpdateRowsEvent, WriteRowsEvent
+
+    settings = get_settings()
+    position = load_position()
+    stream = BinLogStreamReader(
+        connection_settings={
+            "host": settings.MYSQL_HOST,
+            "port": settings.MYSQL_PORT,
+            "user": settings.MYSQL_USER,
+            "passwd": settings.MYSQL_PASSWORD.get_secret_value(),
+        },
+        server_id=settings.CDC_SERVER_ID,
+        only_schemas=[settings.MYSQL_DATABASE],
+        only_tables=list(CDC_TABLES),
+        # Xid/Query: confini di transazione, per salvare solo posizioni dopo un COMMIT.
+        only_events=[WriteRowsEvent, UpdateRowsEvent, DeleteRowsEvent, XidEvent, QueryEvent, HeartbeatLogEvent],
+        resume_stream=True,
+        log_file=position["log_file"] if position else None,
+        log_pos=position["log_pos"] if position else None,
+        blocking=True,
+        # Heartbeat periodico: permette il flush a tempo anche quando non arrivano eventi.
+        slave_heartbeat=max(settings.CDC_FLUSH_INTERVAL_MS / 1000, 1),
+    )
+    logger.info("CDC worker started from %s", position or "current binlog position")
+
+    conn = _get_mysql_connection()
+    client = _get_meilisearch_client()
+    pending = ChangeBatch()
+    first_change_at: float | None = None
+    # Posizione dopo l'ultimo COMMIT letto: il flush può cadere a metà transazione (per tempo o dimensione).
+    committed: tuple[str, int] | None = None
+    try:
+        for event in stream:
+            if isinstance(event, XidEvent) or (
+                isinstance(event, QueryEvent) and str(event.query).strip().upper() == "COMMIT"
+            ):
+                committed = (stream.log_file, stream.log_pos)
+            elif isinstance(event, (WriteRowsEvent, UpdateRowsEvent, DeleteRowsEvent)):
+                if isinstance(event, UpdateRowsEvent):
+                    rows = [v for row in event.rows for v in (row["before_values"], row["after_values"])]
+                    kind = "update"
+                else:
+                    rows = [row["values"] for row in event.rows]
+                    kind = "insert" if isinstance(event, WriteRowsEvent) else "delete"
+                pending.merge(changes_for_rows(event.table, kind, rows))
+                if first_change_at is None:
+                    first_change_at = time.monotonic()
+
+            due = first_change_at is not None and (
+                time.monotonic() - first_change_at >= settings.CDC_FLUSH_INTERVAL_MS / 1000
+                or len(pending) >= settings.CDC_MAX_PENDING
+            )
+            if due:
+                counts = _apply_with_retry(conn, client, pending)
+                if committed is not None:
+                    save_position(*committed)
+                logger.info("CDC flush: %s -> %s (committed binlog %s)", pending.summary(), counts,
+                            "%s:%s" % committed if committed else "-")
+                pending = ChangeBatch()
+                first_change_at = None
+    finally:
+        stream.close()
+        conn.close()
@@ -0,0 +1,124 @@
+"""
+Checkpoint del reindex totale: per ogni sorgente (o partizione di una sorgente letta in parallelo)
+l'ultimo id di riga il cui batch è stato confermato da Meilisearch (task completato), i documenti
+indicizzati e i facet accumulati fin lì.
+Salvato in INDEXER_STATE_DIR/reindex_checkpoint.json dopo ogni batch confermato: un run interrotto
+(connessione RDS persa, container riavviato) riparte dall'ultimo id invece che da zero.
+Rimosso a fine run riuscito; ignorato se più vecchio di INDEXER_CHECKPOINT_MAX_AGE_HOURS.
+"""
+import json
+import logging
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any
+
+from app.core.config import get_settings
+from app.infrastructure.search.facets import FacetCounter
+
+logger = logging.getLogger(__name__)
+
+CHECKPOINT_FILENAME = "reindex_checkpoint.json"
+
+
+def _checkpoint_path() -> Path:
+    return Path(get_settings().INDEXER_STATE_DIR) / CHECKPOINT_FILENAME
+
+
+class ReindexCheckpoint:
+    """
+    Stato per chiave: la sorgente ("mtg") o una sua partizione ("mtg/2").
+    Thread-safe: le partizioni di una sorgente fanno commit da thread diversi.
+    """
+
+    def __init__(self, index_name: str, data: dict[str, Any] | None = None) -> None:
+        data = data or {}
+        self.index_name = index_name
+        self.started_at: float = data.get("started_at", time.time())
+        # key -> {"last_id": ..., "count": int, "done": bool, "facets": dict | None}
+        self.sources: dict[str, dict[str, Any]] = data.get("sources", {})
+        # source -> confini delle partizioni del run (riusati alla ripresa anche se INDEXER_WORKERS cambia)
+        self.partitions: dict[str, list[list[Any]]] = data.get("partitions", {})
+        # MAX(id) per sorgente all'avvio del run: diventano i watermark del sync incrementale a fine run
+        self.watermarks: dict[str, int] = data.get("watermarks", {})
+        # fingerprint per sorgente all'avvio del run: salvati in fingerprints.json a fine run
+        self.fingerprints: dict[str, Any] = data.get("fingerprints", {})
+        self.resumed = bool(self.sources)
+        self._lock = threading.Lock()
+
+    @classmethod
+    def load(cls, index_name: str) -> "ReindexCheckpoint":
+        """Checkpoint del run interrotto, se valido per questo indice; altrimenti uno vuoto (run da zero)."""
+        path = _checkpoint_path()
+        try:
+            data = json.loads(path.read_text(encoding="utf-8"))
+        except FileNotFoundError:
+            return cls(index_name)
+        except ValueError:
+            logger.warning("Ignoring unreadable reindex checkpoint %s", path)
+            return cls(index_name)
+        max_age = get_settings().INDEXER_CHECKPOINT_MAX_AGE_HOURS * 3600
+        if data.get("index_name") != index_name or time.time() - data.get("saved_at", 0) > max_age:
+            logger.info("Ignoring stale reindex checkpoint %s", path)
+            return cls(index_name)
+        checkpoint = cls(index_name, data)
+        logger.info(
+            "Resuming reindex from checkpoint: %s",
+            {key: {k: v for k, v in state.items() if k != "facets"} for key, state in checkpoint.sources.items()},
+        )
+        return checkpoint
+
+    def source_state(self, key: str) -> dict[str, Any]:
+        return self.sources.get(key, {"last_id": None, "count": 0, "done": False, "facets": None})
+
+    def facet_counter(self, key: str) -> FacetCounter:
+        facets = self.source_state(key).get("facets")
+        return FacetCounter.from_dict(facets) if facets else FacetCounter()
+
+    def set_partitions(self, source: str, bounds: list[list[Any]]) -> None:
+        with self._lock:
+            self.partitions[source] = bounds
+            self._save()
+
+    def commit(self, key: str, last_id: Any, count: int, facets: FacetCounter | None = None) -> None:
+        """Registra un batch confermato da Meilisearch e salva su disco."""
+        with self._lock:
+            self.sources[key] = {
+                "last_id": last_id,
+                "count": count,
+                "done": False,
+                "facets": facets.to_dict() if facets is not None else None,
+            }
+            self._save()
+
+    def finish_source(self, key: str, count: int, facets: FacetCounter | None = None) -> None:
+        with self._lock:
+            state = self.source_state(key)
+            self.sources[key] = {
+                **state,
+                "count": count,
+                "done": True,
+                "facets": facets.to_dict() if facets is not None else state.get("facets"),
+            }
+            self._save()
+
+    def _save(self) -> None:
+        path = _checkpoint_path()
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(".json.tmp")
+        payload = {
+            "index_name": self.index_name,
+            "started_at": self.started_at,
+            "saved_at": time.time(),
+            "sources": self.sources,
+            "partitions": self.partitions,
+            "watermarks": self.watermarks,
+            "fingerprints": self.fingerprints,
+        }
+        tmp.write_text(json.dumps(payload, ensure_ascii=False, default=str), encoding="utf-8")
+        os.replace(tmp, path)
+
+    @staticmethod
+    def clear() -> None:
+        _checkpoint_path().unlink(missing_ok=True)
@@ -0,0 +1,77 @@
+"""
+Export dell'indice come NDJSON: generatore sulla documents API di Meilisearch (POST /documents/fetch),
+una pagina alla volta, così la memoria resta costante anche sull'intero catalogo.
+"""
+import json
+import logging
+import time
+from collections.abc import AsyncIterator
+from typing import Any
+
+import httpx
+
+from app.core.config import get_settings
+from app.infrastructure.search.metrics import observe_meilisearch
+from app.infrastructure.search.searcher import SearchBackendError, get_http_client
+
+logger = logging.getLogger(__name__)
+
+
+async def fetch_documents_page(
+    index_name: str,
+    offset: int,
+    limit: int,
+    filter: str | None = None,
+    fields: list[str] | None = None,
+) -> dict[str, Any]:
+    """Una pagina di documenti: { results, offset, limit, total }."""
+    body: dict[str, Any] = {"offset": offset, "limit": limit}
+    if filter:
+        body["filter"] = filter
+    if fields:
+        body["fields"] = fields
+    started = time.perf_counter()
+    try:
+        response = await get_http_client().post(
+            f"/indexes/{index_name}/documents/fetch",
+            json=body,
+            timeout=get_settings().EXPORT_TIMEOUT_SECONDS,
+        )
+    except httpx.HTTPError as e:
+        observe_meilisearch("documents-fetch", started, None)
+        raise SearchBackendError(502, "Meilisearch non raggiungibile") from e
+    observe_meilisearch("documents-fetch", started, response.status_code)
+    if response.status_code >= 500:
+        raise SearchBackendError(502, "Errore da Meilisearch")
+    if response.status_code >= 400:
+        raise SearchBackendError(400, response.json().get("message") or "Richiesta di export non valida")
+    return response.json()
+
+
+async def iter_ndjson(
+    index_name: str,
+    first_page: dict[str, Any],
+    filter: str | None = None,
+    fields: list[str] | None = None,
+) -> AsyncIterator[bytes]:
+    """
+    Emette un chunk NDJSON per pagina, partendo da una prima pagina già letta
+    (così gli errori di filtro arrivano come 400 prima di iniziare lo stream).
+    """
+    page = first_page
+    page_size = first_page["limit"]
+    sent = 0
+    while True:
+        results = page["results"]
+        if results:
+            yield "".join(json.dumps(doc, ensure_ascii=False) + "\n" for doc in results).encode("utf-8")
+            sent += len(results)
+        if len(results) < page_size:
+            break
+        try:
+            page = await fetch_documents_page(index_name, page["offset"] + page_size, page_size, filter, fields)
+        except SearchBackendError:
+            # Lo status 200 è già partito: lo stream si interrompe e il consumer vede il troncamento.
+            logger.exception("Export interrupted after %d documents", sent)
+            raise
+    logger.info("Export complete: %d documents (filter=%s)", sent, filter)
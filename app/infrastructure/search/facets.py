@@ -0,0 +1,115 @@
+"""
+Facet counts precalcolati dall'indexer: game_slug, category_id, set_name, rarity.
+Calcolati nello stesso passaggio sulle righe MySQL, salvati in INDEXER_STATE_DIR/facets.json
+e serviti da /api/facets senza interrogare Meilisearch (cambiano solo a ogni reindex).
+"""
+import json
+import logging
+import os
+from collections import Counter, defaultdict
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any
+
+from app.core.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+FACET_FIELDS = ("game_slug", "category_id", "set_name", "rarity")
+
+# Combinazioni di filtri precalcolate (i casi comuni delle pagine categoria).
+FILTER_COMBOS: tuple[tuple[str, ...], ...] = (
+    (),
+    ("game_slug",),
+    ("category_id",),
+    ("game_slug", "category_id"),
+)
+
+FACETS_FILENAME = "facets.json"
+
+
+def combo_key(filters: dict[str, Any]) -> str:
+    """Chiave stabile per una combinazione di filtri, es. 'category_id=1|game_slug=mtg' ('' = nessun filtro)."""
+    return "|".join(f"{k}={filters[k]}" for k in sorted(filters) if filters[k] is not None)
+
+
+class FacetCounter:
+    """Accumula le distribuzioni dei facet per ogni combinazione di FILTER_COMBOS."""
+
+    def __init__(self) -> None:
+        self._totals: Counter[str] = Counter()
+        self._counts: dict[str, dict[str, Counter[str]]] = defaultdict(lambda: defaultdict(Counter))
+
+    def add(self, doc: dict[str, Any]) -> None:
+        values = {field: doc.get(field) for field in FACET_FIELDS}
+        for combo in FILTER_COMBOS:
+            if any(values[f] in (None, "") for f in combo):
+                continue
+            key = combo_key({f: values[f] for f in combo})
+            self._totals[key] += 1
+            bucket = self._counts[key]
+            for field in FACET_FIELDS:
+                value = values[field]
+                if value is None or value == "":
+                    continue
+                bucket[field][str(value)] += 1
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "generated_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "combos": {
+                key: {
+                    "total": self._totals[key],
+                    "facets": {field: dict(counter) for field, counter in self._counts[key].items()},
+                }
+                for key in self._totals
+            },
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> "FacetCounter":
+        """Inverso di to_dict(): riprende i conteggi salvati nel checkpoint di un reindex interrotto."""
+        counter = cls()
+        for key, combo in data.get("combos", {}).items():
+            counter._totals[key] = combo["total"]
+            for field, values in combo["facets"].items():
+                counter._counts[key][field].update(values)
+        return counter
+
+    def merge(self, other: "FacetCounter") -> None:
+        """Somma i conteggi di un altro counter (partizioni/sorgenti indicizzate separatamente)."""
+        self._totals.update(other._totals)
+        for key, fields in other._counts.items():
+            for field, counter in fields.items():
+                self._counts[key][field].update(counter)
+
+
+def _facets_path() -> Path:
+    return Path(get_settings().INDEXER_STATE_DIR) / FACETS_FILENAME
+
+
+def save_facets(counter: FacetCounter) -> Path:
+    """Scrittura atomica (tmp + rename): chi legge non vede mai un file parziale."""
+    path = _facets_path()
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(".json.tmp")
+    tmp.write_text(json.dumps(counter.to_dict(), ensure_ascii=False), encoding="utf-8")
+    os.replace(tmp, path)
+    logger.info("Facet counts saved to %s", path)
+    return path
+
+
+_cache: dict[str, Any] = {"mtime": None, "data": None}
+
+
+def load_facets() -> dict[str, Any] | None:
+    """Legge facets.json con cache in memoria invalidata dal mtime del file. None se mai calcolati."""
+    path = _facets_path()
+    try:
+        mtime = path.stat().st_mtime
+    except FileNotFoundError:
+        return None
+    if _cache["mtime"] != mtime:
+        _cache["data"] = json.loads(path.read_text(encoding="utf-8"))
+        _cache["mtime"] = mtime
+    return _cache["data"]
@@ -0,0 +1,80 @@
+"""
+Fingerprint delle tabelle MySQL lette da ogni sorgente: righe, UPDATE_TIME di information_schema,
+MAX della colonna INDEXER_FINGERPRINT_UPDATED_COLUMN se presente e, con INDEXER_FINGERPRINT_CHECKSUM,
+CHECKSUM TABLE. Il reindex totale salta le sorgenti il cui fingerprint coincide con quello dell'ultimo
+run riuscito, riusando conteggi e facet salvati in INDEXER_STATE_DIR/fingerprints.json.
+"""
+import json
+import logging
+import os
+from pathlib import Path
+from typing import Any
+
+import pymysql
+
+from app.core.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+FINGERPRINTS_FILENAME = "fingerprints.json"
+
+
+def table_fingerprints(conn: pymysql.Connection, tables: set[str]) -> dict[str, dict[str, Any]]:
+    """Fingerprint per tabella. Solleva pymysql.MySQLError se una query fallisce (il chiamante non salta nulla)."""
+    settings = get_settings()
+    column = settings.INDEXER_FINGERPRINT_UPDATED_COLUMN
+    out: dict[str, dict[str, Any]] = {}
+    with conn.cursor() as cur:
+        try:
+            # MySQL 8 tiene in cache le statistiche di information_schema (default 24h): UPDATE_TIME aggiornato.
+            cur.execute("SET SESSION information_schema_stats_expiry = 0")
+        except pymysql.MySQLError:
+            pass
+        for table in sorted(tables):
+            try:
+                cur.execute(f"SELECT COUNT(*) AS n FROM {table}")
+            except pymysql.ProgrammingError:  # tabella opzionale non ancora creata (es. set_translations)
+                out[table] = {"missing": True}
+                continue
+            fp: dict[str, Any] = {"rows": int(cur.fetchone()["n"])}
+            cur.execute(
+                "SELECT UPDATE_TIME AS t FROM information_schema.TABLES WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s",
+                (table,),
+            )
+            row = cur.fetchone()
+            fp["update_time"] = str(row["t"]) if row and row["t"] is not None else None
+            if column:
+                cur.execute(
+                    "SELECT 1 FROM information_schema.COLUMNS "
+                    "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND COLUMN_NAME = %s",
+                    (table, column),
+                )
+                if cur.fetchone():
+                    cur.execute(f"SELECT MAX({column}) AS t FROM {table}")
+                    fp["max_updated"] = str(cur.fetchone()["t"])
+            if settings.INDEXER_FINGERPRINT_CHECKSUM:
+                cur.execute(f"CHECKSUM TABLE {table}")
+                fp["checksum"] = cur.fetchone()["Checksum"]
+            out[table] = fp
+    # Round-trip JSON: confrontabile con quanto riletto da fingerprints.json.
+    return json.loads(json.dumps(out, default=str))
+
+
+def _fingerprints_path() -> Path:
+    return Path(get_settings().INDEXER_STATE_DIR) / FINGERPRINTS_FILENAME
+
+
+def load_fingerprints() -> dict[str, dict[str, Any]]:
+    """source -> {"fingerprint": ..., "count": int, "facets": dict | None} dell'ultimo run totale riuscito."""
+    try:
+        return json.loads(_fingerprints_path().read_text(encoding="utf-8"))
+    except (FileNotFoundError, ValueError):
+        return {}
+
+
+def save_fingerprints(data: dict[str, dict[str, Any]]) -> None:
+    path = _fingerprints_path()
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(".json.tmp")
+    tmp.write_text(json.dumps(data, ensure_ascii=False), encoding="utf-8")
+    os.replace(tmp, path)
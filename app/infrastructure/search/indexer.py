@@ -1,26 +1,81 @@
 """
 Search indexer: syncs card prints from MySQL to Meilisearch.
 Print-first search with centralized multilingual support via card_translations + keywords_localized.
+Every source (mtg, op, pk, sealed, sets) is described once in _SOURCES: the same query and
+row -> document code serve full reindex, partial reindex (ReindexScope) and targeted upserts.
 """
+import contextvars
+import json
 import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from dataclasses import dataclass, field
 from datetime import date, datetime
-from typing import Any
+from pathlib import Path
+from typing import Any, Callable, Iterator
 
 import pymysql
 from meilisearch import Client
-from meilisearch.errors import MeilisearchError
+from meilisearch.errors import (
+    MeilisearchApiError,
+    MeilisearchCommunicationError,
+    MeilisearchError,
+    MeilisearchTimeoutError,
+)
 
 from app.core.config import get_settings
+from app.infrastructure.search.checkpoint import ReindexCheckpoint
+from app.infrastructure.search.facets import FacetCounter, save_facets
+from app.infrastructure.search.fingerprints import load_fingerprints, save_fingerprints, table_fingerprints
+from app.infrastructure.search.journal import finish_replay, record_failed_batch, take_entries
+from app.infrastructure.search.metrics import (
+    REINDEX_BATCH_SEND_SECONDS,
+    REINDEX_DOCS_JOURNALED,
+    REINDEX_DOCS_SENT,
+    REINDEX_ROWS_FETCHED,
+    REINDEX_SOURCE_SECONDS,
+    REINDEX_TASK_WAIT_SECONDS,
+)
+from app.infrastructure.search.progress import ReindexProgress
+from app.infrastructure.search.sql_profile import ProfilingCursor
+from app.infrastructure.search.timings import StageTimings, peak_memory_mb
+from app.infrastructure.search.tracing import span
+from app.infrastructure.search.watermarks import load_watermarks, save_watermarks
+
+try:
+    import fcntl
+except ImportError:  # Windows (sviluppo locale): nessun lock tra processi
+    fcntl = None
 
 logger = logging.getLogger(__name__)
 
 # Batch size for Meilisearch add_documents
 BATCH_SIZE = 5000
 
+# Max valori per clausola IN (...) nelle query mirate.
+_IN_CHUNK = 1000
+
+# Formato dei documenti nel fingerprint: cambiandolo il reindex totale successivo non salta nessuna sorgente.
+# 2: set_id su stampe e sealed (filterable, per cancellare i documenti di un set rimosso).
+_DOCUMENT_VERSION = 2
+
+# Conteggi approssimati (senza JOIN) per stimare l'ETA del job di reindex.
+_SOURCE_COUNT_QUERIES = {
+    "mtg": "SELECT COUNT(*) AS n FROM cards_prints WHERE oracle_id IS NOT NULL",
+    "op": "SELECT COUNT(*) AS n FROM op_prints",
+    "pk": "SELECT COUNT(*) AS n FROM pk_prints",
+    "sealed": "SELECT COUNT(*) AS n FROM sealed_products WHERE category_id != 1",
+    "sets": "SELECT COUNT(*) AS n FROM sets",
+}
 
-def _get_mysql_connection():
-    """Create a MySQL connection from settings. Secrets via get_secret_value()."""
+
+def _get_mysql_connection(timeout: float | None = None):
+    """Create a MySQL connection from settings. Secrets via get_secret_value(). timeout: connect/read (probe)."""
     settings = get_settings()
+    options: dict[str, Any] = {}
+    if timeout is not None:
+        options = {"connect_timeout": timeout, "read_timeout": timeout}
     return pymysql.connect(
         host=settings.MYSQL_HOST,
         port=settings.MYSQL_PORT,
@@ -28,7 +83,9 @@ def _get_mysql_connection():
         password=settings.MYSQL_PASSWORD.get_secret_value(),
         database=settings.MYSQL_DATABASE,
         charset="utf8mb4",
-        cursorclass=pymysql.cursors.DictCursor,
+        # DictCursor che registra tempi e piani delle query durante sql_profile.capture_sql().
+        cursorclass=ProfilingCursor,
+        **options,
     )
 
 
@@ -41,31 +98,81 @@ def _get_meilisearch_client() -> Client:
     )
 
 
-def _get_translations_for_game(conn: pymysql.Connection, game_slug: str) -> dict[str, list[str]]:
+def _chunks(values: list[Any], size: int = _IN_CHUNK) -> Iterator[list[Any]]:
+    for i in range(0, len(values), size):
+        yield values[i:i + size]
+
+
+def _get_translations_for_game(
+    conn: pymysql.Connection,
+    game_slug: str,
+    entity_ids: set[str] | None = None,
+) -> dict[str, list[str]]:
     """
     Load all translations for a game from card_translations.
     Returns: { entity_id: ["Nome IT", "Nome FR", ...] }.
-    Called once per game at the start of each _index_*_prints for bulk fetch.
+    Called once per game at the start of a source for bulk fetch; entity_ids limits it to a partial reindex.
     """
     translations: dict[str, list[str]] = {}
+    sql = """
+        SELECT entity_id, translated_name
+        FROM card_translations
+        WHERE game_slug = %s AND translated_name IS NOT NULL AND translated_name != ''
+    """
+    if entity_ids is None:
+        batches = [(sql, (game_slug,))]
+    else:
+        batches = [
+            (sql + f" AND entity_id IN ({', '.join(['%s'] * len(chunk))})", (game_slug, *chunk))
+            for chunk in _chunks(sorted(entity_ids))
+        ]
     with conn.cursor() as cur:
-        cur.execute(
-            """
-            SELECT entity_id, translated_name
-            FROM card_translations
-            WHERE game_slug = %s AND translated_name IS NOT NULL AND translated_name != ''
-            """,
-            (game_slug,),
-        )
-        for row in cur.fetchall():
-            eid = (row["entity_id"] or "").strip()
-            t_name = (row["translated_name"] or "").strip()
-            if not eid or not t_name:
-                continue
-            if eid not in translations:
-                translations[eid] = []
-            if t_name not in translations[eid]:
-                translations[eid].append(t_name)
+        for query, params in batches:
+            cur.execute(query, params)
+            for row in cur.fetchall():
+                eid = (row["entity_id"] or "").strip()
+                t_name = (row["translated_name"] or "").strip()
+                if not eid or not t_name:
+                    continue
+                if eid not in translations:
+                    translations[eid] = []
+                if t_name not in translations[eid]:
+                    translations[eid].append(t_name)
+    return translations
+
+
+def _get_set_translations(
+    conn: pymysql.Connection,
+    set_ids: set[int] | None = None,
+) -> dict[int, dict[str, str]]:
+    """
+    Load localized set names from set_translations.
+    Returns: { set_id: {"it": "Nome IT", "fr": "Nom FR", ...} }. Empty if the table does not exist yet.
+    """
+    translations: dict[int, dict[str, str]] = {}
+    sql = """
+        SELECT set_id, language_code, translated_name
+        FROM set_translations
+        WHERE translated_name IS NOT NULL AND translated_name != ''
+    """
+    if set_ids is None:
+        batches = [(sql, ())]
+    else:
+        batches = [
+            (sql + f" AND set_id IN ({', '.join(['%s'] * len(chunk))})", tuple(chunk))
+            for chunk in _chunks(sorted(set_ids))
+        ]
+    try:
+        with conn.cursor() as cur:
+            for query, params in batches:
+                cur.execute(query, params)
+                for row in cur.fetchall():
+                    lang = (row["language_code"] or "").strip()
+                    t_name = (row["translated_name"] or "").strip()
+                    if lang and t_name:
+                        translations.setdefault(int(row["set_id"]), {})[lang] = t_name
+    except pymysql.ProgrammingError:
+        logger.warning("set_translations not available, indexing sets without localized names")
     return translations
 
 
@@ -105,7 +212,6 @@ def _parse_available_languages(raw: Any) -> list[str]:
         if not raw:
             return []
         try:
-            import json
             out = json.loads(raw)
             return [str(x) for x in out] if isinstance(out, list) else []
         except Exception:
@@ -129,20 +235,165 @@ def _format_release_date(raw: Any) -> str | None:
     return None
 
 
-def _index_mtg_prints(
-    conn: pymysql.Connection,
-    client: Client,
-    index_name: str,
-    batch_size: int,
-) -> int:
-    """Index MTG prints from cards_prints JOIN sets, cards, games. Entity = oracle_id."""
+def _load_mtg_context(conn: pymysql.Connection, oracle_ids: set[str] | None) -> dict[str, list[str]]:
     logger.info("Fetching MTG translations from card_translations...")
-    trans_map = _get_translations_for_game(conn, "mtg")
+    return _get_translations_for_game(conn, "mtg", oracle_ids)
 
-    count = 0
-    with conn.cursor() as cur:
-        cur.execute(
-            """
+
+def _build_mtg_doc(row: dict[str, Any], trans_map: dict[str, list[str]]) -> dict[str, Any]:
+    """MTG print document. Entity = oracle_id (translations from card_translations)."""
+    print_id = row["print_id"]
+    cardtrader_id = row.get("cardtrader_id")
+    oracle_id = row["oracle_id"] or ""
+    printed_name = (row["printed_name"] or "").strip() or "Unknown"
+    image_path = _clean_image_path(row.get("image_path"))
+    set_name = (row["set_name"] or "").strip()
+    set_code = (row.get("set_code") or "").strip()
+    release_date = _format_release_date(row.get("release_date"))
+    set_icon_uri = (row.get("set_icon_uri") or "").strip() or None
+    game_slug = (row["game_slug"] or "mtg").strip()
+    collector_number = row.get("collector_number")
+    rarity = row.get("rarity")
+    available_languages = _parse_available_languages(row.get("available_languages"))
+
+    keywords_localized = _build_keywords_localized(
+        printed_name, trans_map.get(oracle_id, [])
+    )
+
+    doc = {
+        "id": f"mtg_{print_id}",
+        "name": printed_name,
+        "set_name": set_name,
+        "set_code": set_code,
+        "release_date": release_date,
+        "set_icon_uri": set_icon_uri,
+        "game_slug": game_slug,
+        "set_id": int(row["set_id"]),
+        "category_id": 1,
+        "category_name": "Carta Singola",
+        "image": image_path,
+        "keywords_localized": keywords_localized,
+    }
+    if cardtrader_id is not None:
+        doc["cardtrader_id"] = int(cardtrader_id)
+    if collector_number is not None and str(collector_number).strip():
+        doc["collector_number"] = str(collector_number).strip()
+    if rarity is not None and str(rarity).strip():
+        doc["rarity"] = str(rarity).strip()
+    if available_languages:
+        doc["available_languages"] = available_languages
+    return doc
+
+
+def _build_single_doc(row: dict[str, Any], prefix: str, default_game: str) -> dict[str, Any]:
+    """One Piece / Pokémon print document. Nessuna gestione lingue (solo MTG)."""
+    print_id = row["print_id"]
+    cardtrader_id = row.get("cardtrader_id")
+    printed_name = (row["printed_name"] or "").strip() or "Unknown"
+    image_path = _clean_image_path(row.get("image_path"))
+    set_name = (row["set_name"] or "").strip()
+    set_code = (row.get("set_code") or "").strip()
+    release_date = _format_release_date(row.get("release_date"))
+    set_icon_uri = (row.get("set_icon_uri") or "").strip() or None
+    game_slug = (row["game_slug"] or default_game).strip()
+
+    doc = {
+        "id": f"{prefix}_{print_id}",
+        "name": printed_name,
+        "set_name": set_name,
+        "set_code": set_code,
+        "release_date": release_date,
+        "set_icon_uri": set_icon_uri,
+        "game_slug": game_slug,
+        "set_id": int(row["set_id"]),
+        "category_id": 1,
+        "category_name": "Carta Singola",
+        "image": image_path,
+    }
+    if cardtrader_id is not None:
+        doc["cardtrader_id"] = int(cardtrader_id)
+    return doc
+
+
+def _build_sealed_doc(row: dict[str, Any], _context: Any = None) -> dict[str, Any]:
+    """Sealed product document (box, bustine, mazzi)."""
+    product_id = row["product_id"]
+    cardtrader_id = row.get("cardtrader_id")
+    name = (row["name"] or "").strip() or "Unknown"
+    category_id = row["category_id"]
+    image_path = _clean_image_path(row.get("image_path"))
+    set_name = (row["set_name"] or "").strip()
+    set_code = (row.get("set_code") or "").strip()
+    release_date = _format_release_date(row.get("release_date"))
+    set_icon_uri = (row.get("set_icon_uri") or "").strip() or None
+    game_slug = (row["game_slug"] or "").strip()
+
+    doc = {
+        "id": f"sealed_{product_id}",
+        "name": name,
+        "set_name": set_name,
+        "set_code": set_code,
+        "release_date": release_date,
+        "set_icon_uri": set_icon_uri,
+        "game_slug": game_slug,
+        "set_id": int(row["set_id"]),
+        "category_id": category_id,
+        "image": image_path,
+    }
+    if cardtrader_id is not None:
+        doc["cardtrader_id"] = int(cardtrader_id)
+    return doc
+
+
+def _build_set_doc(row: dict[str, Any], trans_map: dict[int, dict[str, str]]) -> dict[str, Any] | None:
+    """Set document for the sets index: name, localized names, code, release date, icon, game. None if unnamed."""
+    set_id = int(row["set_id"])
+    set_name = (row["set_name"] or "").strip()
+    if not set_name:
+        return None
+    localized_names = trans_map.get(set_id, {})
+    return {
+        "id": set_id,
+        "name": set_name,
+        "code": (row.get("set_code") or "").strip(),
+        "release_date": _format_release_date(row.get("release_date")),
+        "set_icon_uri": (row.get("set_icon_uri") or "").strip() or None,
+        "game_slug": (row["game_slug"] or "").strip(),
+        "localized_names": localized_names,
+        "keywords_localized": _build_keywords_localized(set_name, list(localized_names.values())),
+    }
+
+
+@dataclass(frozen=True)
+class _Source:
+    """Una sorgente MySQL: query (senza WHERE/ORDER BY), condizioni base, costruzione documento."""
+
+    name: str
+    label: str
+    id_column: str
+    id_key: str  # alias di id_column nella riga (paginazione keyset e checkpoint)
+    table: str  # tabella principale con alias, per MIN/MAX della chiave (partizioni)
+    select: str
+    build: Callable[[dict[str, Any], Any], dict[str, Any] | None]
+    conditions: tuple[str, ...] = ()
+    game_slug: str | None = None  # gioco fisso della sorgente (None = più giochi)
+    load_context: Callable[[pymysql.Connection, set | None], Any] | None = None
+    context_key: str | None = None  # colonna della riga usata per caricare il contesto mirato
+    depends_on: tuple[str, ...] = ()  # altre tabelle lette (JOIN, traduzioni): entrano nel fingerprint
+
+    @property
+    def tables(self) -> tuple[str, ...]:
+        return (self.table.split()[0], *self.depends_on)
+
+
+_SOURCES: dict[str, _Source] = {
+    "mtg": _Source(
+        name="mtg",
+        label="MTG",
+        id_column="cp.id",
+        id_key="print_id",
+        table="cards_prints cp",
+        select="""
             SELECT
                 cp.id AS print_id,
                 cp.cardtrader_id,
@@ -153,6 +404,7 @@ def _index_mtg_prints(
                 s.code AS set_code,
                 s.release_date,
                 s.set_icon_uri,
+                s.id AS set_id,
                 COALESCE(g.slug, 'mtg') AS game_slug,
                 cp.collector_number,
                 cp.rarity,
@@ -161,76 +413,21 @@ def _index_mtg_prints(
             INNER JOIN cards c ON c.oracle_id = cp.oracle_id
             INNER JOIN sets s ON s.id = cp.set_id
             INNER JOIN games g ON g.id = s.game_id
-            WHERE cp.oracle_id IS NOT NULL
-            ORDER BY cp.id
-            """
-        )
-        batch: list[dict[str, Any]] = []
-        for row in cur:
-            print_id = row["print_id"]
-            cardtrader_id = row.get("cardtrader_id")
-            oracle_id = row["oracle_id"] or ""
-            printed_name = (row["printed_name"] or "").strip() or "Unknown"
-            image_path = _clean_image_path(row.get("image_path"))
-            set_name = (row["set_name"] or "").strip()
-            set_code = (row.get("set_code") or "").strip()
-            release_date = _format_release_date(row.get("release_date"))
-            set_icon_uri = (row.get("set_icon_uri") or "").strip() or None
-            game_slug = (row["game_slug"] or "mtg").strip()
-            collector_number = row.get("collector_number")
-            rarity = row.get("rarity")
-            available_languages = _parse_available_languages(row.get("available_languages"))
-
-            keywords_localized = _build_keywords_localized(
-                printed_name, trans_map.get(oracle_id, [])
-            )
-
-            doc = {
-                "id": f"mtg_{print_id}",
-                "name": printed_name,
-                "set_name": set_name,
-                "set_code": set_code,
-                "release_date": release_date,
-                "set_icon_uri": set_icon_uri,
-                "game_slug": game_slug,
-                "category_id": 1,
-                "category_name": "Carta Singola",
-                "image": image_path,
-                "keywords_localized": keywords_localized,
-            }
-            if cardtrader_id is not None:
-                doc["cardtrader_id"] = int(cardtrader_id)
-            if collector_number is not None and str(collector_number).strip():
-                doc["collector_number"] = str(collector_number).strip()
-            if rarity is not None and str(rarity).strip():
-                doc["rarity"] = str(rarity).strip()
-            if available_languages:
-                doc["available_languages"] = available_languages
-            batch.append(doc)
-            if len(batch) >= batch_size:
-                client.index(index_name).add_documents(batch)
-                count += len(batch)
-                logger.info("Indexed MTG batch: %d docs (total so far: %d)", len(batch), count)
-                batch = []
-
-        if batch:
-            client.index(index_name).add_documents(batch)
-            count += len(batch)
-            logger.info("Indexed final MTG batch: %d docs (total: %d)", len(batch), count)
-    return count
-
-
-def _index_op_prints(
-    conn: pymysql.Connection,
-    client: Client,
-    index_name: str,
-    batch_size: int,
-) -> int:
-    """Index One Piece prints from op_prints JOIN op_cards, sets, games. Entity = card_id. Nessuna gestione lingue (solo MTG)."""
-    count = 0
-    with conn.cursor() as cur:
-        cur.execute(
-            """
+        """,
+        conditions=("cp.oracle_id IS NOT NULL",),
+        build=_build_mtg_doc,
+        game_slug="mtg",
+        load_context=_load_mtg_context,
+        context_key="oracle_id",
+        depends_on=("cards", "sets", "games", "card_translations"),
+    ),
+    "op": _Source(
+        name="op",
+        label="OP",
+        id_column="op.id",
+        id_key="print_id",
+        table="op_prints op",
+        select="""
             SELECT
                 op.id AS print_id,
                 op.cardtrader_id,
@@ -240,65 +437,24 @@ def _index_op_prints(
                 s.code AS set_code,
                 s.release_date,
                 s.set_icon_uri,
+                s.id AS set_id,
                 COALESCE(g.slug, 'op') AS game_slug
             FROM op_prints op
             INNER JOIN op_cards oc ON oc.card_id = op.card_id
             INNER JOIN sets s ON s.id = op.set_id
             INNER JOIN games g ON g.id = s.game_id
-            ORDER BY op.id
-            """
-        )
-        batch: list[dict[str, Any]] = []
-        for row in cur:
-            print_id = row["print_id"]
-            cardtrader_id = row.get("cardtrader_id")
-            printed_name = (row["printed_name"] or "").strip() or "Unknown"
-            image_path = _clean_image_path(row.get("image_path"))
-            set_name = (row["set_name"] or "").strip()
-            set_code = (row.get("set_code") or "").strip()
-            release_date = _format_release_date(row.get("release_date"))
-            set_icon_uri = (row.get("set_icon_uri") or "").strip() or None
-            game_slug = (row["game_slug"] or "op").strip()
-
-            doc = {
-                "id": f"op_{print_id}",
-                "name": printed_name,
-                "set_name": set_name,
-                "set_code": set_code,
-                "release_date": release_date,
-                "set_icon_uri": set_icon_uri,
-                "game_slug": game_slug,
-                "category_id": 1,
-                "category_name": "Carta Singola",
-                "image": image_path,
-            }
-            if cardtrader_id is not None:
-                doc["cardtrader_id"] = int(cardtrader_id)
-            batch.append(doc)
-            if len(batch) >= batch_size:
-                client.index(index_name).add_documents(batch)
-                count += len(batch)
-                logger.info("Indexed OP batch: %d docs (total so far: %d)", len(batch), count)
-                batch = []
-
-        if batch:
-            client.index(index_name).add_documents(batch)
-            count += len(batch)
-            logger.info("Indexed final OP batch: %d docs (total: %d)", len(batch), count)
-    return count
-
-
-def _index_pk_prints(
-    conn: pymysql.Connection,
-    client: Client,
-    index_name: str,
-    batch_size: int,
-) -> int:
-    """Index Pokémon prints from pk_prints JOIN pk_cards, sets, games. Entity = card_id. Immagine da image_url. Nessuna gestione lingue (solo MTG)."""
-    count = 0
-    with conn.cursor() as cur:
-        cur.execute(
-            """
+        """,
+        build=lambda row, _: _build_single_doc(row, "op", "op"),
+        game_slug="op",
+        depends_on=("op_cards", "sets", "games"),
+    ),
+    "pk": _Source(
+        name="pk",
+        label="PK",
+        id_column="pp.id",
+        id_key="print_id",
+        table="pk_prints pp",
+        select="""
             SELECT
                 pp.id AS print_id,
                 pp.cardtrader_id,
@@ -308,65 +464,24 @@ def _index_pk_prints(
                 s.code AS set_code,
                 s.release_date,
                 s.set_icon_uri,
+                s.id AS set_id,
                 COALESCE(g.slug, 'pk') AS game_slug
             FROM pk_prints pp
             INNER JOIN pk_cards pc ON pc.card_id = pp.card_id
             INNER JOIN sets s ON s.id = pp.set_id
             INNER JOIN games g ON g.id = s.game_id
-            ORDER BY pp.id
-            """
-        )
-        batch: list[dict[str, Any]] = []
-        for row in cur:
-            print_id = row["print_id"]
-            cardtrader_id = row.get("cardtrader_id")
-            printed_name = (row["printed_name"] or "").strip() or "Unknown"
-            image_path = _clean_image_path(row.get("image_path"))
-            set_name = (row["set_name"] or "").strip()
-            set_code = (row.get("set_code") or "").strip()
-            release_date = _format_release_date(row.get("release_date"))
-            set_icon_uri = (row.get("set_icon_uri") or "").strip() or None
-            game_slug = (row["game_slug"] or "pk").strip()
-
-            doc = {
-                "id": f"pk_{print_id}",
-                "name": printed_name,
-                "set_name": set_name,
-                "set_code": set_code,
-                "release_date": release_date,
-                "set_icon_uri": set_icon_uri,
-                "game_slug": game_slug,
-                "category_id": 1,
-                "category_name": "Carta Singola",
-                "image": image_path,
-            }
-            if cardtrader_id is not None:
-                doc["cardtrader_id"] = int(cardtrader_id)
-            batch.append(doc)
-            if len(batch) >= batch_size:
-                client.index(index_name).add_documents(batch)
-                count += len(batch)
-                logger.info("Indexed PK batch: %d docs (total so far: %d)", len(batch), count)
-                batch = []
-
-        if batch:
-            client.index(index_name).add_documents(batch)
-            count += len(batch)
-            logger.info("Indexed final PK batch: %d docs (total: %d)", len(batch), count)
-    return count
-
-
-def _index_sealed_products(
-    conn: pymysql.Connection,
-    client: Client,
-    index_name: str,
-    batch_size: int,
-) -> int:
-    """Index sealed products (box, bustine, mazzi) from sealed_products JOIN sets, games. Excludes category_id 1 (singles)."""
-    count = 0
-    with conn.cursor() as cur:
-        cur.execute(
-            """
+        """,
+        build=lambda row, _: _build_single_doc(row, "pk", "pk"),
+        game_slug="pk",
+        depends_on=("pk_cards", "sets", "games"),
+    ),
+    "sealed": _Source(
+        name="sealed",
+        label="sealed",
+        id_column="sp.id",
+        id_key="product_id",
+        table="sealed_products sp",
+        select="""
             SELECT
                 sp.id AS product_id,
                 sp.cardtrader_id,
@@ -377,110 +492,799 @@ def _index_sealed_products(
                 s.code AS set_code,
                 s.release_date,
                 s.set_icon_uri,
+                s.id AS set_id,
                 COALESCE(g.slug, '') AS game_slug
             FROM sealed_products sp
             INNER JOIN sets s ON s.id = sp.set_id
             INNER JOIN games g ON g.id = s.game_id
-            WHERE sp.category_id != 1
-            ORDER BY sp.id
-            """
-        )
-        batch: list[dict[str, Any]] = []
-        for row in cur:
-            product_id = row["product_id"]
-            cardtrader_id = row.get("cardtrader_id")
-            name = (row["name"] or "").strip() or "Unknown"
-            category_id = row["category_id"]
-            image_path = _clean_image_path(row.get("image_path"))
-            set_name = (row["set_name"] or "").strip()
-            set_code = (row.get("set_code") or "").strip()
-            release_date = _format_release_date(row.get("release_date"))
-            set_icon_uri = (row.get("set_icon_uri") or "").strip() or None
-            game_slug = (row["game_slug"] or "").strip()
-
-            doc = {
-                "id": f"sealed_{product_id}",
-                "name": name,
-                "set_name": set_name,
-                "set_code": set_code,
-                "release_date": release_date,
-                "set_icon_uri": set_icon_uri,
-                "game_slug": game_slug,
-                "category_id": category_id,
-                "image": image_path,
-            }
-            if cardtrader_id is not None:
-                doc["cardtrader_id"] = int(cardtrader_id)
-            batch.append(doc)
-            if len(batch) >= batch_size:
-                client.index(index_name).add_documents(batch)
-                count += len(batch)
-                logger.info("Indexed sealed batch: %d docs (total so far: %d)", len(batch), count)
-                batch = []
-
-        if batch:
-            client.index(index_name).add_documents(batch)
-            count += len(batch)
-            logger.info("Indexed final sealed batch: %d docs (total: %d)", len(batch), count)
-    return count
+        """,
+        conditions=("sp.category_id != 1",),
+        build=_build_sealed_doc,
+        depends_on=("sets", "games"),
+    ),
+    "sets": _Source(
+        name="sets",
+        label="sets",
+        id_column="s.id",
+        id_key="set_id",
+        table="sets s",
+        select="""
+            SELECT
+                s.id AS set_id,
+                COALESCE(s.name, '') AS set_name,
+                s.code AS set_code,
+                s.release_date,
+                s.set_icon_uri,
+                COALESCE(g.slug, '') AS game_slug
+            FROM sets s
+            INNER JOIN games g ON g.id = s.game_id
+        """,
+        build=_build_set_doc,
+        load_context=_get_set_translations,
+        context_key="set_id",
+        depends_on=("games", "set_translations"),
+    ),
+}
+
+# Sorgenti dell'indice delle stampe (i loro id documento sono "<source>_<id>").
+PRINT_SOURCES = ("mtg", "op", "pk", "sealed")
+
+
+def parse_doc_id(doc_id: str) -> tuple[str, int]:
+    """'mtg_123' -> ('mtg', 123). ValueError se il prefisso o l'id non sono validi."""
+    source, sep, raw_id = doc_id.strip().rpartition("_")
+    if not sep or source not in PRINT_SOURCES or not raw_id.isdigit():
+        raise ValueError(f"Id documento non valido: {doc_id!r} (atteso es. mtg_123, op_45, pk_6, sealed_7)")
+    return source, int(raw_id)
+
+
+@dataclass
+class ReindexScope:
+    """
+    Sottoinsieme del catalogo da reindicizzare; i filtri si combinano in AND. Tutto vuoto = reindex completo.
+    games: slug (mtg, op, pk, ...); set_ids: sets.id; doc_ids: id documento (mtg_123, op_45, pk_6, sealed_7).
+    new_since: sync incrementale, {sorgente: id} = solo righe con id maggiore (sorgenti assenti escluse).
+    sources: solo queste sorgenti (es. ["sets"] per il replay dei set senza rinviare stampe e sealed).
+    """
+
+    games: list[str] = field(default_factory=list)
+    set_ids: list[int] = field(default_factory=list)
+    doc_ids: list[str] = field(default_factory=list)
+    new_since: dict[str, int] = field(default_factory=dict)
+    sources: list[str] = field(default_factory=list)
+
+    def __post_init__(self) -> None:
+        for doc_id in self.doc_ids:
+            parse_doc_id(doc_id)
+
+    @property
+    def is_full(self) -> bool:
+        return not (self.games or self.set_ids or self.doc_ids or self.new_since or self.sources)
+
+    def ids_for(self, source: str) -> list[int]:
+        return sorted({i for s, i in map(parse_doc_id, self.doc_ids) if s == source})
+
+    def includes(self, source: str) -> bool:
+        """False se la sorgente non può avere documenti nello scope (evita query e traduzioni inutili)."""
+        if self.sources and source not in self.sources:
+            return False
+        if self.doc_ids and not self.ids_for(source):
+            return False
+        if self.new_since and source not in self.new_since:
+            return False
+        game = _SOURCES[source].game_slug
+        return not (self.games and game is not None and game not in self.games)
+
+    def to_dict(self) -> dict[str, Any]:
+        out: dict[str, Any] = {"games": self.games, "set_ids": self.set_ids, "doc_ids": self.doc_ids}
+        if self.new_since:
+            out["new_since"] = self.new_since
+        if self.sources:
+            out["sources"] = self.sources
+        return out
+
+
+def _source_query(
+    source: _Source,
+    scope: ReindexScope | None,
+    after_id: Any = None,
+    limit: int | None = None,
+    upper_id: Any = None,
+) -> tuple[str, list[Any]]:
+    """
+    SELECT della sorgente con condizioni base + filtri dello scope.
+    after_id/limit: pagina keyset (WHERE id > after_id ORDER BY id LIMIT n), query brevi sul DB condiviso.
+    upper_id: limite superiore incluso (partizione di una lettura parallela).
+    """
+    conditions = list(source.conditions)
+    params: list[Any] = []
+    if after_id is not None:
+        conditions.append(f"{source.id_column} > %s")
+        params.append(after_id)
+    if upper_id is not None:
+        conditions.append(f"{source.id_column} <= %s")
+        params.append(upper_id)
+    if scope is not None:
+        if scope.games:
+            conditions.append(f"g.slug IN ({', '.join(['%s'] * len(scope.games))})")
+            params.extend(scope.games)
+        if scope.set_ids:
+            conditions.append(f"s.id IN ({', '.join(['%s'] * len(scope.set_ids))})")
+            params.extend(scope.set_ids)
+        if source.name in scope.new_since:
+            conditions.append(f"{source.id_column} > %s")
+            params.append(scope.new_since[source.name])
+        ids = scope.ids_for(source.name)
+        if ids:
+            conditions.append(f"{source.id_column} IN ({', '.join(['%s'] * len(ids))})")
+            params.extend(ids)
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+    sql = f"{source.select} {where} ORDER BY {source.id_column}"
+    if limit is not None:
+        sql += f" LIMIT {int(limit)}"
+    return sql, params
+
+
+class _BatchWriter:
+    """
+    Accumula i documenti di una sorgente e li invia a Meilisearch a batch di batch_size.
+    Punto unico per gli effetti collaterali per documento/batch: facet counts e progresso del job.
+    Prima di inviare un batch attende il task del precedente (un solo batch in volo, in ogni modalità):
+    con checkpoint salva poi l'ultimo id di riga confermato, così il checkpoint non supera mai Meilisearch.
+    Un batch che fallisce dopo i retry (o il cui task fallisce) va nel journal e il run prosegue.
+    """
+
+    def __init__(
+        self,
+        client: Client,
+        index_name: str,
+        batch_size: int,
+        source: str,
+        label: str,
+        facets: FacetCounter | None = None,
+        progress: ReindexProgress | None = None,
+        track_ids: bool = False,
+        checkpoint: ReindexCheckpoint | None = None,
+        checkpoint_key: str | None = None,
+        count: int = 0,
+    ) -> None:
+        self.client = client
+        self.index_name = index_name
+        self.batch_size = batch_size
+        self.source = source
+        self.label = label
+        self.facets = facets
+        self.progress = progress
+        self.checkpoint = checkpoint
+        self.checkpoint_key = checkpoint_key or source  # "mtg" o partizione "mtg/2"
+        self.count = count  # > 0 quando si riprende da un checkpoint
+        self.journaled = 0  # documenti finiti nel journal dei batch falliti
+        self.timings = StageTimings(source)
+        # Id dell'ultima riga letta, impostato da _index_source: è il punto di ripresa del batch inviato.
+        self.position: Any = None
+        # Id inviati (solo se richiesto: servono per le cancellazioni degli update mirati).
+        self.sent_ids: set[str] = set()
+        self._track_ids = track_ids
+        self._batch: list[dict[str, Any]] = []
+        # ([(task_uid, ids)], position, count) dell'ultimo batch inviato, in attesa di conferma
+        self._unconfirmed: tuple[list[tuple[int, list[Any]]], Any, int] | None = None
+
+    def add(self, doc: dict[str, Any]) -> None:
+        self._batch.append(doc)
+        if len(self._batch) >= self.batch_size:
+            self._send(final=False)
+
+    def flush(self) -> None:
+        if self._batch:
+            self._send(final=True)
+        self._confirm()
+
+    def _confirm(self) -> None:
+        """Attende i task dell'ultimo batch inviato e aggiorna il checkpoint (se c'è). Task falliti -> journal."""
+        if self._unconfirmed is None:
+            return
+        tasks, position, count = self._unconfirmed
+        self._unconfirmed = None
+        for task_uid, ids in tasks:
+            try:
+                with (
+                    self.timings.measure("task", {"meilisearch.task_uid": task_uid}),
+                    REINDEX_TASK_WAIT_SECONDS.labels(self.source).time(),
+                ):
+                    task = self.client.wait_for_task(
+                        task_uid,
+                        timeout_in_ms=int(get_settings().INDEXER_TASK_TIMEOUT_SECONDS * 1000),
+                        interval_in_ms=200,
+                    )
+            except (MeilisearchApiError, MeilisearchCommunicationError, MeilisearchTimeoutError) as e:
+                self._journal(ids, f"task {task_uid}: {e}")
+                continue
+            if task.status != "succeeded":
+                self._journal(ids, f"task {task_uid} {task.status}: {task.error}")
+        if self.checkpoint is not None:
+            self.checkpoint.commit(self.checkpoint_key, position, count, self.facets)
+
+    def _journal(self, ids: list[Any], reason: str) -> None:
+        record_failed_batch(self.index_name, self.source, ids, reason)
+        REINDEX_DOCS_JOURNALED.labels(self.source).inc(len(ids))
+        self.journaled += len(ids)
+
+    def _add_documents(self, batch: list[dict[str, Any]]) -> list[tuple[int, list[Any]]]:
+        """
+        add_documents con retry e backoff esponenziale sugli errori transitori (rete, timeout, 429, 5xx);
+        un 413 (payload troppo grande) dimezza il batch. Esauriti i tentativi il batch va nel journal.
+        Ritorna (task_uid, ids) per ogni richiesta accettata.
+        """
+        settings = get_settings()
+        retries = settings.INDEXER_SEND_RETRIES
+        error: Exception | None = None
+        # Serializzato qui (add_documents_raw) per misurare a parte serializzazione e invio.
+        with self.timings.measure("serialize", {"documents": len(batch)}):
+            body = json.dumps(batch, ensure_ascii=False).encode("utf-8")
+        send_attributes = {"meilisearch.index": self.index_name, "documents": len(batch), "bytes": len(body)}
+        for attempt in range(retries + 1):
+            try:
+                with (
+                    self.timings.measure("send", {**send_attributes, "attempt": attempt + 1}),
+                    REINDEX_BATCH_SEND_SECONDS.labels(self.source).time(),
+                ):
+                    task = self.client.index(self.index_name).add_documents_raw(body, content_type="application/json")
+                REINDEX_DOCS_SENT.labels(self.source).inc(len(batch))
+                return [(task.task_uid, [doc["id"] for doc in batch])]
+            except MeilisearchApiError as e:
+                if e.status_code == 413 and len(batch) > 1:
+                    half = len(batch) // 2
+                    logger.warning("%s batch of %d docs too large, splitting", self.label, len(batch))
+                    return self._add_documents(batch[:half]) + self._add_documents(batch[half:])
+                error = e
+                if e.status_code < 500 and e.status_code != 429:
+                    break
+            except (MeilisearchCommunicationError, MeilisearchTimeoutError) as e:
+                error = e
+            if attempt < retries:
+                delay = settings.INDEXER_RETRY_BACKOFF_SECONDS * 2 ** attempt
+                logger.warning(
+                    "%s batch send failed (attempt %d/%d), retrying in %.1fs: %s",
+                    self.label, attempt + 1, retries + 1, delay, error,
+                )
+                time.sleep(delay)
+        self._journal([doc["id"] for doc in batch], f"add_documents: {error}")
+        return []
+
+    def _send(self, final: bool) -> None:
+        batch, self._batch = self._batch, []
+        self._confirm()
+        # Facet contati all'invio (non all'add): il checkpoint salvato sopra include solo batch confermati.
+        if self.facets is not None:
+            for doc in batch:
+                self.facets.add(doc)
+        tasks = self._add_documents(batch)
+        self.count += len(batch)
+        self._unconfirmed = (tasks, self.position, self.count)
+        if self._track_ids:
+            self.sent_ids.update(str(doc["id"]) for doc in batch)
+        if self.progress is not None:
+            self.progress.advance(self.source, len(batch))
+        if final:
+            logger.info("Indexed final %s batch: %d docs (total: %d)", self.label, len(batch), self.count)
+        else:
+            logger.info("Indexed %s batch: %d docs (total so far: %d)", self.label, len(batch), self.count)
+
+
+def _index_source(
+    conn: pymysql.Connection,
+    source: _Source,
+    writer: _BatchWriter,
+    scope: ReindexScope | None = None,
+    after_id: Any = None,
+    upper_id: Any = None,
+    context: Any = None,
+) -> int:
+    """
+    Index one source, reading rows in keyset pages of INDEXER_PAGE_SIZE (after_id: resume point,
+    upper_id: end of a partition). Full run: context (translations) loaded in bulk once, or passed
+    in already loaded when partitions share it. Partial run: only the translations each page needs.
+    """
+    page_size = get_settings().INDEXER_PAGE_SIZE
+    full = scope is None or scope.is_full
+    timings = writer.timings
+    if full and context is None and source.load_context:
+        with timings.measure("context"):
+            context = source.load_context(conn, None)
+    with conn.cursor() as cur:
+        while True:
+            sql, params = _source_query(source, scope, after_id=after_id, limit=page_size, upper_id=upper_id)
+            # Cursore bufferizzato: execute() legge già tutte le righe, fetchall() non trasferisce nulla.
+            with timings.measure("query+fetch", {"db.system": "mysql", "db.statement": " ".join(sql.split())}):
+                cur.execute(sql, params)
+                rows = cur.fetchall()
+            if not rows:
+                break
+            REINDEX_ROWS_FETCHED.labels(source.name).inc(len(rows))
+            if not full and source.load_context:
+                with timings.measure("context"):
+                    context = source.load_context(conn, {row[source.context_key] for row in rows})
+            with timings.measure("transform"):
+                built = [(row[source.id_key], source.build(row, context)) for row in rows]
+            for position, doc in built:
+                writer.position = position
+                if doc is not None:
+                    writer.add(doc)
+            after_id = rows[-1][source.id_key]
+            if len(rows) < page_size:
+                break
+
+        writer.flush()
+    return writer.count
+
+
+def _indexable_ids(conn: pymysql.Connection, source: _Source, ids: list[int]) -> set[int]:
+    """Id della sorgente ancora indicizzabili in MySQL: query della sorgente sui soli id, senza filtri di gioco o set."""
+    found: set[int] = set()
+    with conn.cursor() as cur:
+        for chunk in _chunks(ids):
+            sql, params = _source_query(source, ReindexScope(doc_ids=[f"{source.name}_{i}" for i in chunk]))
+            cur.execute(sql, params)
+            found.update(int(row[source.id_key]) for row in cur.fetchall())
+    return found
+
+
+def _configure_sets_index(client: Client, index_name: str) -> None:
+    """Searchable: name, keywords_localized, code. Filterable: game_slug, code, release_date. Sortable: name, release_date."""
+    index = client.index(index_name)
+    index.update_searchable_attributes(["name", "keywords_localized", "code"])
+    index.update_filterable_attributes(["game_slug", "code", "release_date"])
+    index.update_sortable_attributes(["name", "release_date"])
+    # /api/sets restituisce l'intero catalogo di un gioco in una sola query (default Meilisearch: 1000).
+    index.update_pagination_settings({"maxTotalHits": 10000})
 
 
 def _configure_meilisearch_index(client: Client, index_name: str) -> None:
-    """Searchable: name, keywords_localized, set_name. Filterable: id, cardtrader_id, game_slug, category_id, set_name, release_date, rarity. Sortable: name, set_name, release_date."""
+    """Searchable: name, keywords_localized, set_name. Filterable: id, cardtrader_id, game_slug, set_id, category_id, set_name, release_date, rarity. Sortable: name, set_name, release_date."""
     index = client.index(index_name)
     index.update_searchable_attributes(
         ["name", "keywords_localized", "set_name"]
     )
-    index.update_filterable_attributes(["id", "cardtrader_id", "game_slug", "category_id", "set_name", "release_date", "rarity"])
+    index.update_filterable_attributes(
+        ["id", "cardtrader_id", "game_slug", "set_id", "category_id", "set_name", "release_date", "rarity"]
+    )
     index.update_sortable_attributes(["name", "set_name", "release_date"])
 
 
-def run_indexer() -> dict[str, Any]:
+def _count_source_rows(conn: pymysql.Connection, source: str) -> int | None:
+    """Righe attese per una sorgente (per l'ETA). None se il conteggio fallisce."""
+    try:
+        with conn.cursor() as cur:
+            cur.execute(_SOURCE_COUNT_QUERIES[source])
+            return int(cur.fetchone()["n"])
+    except pymysql.MySQLError:
+        logger.warning("Could not count rows for source %s", source)
+        return None
+
+
+def _source_max_ids(conn: pymysql.Connection, names: list[str]) -> dict[str, int]:
+    """MAX(id) della tabella principale di ogni sorgente (query su chiave primaria, costo trascurabile)."""
+    out: dict[str, int] = {}
+    with conn.cursor() as cur:
+        for name in names:
+            source = _SOURCES[name]
+            cur.execute(f"SELECT MAX({source.id_column}) AS hi FROM {source.table}")
+            row = cur.fetchone()
+            if row and row["hi"] is not None:
+                out[name] = int(row["hi"])
+    return out
+
+
+def plan_incremental(conn: pymysql.Connection) -> ReindexScope | None:
+    """
+    Scope del sync incrementale: righe nuove (id > watermark) delle sorgenti che ne hanno.
+    None se non c'è nulla di nuovo. Sorgenti senza watermark (mai indicizzate da un run totale) escluse.
+    """
+    marks = load_watermarks()
+    current = _source_max_ids(conn, [name for name in _SOURCES if name in marks])
+    new_since = {name: marks[name] for name, hi in current.items() if hi > marks[name]}
+    return ReindexScope(new_since=new_since) if new_since else None
+
+
+def _source_fingerprints(conn: pymysql.Connection, marks: dict[str, int]) -> dict[str, Any]:
+    """Fingerprint per sorgente: versione dell'app e dei documenti, MAX(id) e fingerprint delle tabelle. {} se non calcolabile."""
+    try:
+        tables = table_fingerprints(conn, {t for source in _SOURCES.values() for t in source.tables})
+    except pymysql.MySQLError as e:
+        logger.warning("Could not compute source fingerprints, no source will be skipped: %s", e)
+        return {}
+    version = get_settings().APP_VERSION
+    return {
+        name: {
+            "version": version,
+            "documents": _DOCUMENT_VERSION,
+            "max_id": marks.get(name),
+            "tables": {t: tables[t] for t in source.tables},
+        }
+        for name, source in _SOURCES.items()
+    }
+
+
+def _index_is_empty(client: Client, index_name: str) -> bool:
+    try:
+        return client.index(index_name).get_stats().number_of_documents == 0
+    except Exception:
+        return True
+
+
+def _skip_unchanged_sources(client: Client, checkpoint: ReindexCheckpoint) -> list[str]:
+    """
+    Marca come completate nel checkpoint le sorgenti con fingerprint uguale all'ultimo run totale riuscito,
+    con conteggi e facet di quel run. Mai se l'indice di destinazione è vuoto (ricreato o cancellato).
+    """
+    previous = load_fingerprints()
+    skipped = []
+    for name, fingerprint in checkpoint.fingerprints.items():
+        prev = previous.get(name)
+        if checkpoint.source_state(name)["done"] or not prev or prev["fingerprint"] != fingerprint:
+            continue
+        if _index_is_empty(client, _target_index(name)):
+            continue
+        facets = FacetCounter.from_dict(prev["facets"]) if prev.get("facets") else None
+        checkpoint.finish_source(name, prev["count"], facets)
+        skipped.append(name)
+    if skipped:
+        logger.info("Unchanged since the last full reindex, skipping: %s", ", ".join(skipped))
+    return skipped
+
+
+@contextmanager
+def _reindex_lock() -> Iterator[bool]:
+    """
+    Lock su file INDEXER_STATE_DIR/reindex.lock: un solo reindex alla volta, anche tra API e reindex.py.
+    Yield False se un altro processo lo detiene. Il lock si rilascia alla chiusura del file (anche se il processo muore).
+    """
+    path = Path(get_settings().INDEXER_STATE_DIR) / "reindex.lock"
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "w") as fh:
+        if fcntl is not None:
+            try:
+                fcntl.flock(fh, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                yield False
+                return
+        yield True
+
+
+def _target_index(source: str) -> str:
+    settings = get_settings()
+    return settings.MEILISEARCH_SETS_INDEX_NAME if source == "sets" else settings.MEILISEARCH_INDEX_NAME
+
+
+def _index_part(
+    conn: pymysql.Connection,
+    client: Client,
+    source: _Source,
+    key: str,
+    label: str,
+    scope: ReindexScope | None = None,
+    progress: ReindexProgress | None = None,
+    with_facets: bool = False,
+    checkpoint: ReindexCheckpoint | None = None,
+    bounds: tuple[Any, Any] = (None, None),
+    context: Any = None,
+) -> _BatchWriter:
+    """
+    Indicizza una sorgente intera (key = nome) o una sua partizione (key = "mtg/2", bounds = (id escluso, id incluso)),
+    riprendendo dal checkpoint. Ritorna il writer: conteggio, facet e id inviati della parte.
+    """
+    settings = get_settings()
+    state = checkpoint.source_state(key) if checkpoint is not None else {"last_id": None, "count": 0, "done": False}
+    facets = None
+    if with_facets:
+        facets = checkpoint.facet_counter(key) if checkpoint is not None else FacetCounter()
+    writer = _BatchWriter(
+        client, _target_index(source.name), settings.INDEXER_BATCH_SIZE or BATCH_SIZE, source.name, label,
+        facets=facets,
+        progress=progress,
+        track_ids=bool(scope and scope.doc_ids),
+        checkpoint=checkpoint,
+        checkpoint_key=key,
+        count=state["count"],
+    )
+    if progress is not None:
+        progress.advance(source.name, state["count"])
+    if state["done"]:
+        logger.info("Skipping %s: already indexed by the interrupted run (%d docs)", label, state["count"])
+        return writer
+    if state["last_id"] is not None:
+        logger.info("Resuming %s after id %s (%d docs already indexed)", label, state["last_id"], state["count"])
+    after_id = state["last_id"] if state["last_id"] is not None else bounds[0]
+    with span("indexer.index_part", {"indexer.source": source.name, "indexer.part": key, "indexer.after_id": after_id}):
+        _index_source(conn, source, writer, scope, after_id=after_id, upper_id=bounds[1], context=context)
+    if checkpoint is not None:
+        checkpoint.finish_source(key, writer.count, writer.facets)
+    return writer
+
+
+def _partition_bounds(conn: pymysql.Connection, source: _Source, workers: int) -> list[list[Any]]:
+    """
+    Divide la chiave primaria in workers intervalli di pari ampiezza: [id escluso, id incluso],
+    None = aperto (il primo e l'ultimo restano aperti: righe inserite durante il run non si perdono).
+    """
+    with conn.cursor() as cur:
+        cur.execute(f"SELECT MIN({source.id_column}) AS lo, MAX({source.id_column}) AS hi FROM {source.table}")
+        row = cur.fetchone()
+    if row is None or row["lo"] is None:
+        return [[None, None]]
+    lo, hi = int(row["lo"]), int(row["hi"])
+    step = max((hi - lo + 1) // workers, 1)
+    cuts = [lo - 1 + step * i for i in range(1, workers) if lo - 1 + step * i < hi]
+    edges = [None, *cuts, None]
+    return [[edges[i], edges[i + 1]] for i in range(len(edges) - 1)]
+
+
+def _index_partitioned(
+    conn: pymysql.Connection,
+    client: Client,
+    source: _Source,
+    workers: int,
+    progress: ReindexProgress | None = None,
+    with_facets: bool = False,
+    checkpoint: ReindexCheckpoint | None = None,
+) -> list[_BatchWriter]:
+    """
+    Reindex totale di una sorgente letta per intervalli di chiave primaria in parallelo: ogni worker
+    ha la sua connessione MySQL, pagina il suo intervallo e invia i suoi batch, con checkpoint per partizione.
+    Il contesto (traduzioni) è caricato una volta e condiviso in sola lettura.
+    """
+    bounds = checkpoint.partitions.get(source.name) if checkpoint is not None else None
+    if not bounds:
+        bounds = _partition_bounds(conn, source, workers)
+        if checkpoint is not None:
+            checkpoint.set_partitions(source.name, bounds)
+    context_timings = StageTimings(source.name)
+    with context_timings.measure("context"):
+        context = source.load_context(conn, None) if source.load_context else None
+    logger.info("Indexing %s in %d partitions on %d workers: %s", source.label, len(bounds), workers, bounds)
+
+    def run(i: int, part: list[Any]) -> _BatchWriter:
+        part_conn = _get_mysql_connection()
+        try:
+            return _index_part(
+                part_conn, client, source, f"{source.name}/{i}", f"{source.label}/{i}",
+                progress=progress,
+                with_facets=with_facets,
+                checkpoint=checkpoint,
+                bounds=(part[0], part[1]),
+                context=context,
+            )
+        finally:
+            part_conn.close()
+
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix=f"index-{source.name}") as pool:
+        # copy_context: gli span delle partizioni restano figli di quello della sorgente.
+        futures = [pool.submit(contextvars.copy_context().run, run, i, part) for i, part in enumerate(bounds)]
+        writers = [f.result() for f in futures]
+    writers[0].timings.merge(context_timings)
+    return writers
+
+
+def index_scope(
+    conn: pymysql.Connection,
+    client: Client,
+    scope: ReindexScope | None = None,
+    progress: ReindexProgress | None = None,
+    facets: FacetCounter | None = None,
+    checkpoint: ReindexCheckpoint | None = None,
+    timings: dict[str, dict[str, float]] | None = None,
+) -> dict[str, int]:
+    """
+    Indicizza le sorgenti incluse nello scope (None = tutto il catalogo) e ritorna i conteggi per sorgente.
+    timings (opzionale) riceve i tempi per fase di ogni sorgente indicizzata (vedi timings.py) e il totale.
+    Con doc_ids espliciti, gli id non più presenti in MySQL vengono cancellati dall'indice ("deleted").
+    checkpoint: salta le sorgenti già completate e riprende le altre dall'ultimo id confermato.
+    Nel run completo le sorgenti in INDEXER_PARALLEL_SOURCES sono lette da INDEXER_WORKERS worker.
+    Non prende il lock del reindex e non tocca i settings: usata anche per gli aggiornamenti mirati.
+    """
+    settings = get_settings()
+    partial = scope is not None and not scope.is_full
+    parallel_sources = {s.strip() for s in settings.INDEXER_PARALLEL_SOURCES.split(",") if s.strip()}
+    counts: dict[str, int] = {}
+    for name, source in _SOURCES.items():
+        if scope is not None and not scope.includes(name):
+            continue
+        with_facets = facets is not None and name != "sets"
+        if checkpoint is not None and checkpoint.source_state(name)["done"]:
+            # Completata dal run interrotto, o invariata dall'ultimo run (fingerprint): conteggi e facet salvati.
+            counts[name] = checkpoint.source_state(name)["count"]
+            if with_facets:
+                facets.merge(checkpoint.facet_counter(name))
+            if progress is not None:
+                progress.start_source(name, counts[name])
+                progress.advance(name, counts[name])
+                progress.finish_source(name)
+            logger.info("Skipping %s: %d docs already indexed", source.label, counts[name])
+            continue
+        started = time.monotonic()
+        if progress is not None:
+            progress.start_source(name, None if partial else _count_source_rows(conn, name))
+        workers = settings.INDEXER_WORKERS if not partial and name in parallel_sources else 1
+        # Un run interrotto riprende con le partizioni con cui era partito.
+        partitioned = not partial and (workers > 1 or (checkpoint is not None and bool(checkpoint.partitions.get(name))))
+        with span("indexer.source", {"indexer.source": name, "indexer.workers": max(workers, 1) if partitioned else 1}):
+            if partitioned:
+                writers = _index_partitioned(conn, client, source, max(workers, 1), progress, with_facets, checkpoint)
+            else:
+                writers = [_index_part(conn, client, source, name, source.label, scope, progress, with_facets, checkpoint)]
+        counts[name] = sum(w.count for w in writers)
+        journaled = sum(w.journaled for w in writers)
+        if journaled:
+            counts["journaled"] = counts.get("journaled", 0) + journaled
+        source_facets = None
+        if with_facets:
+            source_facets = FacetCounter()
+            for w in writers:
+                if w.facets is not None:
+                    source_facets.merge(w.facets)
+            facets.merge(source_facets)
+        if partitioned and checkpoint is not None:
+            checkpoint.finish_source(name, counts[name], source_facets)
+        if scope is not None and scope.doc_ids:
+            sent_ids = set().union(*(w.sent_ids for w in writers))
+            missing_ids = [i for i in scope.ids_for(name) if f"{name}_{i}" not in sent_ids]
+            if missing_ids and (scope.games or scope.set_ids or scope.new_since):
+                # Filtri in AND: un id escluso da giochi/set può esistere ancora, si cancellano solo quelli assenti.
+                present = _indexable_ids(conn, source, missing_ids)
+                missing_ids = [i for i in missing_ids if i not in present]
+            missing = [f"{name}_{i}" for i in missing_ids]
+            if missing:
+                client.index(_target_index(name)).delete_documents(missing)
+                counts["deleted"] = counts.get("deleted", 0) + len(missing)
+                logger.info("Deleted %d %s documents no longer in MySQL", len(missing), source.label)
+        if progress is not None:
+            progress.finish_source(name)
+        elapsed = time.monotonic() - started
+        REINDEX_SOURCE_SECONDS.labels(name, "partial" if partial else "full").observe(elapsed)
+        if timings is not None:
+            source_timings = StageTimings()
+            for w in writers:
+                source_timings.merge(w.timings)
+            timings[name] = {**source_timings.to_dict(), "total": round(elapsed, 3)}
+    return counts
+
+
+def run_indexer(
+    progress: ReindexProgress | None = None,
+    scope: ReindexScope | None = None,
+    resume: bool = True,
+    force: bool = False,
+) -> dict[str, Any]:
     """
     Full reindex: load translations per game from card_translations, index MTG/OP/PK, configure Meilisearch.
+    Facet counts are accumulated in the same pass and saved for /api/facets; sets go to their own small index.
+    scope (opzionale) limita il run a giochi, set o id documento: niente facet né settings in quel caso.
+    progress (opzionale) riceve l'avanzamento per sorgente. Refused if another reindex holds the lock.
+    Il run completo salva un checkpoint dopo ogni batch confermato e, se interrotto, il run successivo
+    riprende da lì (resume=False per ripartire da zero).
+    Le sorgenti con fingerprint invariato dall'ultimo run totale sono saltate (INDEXER_SKIP_UNCHANGED; force=True le rifà).
     Returns a summary with counts and any error message.
     """
     settings = get_settings()
     index_name = settings.MEILISEARCH_INDEX_NAME
-    batch_size = settings.INDEXER_BATCH_SIZE or BATCH_SIZE
+    sets_index_name = settings.MEILISEARCH_SETS_INDEX_NAME
+    partial = scope is not None and not scope.is_full
     result: dict[str, Any] = {
         "mtg": 0,
         "op": 0,
         "pk": 0,
         "sealed": 0,
         "total": 0,
+        "sets": 0,
         "error": None,
     }
+    if partial:
+        result["scope"] = scope.to_dict()
+        result["deleted"] = 0
 
-    try:
-        conn = _get_mysql_connection()
-        client = _get_meilisearch_client()
-    except Exception as e:
-        logger.exception("Failed to connect to MySQL or Meilisearch")
-        result["error"] = str(e)
-        return result
+    run_attributes = {"reindex.partial": partial, "reindex.resume": resume, "reindex.force": force}
+    with span("reindex.run", run_attributes), _reindex_lock() as acquired:
+        if not acquired:
+            logger.warning("Reindex refused: another reindex is already running")
+            result["error"] = "Un altro reindex è già in corso"
+            return result
+
+        try:
+            conn = _get_mysql_connection()
+            client = _get_meilisearch_client()
+        except Exception as e:
+            logger.exception("Failed to connect to MySQL or Meilisearch")
+            result["error"] = str(e)
+            return result
 
-    try:
         try:
-            client.get_index(index_name)
-        except MeilisearchError:
-            client.create_index(index_name, {"primaryKey": "id"})
-
-        result["mtg"] = _index_mtg_prints(conn, client, index_name, batch_size)
-        result["op"] = _index_op_prints(conn, client, index_name, batch_size)
-        result["pk"] = _index_pk_prints(conn, client, index_name, batch_size)
-        result["sealed"] = _index_sealed_products(conn, client, index_name, batch_size)
-        result["total"] = result["mtg"] + result["op"] + result["pk"] + result["sealed"]
-
-        _configure_meilisearch_index(client, index_name)
-        logger.info(
-            "Reindex complete: mtg=%d op=%d pk=%d sealed=%d total=%d",
-            result["mtg"], result["op"], result["pk"], result["sealed"], result["total"],
-        )
-    except Exception as e:
-        logger.exception("Indexer failed")
-        result["error"] = str(e)
-    finally:
-        conn.close()
+            for name in (index_name, sets_index_name):
+                try:
+                    client.get_index(name)
+                except MeilisearchError:
+                    client.create_index(name, {"primaryKey": "id"})
+
+            checkpoint = None
+            facets = None
+            # Watermark misurati prima di leggere: le righe inserite durante il run verranno riprese dal sync.
+            marks: dict[str, int] = {}
+            if not partial:
+                if not resume:
+                    ReindexCheckpoint.clear()
+                checkpoint = ReindexCheckpoint.load(index_name)
+                facets = FacetCounter()
+                if checkpoint.resumed:
+                    result["resumed"] = True
+                    marks = checkpoint.watermarks
+                else:
+                    marks = checkpoint.watermarks = _source_max_ids(conn, list(_SOURCES))
+                    checkpoint.fingerprints = _source_fingerprints(conn, marks)
+                if settings.INDEXER_SKIP_UNCHANGED and not force:
+                    skipped = _skip_unchanged_sources(client, checkpoint)
+                    if skipped:
+                        result["skipped"] = skipped
+            elif scope.new_since:
+                marks = _source_max_ids(conn, list(scope.new_since))
+            timings: dict[str, dict[str, float]] = {}
+            result.update(index_scope(conn, client, scope, progress, facets, checkpoint, timings))
+            result["timings"] = timings
+            result["total"] = result["mtg"] + result["op"] + result["pk"] + result["sealed"]
+
+            save_watermarks(marks)
+            if partial:
+                # Conteggi facet e settings restano quelli dell'ultimo reindex completo.
+                logger.info("Partial reindex complete (%s): %s", scope.to_dict(), result)
+            else:
+                _configure_meilisearch_index(client, index_name)
+                _configure_sets_index(client, sets_index_name)
+                save_facets(facets)
+                # Con batch nel journal l'indice non è allineato: il prossimo run non deve saltare nulla.
+                if checkpoint.fingerprints and not result.get("journaled"):
+                    save_fingerprints({
+                        name: {
+                            "fingerprint": fingerprint,
+                            "count": checkpoint.source_state(name)["count"],
+                            "facets": checkpoint.source_state(name).get("facets"),
+                        }
+                        for name, fingerprint in checkpoint.fingerprints.items()
+                    })
+                ReindexCheckpoint.clear()
+                logger.info(
+                    "Reindex complete: mtg=%d op=%d pk=%d sealed=%d total=%d sets=%d",
+                    result["mtg"], result["op"], result["pk"], result["sealed"], result["total"], result["sets"],
+                )
+        except Exception as e:
+            logger.exception("Indexer failed")
+            result["error"] = str(e)
+        finally:
+            conn.close()
+            result["peak_memory_mb"] = peak_memory_mb()
 
     return result
+
+
+def retry_journal() -> dict[str, Any]:
+    """
+    Replay del journal dei batch falliti: i documenti vengono riletti da MySQL con lo stesso codice del reindex
+    e reinviati con reindex parziali mirati (gli id spariti da MySQL vengono rimossi dall'indice).
+    Se il replay si interrompe le entry tornano nel journal; i batch che falliscono di nuovo vengono ri-registrati.
+    """
+    entries = take_entries()
+    result: dict[str, Any] = {"entries": len(entries), "documents": 0, "sets": 0, "deleted": 0, "journaled": 0, "error": None}
+    doc_ids = sorted({str(i) for e in entries if e["source"] != "sets" for i in e["ids"]})
+    set_ids = sorted({int(i) for e in entries if e["source"] == "sets" for i in e["ids"]})
+    batch_size = get_settings().INDEXER_BATCH_SIZE or BATCH_SIZE
+    scopes = [ReindexScope(doc_ids=chunk) for chunk in _chunks(doc_ids, batch_size)]
+    # Solo la sorgente sets: set_ids da solo includerebbe anche tutte le stampe e i sealed di quei set.
+    scopes += [ReindexScope(set_ids=chunk, sources=["sets"]) for chunk in _chunks(set_ids)]
+    for scope in scopes:
+        r = run_indexer(scope=scope)
+        if r["error"]:
+            result["error"] = r["error"]
+            break
+        result["documents"] += r["total"]
+        result["sets"] += r["sets"]
+        result["deleted"] += r.get("deleted", 0)
+        result["journaled"] += r.get("journaled", 0)
+    finish_replay(entries, succeeded=result["error"] is None)
+    return result
@@ -0,0 +1,233 @@
+"""
+Job manager del reindex: ogni run ha un id, al massimo un run alla volta (richieste concorrenti
+vengono accorpate al job in corso), stato e progresso consultabili via API.
+Il lock su file in run_indexer() copre anche i run lanciati da reindex.py.
+Con REINDEX_WORKER_PROCESS il run gira in un processo figlio (spawn): costruzione documenti e
+serializzazione JSON non competono col processo API sul GIL; qui resta solo un thread che legge
+progresso e risultato dalla coda.
+Un job con profile=True gira sotto profiling.profile_run(): i nomi degli artefatti sono in result["profile"];
+con sql_profile=True sotto sql_profile.capture_sql() (query, piani EXPLAIN, indici mancanti): in result["sql_profile"].
+Con il tracing attivo lo span del job (anche nel processo worker) è figlio della richiesta che l'ha creato.
+"""
+import logging
+import multiprocessing
+import queue
+import threading
+import uuid
+from collections import OrderedDict
+from contextlib import ExitStack
+from datetime import datetime, timezone
+from typing import Any
+
+from app.core.config import get_settings
+from app.infrastructure.search.indexer import ReindexScope, run_indexer
+from app.infrastructure.search.profiling import profile_run
+from app.infrastructure.search.progress import QueueProgress, ReindexProgress
+from app.infrastructure.search.sql_profile import capture_sql
+from app.infrastructure.search.tracing import attach_context, inject_context, setup_tracing, shutdown_tracing, span
+
+logger = logging.getLogger(__name__)
+
+# Job conclusi conservati in memoria per GET /api/admin/reindex/{id}.
+MAX_JOB_HISTORY = 20
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat(timespec="seconds")
+
+
+def _run_job(
+    progress: ReindexProgress,
+    scope: ReindexScope | None,
+    profile_label: str | None,
+    trace_context: dict[str, str] | None = None,
+    sql_profile_label: str | None = None,
+) -> dict[str, Any]:
+    attributes = {"reindex.profile": profile_label is not None, "reindex.sql_profile": sql_profile_label is not None}
+    with attach_context(trace_context), span("reindex.job", attributes):
+        artifacts: dict[str, list[str]] = {}
+        with ExitStack() as stack:
+            if profile_label is not None:
+                artifacts["profile"] = stack.enter_context(profile_run(profile_label))
+            if sql_profile_label is not None:
+                artifacts["sql_profile"] = stack.enter_context(capture_sql(sql_profile_label))
+            result = run_indexer(progress=progress, scope=scope)
+        # Le liste degli artefatti si riempiono all'uscita dei context manager.
+        return {**result, **artifacts}
+
+
+def _worker_main(
+    scope: ReindexScope | None,
+    events: Any,
+    profile_label: str | None = None,
+    trace_context: dict[str, str] | None = None,
+    sql_profile_label: str | None = None,
+) -> None:
+    """Entry point del processo di reindex: esegue run_indexer e invia progresso e risultato sulla coda."""
+    logging.basicConfig(
+        level=logging.DEBUG if get_settings().DEBUG else logging.INFO,
+        format="%(asctime)s [%(levelname)s] %(name)s: %(message)s",
+    )
+    setup_tracing()
+    try:
+        result = _run_job(QueueProgress(events), scope, profile_label, trace_context, sql_profile_label)
+    except Exception as e:
+        logger.exception("Critical error in reindex worker process")
+        result = {"error": str(e)}
+    # Prima del risultato: il processo daemon può essere terminato appena l'API lo riceve.
+    shutdown_tracing()
+    events.put(("result", result))
+
+
+class ReindexBusyError(Exception):
+    """Un reindex con scope diverso è già in corso."""
+
+    def __init__(self, job: "ReindexJob") -> None:
+        super().__init__(f"Reindex {job.id} già in corso")
+        self.job = job
+
+
+class ReindexJob:
+    def __init__(self, scope: ReindexScope | None = None, profile: bool = False, sql_profile: bool = False) -> None:
+        self.id = uuid.uuid4().hex[:12]
+        self.scope = scope
+        self.profile = profile
+        self.sql_profile = sql_profile
+        self.status = "queued"  # queued | running | succeeded | failed
+        self.created_at = _now()
+        self.started_at: str | None = None
+        self.finished_at: str | None = None
+        self.progress = ReindexProgress()
+        self.result: dict[str, Any] | None = None
+        self.pid: int | None = None  # processo worker (None se il run gira in un thread dell'API)
+        # Contesto della richiesta che ha creato il job: il run gira in un altro thread o processo.
+        self.trace_context = inject_context()
+
+    @property
+    def active(self) -> bool:
+        return self.status in ("queued", "running")
+
+    @property
+    def profile_label(self) -> str | None:
+        return f"job-{self.id}" if self.profile else None
+
+    @property
+    def sql_profile_label(self) -> str | None:
+        return f"job-{self.id}" if self.sql_profile else None
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "id": self.id,
+            "scope": self.scope.to_dict() if self.scope else None,
+            "profile": self.profile,
+            "sql_profile": self.sql_profile,
+            "status": self.status,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "pid": self.pid,
+            "sources": self.progress.snapshot(),
+            "result": self.result,
+        }
+
+
+class ReindexJobManager:
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._jobs: OrderedDict[str, ReindexJob] = OrderedDict()
+        self._current: ReindexJob | None = None
+
+    def submit(
+        self,
+        scope: ReindexScope | None = None,
+        profile: bool = False,
+        sql_profile: bool = False,
+    ) -> tuple[ReindexJob, bool]:
+        """
+        Avvia un nuovo job, o ritorna quello in corso se lo copre (run completo o stesso scope).
+        Il bool indica se il job è stato creato ora. ReindexBusyError se il job in corso non copre lo scope.
+        profile / sql_profile: esegue il job sotto profiler / cattura SQL (ignorati se la richiesta viene
+        accorpata al job in corso).
+        """
+        if scope is not None and scope.is_full:
+            scope = None
+        with self._lock:
+            current = self._current
+            if current is not None and current.active:
+                if current.scope is None or current.scope == scope:
+                    return current, False
+                raise ReindexBusyError(current)
+            job = ReindexJob(scope, profile, sql_profile)
+            self._current = job
+            self._jobs[job.id] = job
+            while len(self._jobs) > MAX_JOB_HISTORY:
+                self._jobs.popitem(last=False)
+        threading.Thread(target=self._run, args=(job,), name=f"reindex-{job.id}", daemon=True).start()
+        return job, True
+
+    def current(self) -> ReindexJob | None:
+        """Job in coda o in esecuzione, se presente."""
+        job = self._current
+        return job if job is not None and job.active else None
+
+    def get(self, job_id: str) -> ReindexJob | None:
+        return self._jobs.get(job_id)
+
+    def list(self) -> list[ReindexJob]:
+        return list(reversed(self._jobs.values()))
+
+    def _run(self, job: ReindexJob) -> None:
+        job.status = "running"
+        job.started_at = _now()
+        logger.info("Reindex job %s started", job.id)
+        try:
+            if get_settings().REINDEX_WORKER_PROCESS:
+                job.result = self._run_in_process(job)
+            else:
+                job.result = _run_job(
+                    job.progress, job.scope, job.profile_label, job.trace_context, job.sql_profile_label
+                )
+        except Exception as e:
+            logger.exception("Critical error during reindex job %s", job.id)
+            job.result = {"error": str(e)}
+        job.status = "failed" if job.result.get("error") else "succeeded"
+        job.finished_at = _now()
+        if job.status == "failed":
+            logger.error("Reindex job %s failed: %s", job.id, job.result["error"])
+        else:
+            logger.info("Reindex job %s succeeded: %s", job.id, job.result)
+
+    @staticmethod
+    def _run_in_process(job: ReindexJob) -> dict[str, Any]:
+        """Avvia il processo worker e riapplica i suoi eventi al job finché non arriva il risultato."""
+        ctx = multiprocessing.get_context("spawn")
+        events = ctx.Queue()
+        # daemon: se l'API si ferma il worker termina; il run successivo riprende dal checkpoint.
+        proc = ctx.Process(
+            target=_worker_main,
+            args=(job.scope, events, job.profile_label, job.trace_context, job.sql_profile_label),
+            name=f"reindex-{job.id}",
+            daemon=True,
+        )
+        proc.start()
+        job.pid = proc.pid
+        logger.info("Reindex job %s running in worker process %d", job.id, proc.pid)
+        try:
+            while True:
+                try:
+                    kind, *args = events.get(timeout=1.0)
+                except queue.Empty:
+                    if proc.is_alive():
+                        continue
+                    try:  # il risultato può essere arrivato tra il timeout e l'uscita del processo
+                        kind, *args = events.get(timeout=1.0)
+                    except queue.Empty:
+                        return {"error": f"Processo di reindex terminato senza risultato (exit code {proc.exitcode})"}
+                if kind == "result":
+                    return args[0]
+                getattr(job.progress, kind)(*args)
+        finally:
+            proc.join(timeout=10)
+
+
+job_manager = ReindexJobManager()
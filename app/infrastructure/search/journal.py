@@ -0,0 +1,77 @@
+"""
+Journal dei batch falliti: quando un add_documents fallisce anche dopo i retry (timeout, 5xx, task in errore)
+gli id dei documenti e il motivo finiscono in INDEXER_STATE_DIR/failed_batches.jsonl e il run prosegue.
+`python reindex.py --retry-journal` li rilegge da MySQL e li reinvia, senza rifare l'intera estrazione.
+"""
+import json
+import logging
+import threading
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any
+
+from app.core.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+JOURNAL_FILENAME = "failed_batches.jsonl"
+_REPLAY_SUFFIX = ".replaying"
+
+_lock = threading.Lock()
+
+
+def _journal_path() -> Path:
+    return Path(get_settings().INDEXER_STATE_DIR) / JOURNAL_FILENAME
+
+
+def _append(entries: list[dict[str, Any]]) -> None:
+    path = _journal_path()
+    path.parent.mkdir(parents=True, exist_ok=True)
+    data = "".join(json.dumps(entry, default=str) + "\n" for entry in entries)
+    with _lock, open(path, "a", encoding="utf-8") as fh:
+        fh.write(data)
+
+
+def record_failed_batch(index_name: str, source: str, ids: list[Any], reason: str) -> None:
+    _append([{
+        "at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "index": index_name,
+        "source": source,
+        "ids": ids,
+        "reason": reason,
+    }])
+    logger.error("Batch of %d %s documents journaled after failure: %s", len(ids), source, reason)
+
+
+def _read(path: Path) -> list[dict[str, Any]]:
+    try:
+        lines = path.read_text(encoding="utf-8").splitlines()
+    except FileNotFoundError:
+        return []
+    return [json.loads(line) for line in lines if line.strip()]
+
+
+def pending_entries() -> list[dict[str, Any]]:
+    return _read(_journal_path()) + _read(_journal_path().with_suffix(_REPLAY_SUFFIX))
+
+
+def take_entries() -> list[dict[str, Any]]:
+    """
+    Entry da riprovare. Il journal viene spostato in failed_batches.replaying: i batch che falliscono
+    durante il replay finiscono in un journal nuovo. Include un replay precedente rimasto a metà.
+    """
+    path = _journal_path()
+    replay = path.with_suffix(_REPLAY_SUFFIX)
+    with _lock:
+        entries = _read(replay) + _read(path)
+        if entries:
+            replay.write_text("".join(json.dumps(e, default=str) + "\n" for e in entries), encoding="utf-8")
+        path.unlink(missing_ok=True)
+    return entries
+
+
+def finish_replay(entries: list[dict[str, Any]], succeeded: bool) -> None:
+    """Chiude un replay: se fallito le entry tornano nel journal."""
+    if not succeeded:
+        _append(entries)
+    _journal_path().with_suffix(_REPLAY_SUFFIX).unlink(missing_ok=True)
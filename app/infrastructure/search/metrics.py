@@ -0,0 +1,96 @@
+"""
+Metriche Prometheus (GET /metrics): durata del reindex per sorgente, righe lette da MySQL, documenti
+inviati, latenza degli add_documents e attesa dei task Meilisearch; per le richieste HTTP latenza
+per route e latenza delle chiamate a Meilisearch; dal task monitor coda e throughput dei task Meilisearch.
+Il reindex lanciato dall'API gira in un processo separato (REINDEX_WORKER_PROCESS): con la variabile
+d'ambiente PROMETHEUS_MULTIPROC_DIR ogni processo (worker uvicorn, worker di reindex, reindex.py)
+scrive le sue metriche in quella cartella e /metrics le aggrega. Senza, solo il processo che risponde.
+"""
+import os
+import time
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+
+# Reindex: da qualche secondo (sync incrementali) a decine di minuti (totale MTG).
+_DURATION_BUCKETS = (0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600, 1200, 1800, 3600)
+_BATCH_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+REINDEX_SOURCE_SECONDS = Histogram(
+    "reindex_source_duration_seconds",
+    "Time to index one source, by run type (full or partial)",
+    ["source", "run"],
+    buckets=_DURATION_BUCKETS,
+)
+REINDEX_ROWS_FETCHED = Counter("reindex_rows_fetched_total", "Rows read from MySQL by the indexer", ["source"])
+REINDEX_DOCS_SENT = Counter(
+    "reindex_documents_sent_total", "Documents accepted by Meilisearch add_documents", ["source"]
+)
+REINDEX_DOCS_JOURNALED = Counter(
+    "reindex_documents_journaled_total", "Documents written to the failed-batch journal", ["source"]
+)
+REINDEX_BATCH_SEND_SECONDS = Histogram(
+    "reindex_batch_send_seconds",
+    "Latency of one add_documents request (each retry is a separate observation)",
+    ["source"],
+    buckets=_BATCH_BUCKETS,
+)
+REINDEX_TASK_WAIT_SECONDS = Histogram(
+    "reindex_task_wait_seconds",
+    "Wait for the Meilisearch task of a batch before the checkpoint advances",
+    ["source"],
+    buckets=_BATCH_BUCKETS,
+)
+
+HTTP_REQUEST_SECONDS = Histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency by route template",
+    ["method", "route", "status"],
+)
+MEILISEARCH_REQUEST_SECONDS = Histogram(
+    "meilisearch_request_duration_seconds",
+    "Latency of Meilisearch calls made by the search API",
+    ["operation", "outcome"],
+)
+
+# Task monitor (task_monitor.py): aggiornati solo dal processo che esegue il poller.
+MEILISEARCH_TASKS = Gauge(
+    "meilisearch_tasks",
+    "Meilisearch tasks of our indexes: enqueued and processing now, failed within the monitor window",
+    ["status"],
+    multiprocess_mode="mostrecent",
+)
+MEILISEARCH_OLDEST_TASK_AGE_SECONDS = Gauge(
+    "meilisearch_oldest_enqueued_task_age_seconds",
+    "Age of the oldest enqueued Meilisearch task of our indexes (0 = queue empty)",
+    multiprocess_mode="mostrecent",
+)
+MEILISEARCH_INDEXING_DOCS_PER_SECOND = Gauge(
+    "meilisearch_indexing_documents_per_second",
+    "Documents indexed per second of task processing time within the monitor window",
+    multiprocess_mode="mostrecent",
+)
+
+
+def observe_meilisearch(operation: str, started: float, status_code: int | None) -> None:
+    """Registra una chiamata a Meilisearch partita a started (perf_counter); status_code None = errore di rete."""
+    outcome = f"{status_code // 100}xx" if status_code is not None else "error"
+    MEILISEARCH_REQUEST_SECONDS.labels(operation, outcome).observe(time.perf_counter() - started)
+
+
+def render_latest() -> tuple[bytes, str]:
+    """Corpo e content type della risposta di /metrics."""
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), CONTENT_TYPE_LATEST
@@ -0,0 +1,181 @@
+"""
+Profilo on demand di un reindex (reindex.py --profile, POST /api/admin/reindex?profile=true).
+Artefatti in INDEXER_STATE_DIR/profiles, scaricabili da GET /api/admin/profiles/{name}:
+- <run>.pstats / <run>.pstats.txt: cProfile del thread che esegue run_indexer (snakeviz, pstats);
+- <run>.collapsed: stack campionati di tutti i thread, partizioni parallele comprese, nel formato
+  "frame;frame;frame count" (flamegraph.pl, speedscope);
+- <run>.alloc.txt: allocazioni per riga (tracemalloc) al picco di memoria tracciata del run.
+tracemalloc rallenta il run in modo sensibile: i tempi per fase di un run profilato non sono confrontabili.
+"""
+import cProfile
+import io
+import logging
+import os
+import pstats
+import re
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Iterator
+
+from app.core.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+PROFILES_DIRNAME = "profiles"
+# Run profilati conservati (i più vecchi vengono rimossi).
+MAX_PROFILE_RUNS = 10
+_SAMPLE_INTERVAL_SECONDS = 0.01
+# Intervallo minimo tra due snapshot tracemalloc (costosi su heap grandi).
+_MEMORY_SNAPSHOT_INTERVAL_SECONDS = 5.0
+_TOP_ALLOCATIONS = 50
+_TOP_FUNCTIONS = 60
+
+
+def profiles_dir() -> Path:
+    return Path(get_settings().INDEXER_STATE_DIR) / PROFILES_DIRNAME
+
+
+def list_artifacts() -> list[dict[str, Any]]:
+    """Artefatti disponibili, dal più recente."""
+    directory = profiles_dir()
+    if not directory.is_dir():
+        return []
+    files = sorted(directory.iterdir(), key=lambda p: p.name, reverse=True)
+    return [
+        {
+            "name": p.name,
+            "size": p.stat().st_size,
+            "modified": datetime.fromtimestamp(p.stat().st_mtime, timezone.utc).isoformat(timespec="seconds"),
+        }
+        for p in files
+        if p.is_file()
+    ]
+
+
+def artifact_path(name: str) -> Path | None:
+    """Percorso di un artefatto, solo se è un file della cartella dei profili (niente path traversal)."""
+    if not name or name != os.path.basename(name):
+        return None
+    path = profiles_dir() / name
+    return path if path.is_file() else None
+
+
+def _frame_label(code: Any) -> str:
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+class _Sampler(threading.Thread):
+    """Campiona gli stack di tutti i thread e tiene lo snapshot tracemalloc più alto visto."""
+
+    def __init__(self) -> None:
+        super().__init__(name="reindex-profiler", daemon=True)
+        self.stacks: Counter[str] = Counter()
+        self.snapshot: tracemalloc.Snapshot | None = None
+        self._snapshot_size = 0
+        self._last_snapshot = 0.0
+        self._stop_event = threading.Event()
+
+    def run(self) -> None:
+        while not self._stop_event.wait(_SAMPLE_INTERVAL_SECONDS):
+            self._sample_stacks()
+            now = time.monotonic()
+            if now - self._last_snapshot >= _MEMORY_SNAPSHOT_INTERVAL_SECONDS:
+                self._last_snapshot = now
+                self.maybe_snapshot()
+
+    def stop(self) -> None:
+        self._stop_event.set()
+        self.join()
+
+    def _sample_stacks(self) -> None:
+        names = {t.ident: t.name for t in threading.enumerate()}
+        for ident, frame in sys._current_frames().items():
+            if ident == self.ident:
+                continue
+            stack = []
+            while frame is not None:
+                stack.append(_frame_label(frame.f_code))
+                frame = frame.f_back
+            # Le partizioni (index-mtg_0, index-mtg_1, ...) finiscono sotto la stessa radice.
+            thread = re.sub(r"_\d+$", "", names.get(ident, str(ident)))
+            self.stacks[";".join([thread, *reversed(stack)])] += 1
+
+    def maybe_snapshot(self) -> None:
+        """Snapshot se la memoria tracciata ha superato quella dello snapshot precedente."""
+        current, _ = tracemalloc.get_traced_memory()
+        if current > self._snapshot_size:
+            self.snapshot = tracemalloc.take_snapshot()
+            self._snapshot_size = current
+
+
+def _write_artifacts(prefix: str, profiler: cProfile.Profile, sampler: _Sampler, peak: int) -> list[str]:
+    directory = profiles_dir()
+    directory.mkdir(parents=True, exist_ok=True)
+    names = []
+
+    profiler.dump_stats(directory / f"{prefix}.pstats")
+    out = io.StringIO()
+    pstats.Stats(profiler, stream=out).sort_stats("cumulative").print_stats(_TOP_FUNCTIONS)
+    (directory / f"{prefix}.pstats.txt").write_text(out.getvalue(), encoding="utf-8")
+    names += [f"{prefix}.pstats", f"{prefix}.pstats.txt"]
+
+    collapsed = "".join(f"{stack} {count}\n" for stack, count in sampler.stacks.most_common())
+    (directory / f"{prefix}.collapsed").write_text(collapsed, encoding="utf-8")
+    names.append(f"{prefix}.collapsed")
+
+    lines = [f"Picco memoria tracciata: {peak / 1024 / 1024:.1f} MB"]
+    if sampler.snapshot is not None:
+        snapshot = sampler.snapshot.filter_traces([
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap*>"),
+        ])
+        stats = snapshot.statistics("lineno")
+        total = sum(stat.size for stat in stats)
+        lines.append(f"Snapshot al picco: {total / 1024 / 1024:.1f} MB in {len(stats)} righe; top {_TOP_ALLOCATIONS}:")
+        lines += [str(stat) for stat in stats[:_TOP_ALLOCATIONS]]
+    (directory / f"{prefix}.alloc.txt").write_text("\n".join(lines) + "\n", encoding="utf-8")
+    names.append(f"{prefix}.alloc.txt")
+    return names
+
+
+def prune_profiles() -> None:
+    """Tiene gli artefatti degli ultimi MAX_PROFILE_RUNS run (prefisso <timestamp>-<label>)."""
+    runs = sorted({p.name.split(".", 1)[0] for p in profiles_dir().iterdir() if p.is_file()}, reverse=True)
+    for run in runs[MAX_PROFILE_RUNS:]:
+        for p in profiles_dir().glob(f"{run}.*"):
+            p.unlink(missing_ok=True)
+
+
+@contextmanager
+def profile_run(label: str) -> Iterator[list[str]]:
+    """
+    Profila il blocco: cProfile sul thread corrente, campionamento degli stack di tutti i thread, tracemalloc.
+    La lista restituita contiene i nomi degli artefatti dopo l'uscita dal blocco (anche se il blocco solleva).
+    """
+    prefix = f"{datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%SZ')}-{label}"
+    artifacts: list[str] = []
+    profiler = cProfile.Profile()
+    sampler = _Sampler()
+    tracemalloc.start()
+    sampler.start()
+    profiler.enable()
+    try:
+        yield artifacts
+    finally:
+        profiler.disable()
+        sampler.stop()
+        sampler.maybe_snapshot()
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        try:
+            artifacts += _write_artifacts(prefix, profiler, sampler, peak)
+            prune_profiles()
+            logger.info("Profile written to %s: %s", profiles_dir(), artifacts)
+        except OSError:
+            logger.exception("Failed to write profile artifacts")
@@ -0,0 +1,73 @@
+"""
+Progresso di un reindex per sorgente (mtg, op, pk, sealed, sets): documenti inviati, docs/sec, ETA.
+Aggiornato dall'indexer a ogni batch, letto dall'endpoint di stato del job.
+"""
+import threading
+import time
+from typing import Any
+
+
+class ReindexProgress:
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._sources: dict[str, dict[str, Any]] = {}
+
+    def start_source(self, source: str, expected: int | None) -> None:
+        with self._lock:
+            self._sources[source] = {
+                "expected": expected,
+                "done": 0,
+                "started_at": time.time(),
+                "finished_at": None,
+            }
+
+    def advance(self, source: str, docs: int) -> None:
+        with self._lock:
+            self._sources[source]["done"] += docs
+
+    def finish_source(self, source: str) -> None:
+        with self._lock:
+            self._sources[source]["finished_at"] = time.time()
+
+    def snapshot(self) -> dict[str, Any]:
+        """Stato per sorgente con docs_per_sec ed eta_seconds (None se non stimabile)."""
+        now = time.time()
+        out: dict[str, Any] = {}
+        with self._lock:
+            for source, s in self._sources.items():
+                elapsed = (s["finished_at"] or now) - s["started_at"]
+                rate = s["done"] / elapsed if elapsed > 0 else 0.0
+                eta = None
+                if s["finished_at"] is not None:
+                    eta = 0.0
+                elif s["expected"] is not None and rate > 0:
+                    eta = round(max(s["expected"] - s["done"], 0) / rate, 1)
+                out[source] = {
+                    "status": "done" if s["finished_at"] is not None else "running",
+                    "done": s["done"],
+                    "expected": s["expected"],
+                    "elapsed_seconds": round(elapsed, 1),
+                    "docs_per_sec": round(rate, 1),
+                    "eta_seconds": eta,
+                }
+        return out
+
+
+class QueueProgress(ReindexProgress):
+    """
+    Progresso di un reindex che gira in un processo separato: ogni evento va sulla coda
+    multiprocessing e il job manager lo riapplica al ReindexProgress del job nel processo API.
+    """
+
+    def __init__(self, events: Any) -> None:
+        super().__init__()
+        self._events = events
+
+    def start_source(self, source: str, expected: int | None) -> None:
+        self._events.put(("start_source", source, expected))
+
+    def advance(self, source: str, docs: int) -> None:
+        self._events.put(("advance", source, docs))
+
+    def finish_source(self, source: str) -> None:
+        self._events.put(("finish_source", source))
@@ -0,0 +1,114 @@
+"""
+Readiness (GET /health/ready): Meilisearch raggiungibile, MySQL raggiungibile, indice carte con almeno
+HEALTH_READY_MIN_DOCUMENTS documenti e, con HEALTH_READY_REQUIRE_IDLE_INDEX, nessun task in elaborazione.
+I probe girano in parallelo con timeout breve e il risultato resta in cache HEALTH_READY_CACHE_SECONDS:
+un load balancer che interroga ogni secondo da più nodi non aggiunge carico a MySQL né a Meilisearch.
+Probe concorrenti a cache scaduta ne eseguono uno solo (gli altri attendono lo stesso risultato).
+"""
+import asyncio
+import logging
+import time
+from datetime import datetime, timezone
+from typing import Any
+
+import httpx
+import pymysql
+
+from app.core.config import get_settings
+from app.infrastructure.search.indexer import _get_mysql_connection
+from app.infrastructure.search.searcher import get_http_client
+
+logger = logging.getLogger(__name__)
+
+_cached: dict[str, Any] | None = None
+_cached_at = 0.0  # time.monotonic() dell'ultimo probe
+_lock = asyncio.Lock()
+
+
+def _elapsed_ms(started: float) -> float:
+    return round((time.perf_counter() - started) * 1000, 1)
+
+
+async def _probe_meilisearch() -> tuple[dict[str, Any], dict[str, Any]]:
+    """(check meilisearch, check index): /health e stats dell'indice carte."""
+    settings = get_settings()
+    timeout = settings.HEALTH_READY_TIMEOUT_SECONDS
+    client = get_http_client()
+    started = time.perf_counter()
+    try:
+        response = await client.get("/health", timeout=timeout)
+        meili = {"ok": response.status_code == 200, "latency_ms": _elapsed_ms(started)}
+        if not meili["ok"]:
+            meili["error"] = f"HTTP {response.status_code}"
+            return meili, {"ok": False, "error": "Meilisearch non disponibile"}
+        response = await client.get(f"/indexes/{settings.MEILISEARCH_INDEX_NAME}/stats", timeout=timeout)
+    except httpx.HTTPError as e:
+        logger.warning("Readiness: Meilisearch unreachable: %s", e)
+        return (
+            {"ok": False, "latency_ms": _elapsed_ms(started), "error": "non raggiungibile"},
+            {"ok": False, "error": "Meilisearch non raggiungibile"},
+        )
+    if response.status_code == 404:
+        return meili, {"ok": False, "documents": 0, "error": f"indice {settings.MEILISEARCH_INDEX_NAME} inesistente"}
+    if response.status_code != 200:
+        return meili, {"ok": False, "error": f"stats HTTP {response.status_code}"}
+    stats = response.json()
+    index = {"documents": stats.get("numberOfDocuments", 0), "is_indexing": bool(stats.get("isIndexing"))}
+    errors = []
+    if index["documents"] < settings.HEALTH_READY_MIN_DOCUMENTS:
+        errors.append(f"{index['documents']} documenti (minimo {settings.HEALTH_READY_MIN_DOCUMENTS})")
+    if settings.HEALTH_READY_REQUIRE_IDLE_INDEX and index["is_indexing"]:
+        errors.append("indicizzazione in corso")
+    index["ok"] = not errors
+    if errors:
+        index["error"] = "; ".join(errors)
+    return meili, index
+
+
+def _mysql_ping() -> None:
+    conn = _get_mysql_connection(timeout=get_settings().HEALTH_READY_TIMEOUT_SECONDS)
+    try:
+        with conn.cursor() as cur:
+            cur.execute("SELECT 1")
+            cur.fetchone()
+    finally:
+        conn.close()
+
+
+async def _probe_mysql() -> dict[str, Any]:
+    started = time.perf_counter()
+    try:
+        await asyncio.to_thread(_mysql_ping)
+    except pymysql.MySQLError as e:
+        logger.warning("Readiness: MySQL unreachable: %s", e)
+        code = e.args[0] if e.args else None
+        return {"ok": False, "latency_ms": _elapsed_ms(started), "error": f"non raggiungibile ({code})"}
+    return {"ok": True, "latency_ms": _elapsed_ms(started)}
+
+
+async def _probe() -> dict[str, Any]:
+    settings = get_settings()
+    (meili, index), mysql = await asyncio.gather(_probe_meilisearch(), _probe_mysql())
+    checks = {"meilisearch": meili, "index": index, "mysql": mysql}
+    if not settings.HEALTH_READY_REQUIRE_MYSQL:
+        mysql["required"] = False
+    failed = [name for name, check in checks.items() if not check["ok"] and check.get("required", True)]
+    return {
+        "status": "not_ready" if failed else "ready",
+        "failed": failed,
+        "checks": checks,
+        "checked_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+    }
+
+
+async def readiness() -> dict[str, Any]:
+    """Esito dei probe (in cache per HEALTH_READY_CACHE_SECONDS) con age_seconds dall'ultimo probe."""
+    global _cached, _cached_at
+    ttl = get_settings().HEALTH_READY_CACHE_SECONDS
+    if _cached is None or time.monotonic() - _cached_at >= ttl:
+        async with _lock:
+            # Ricontrollo: chi era in attesa del lock trova il probe appena fatto.
+            if _cached is None or time.monotonic() - _cached_at >= ttl:
+                _cached = await _probe()
+                _cached_at = time.monotonic()
+    return {**_cached, "age_seconds": round(time.monotonic() - _cached_at, 1)}
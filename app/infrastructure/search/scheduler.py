@@ -0,0 +1,188 @@
+"""
+Scheduler interno del reindex (SCHEDULER_ENABLED): sync incrementali leggeri ogni
+SCHEDULER_SYNC_INTERVAL_SECONDS e reindex totali agli orari SCHEDULER_FULL_REINDEX_AT (UTC, ore di basso traffico).
+- jitter casuale su ogni esecuzione, per non allinearsi ad altri job sul DB condiviso;
+- niente sovrapposizioni: se un reindex è già in corso il turno viene saltato;
+- skip-if-unchanged: il sync parte solo se qualche sorgente ha righe oltre il watermark;
+- un solo scheduler attivo anche con più worker uvicorn (lock su INDEXER_STATE_DIR/scheduler.lock).
+I run sono normali job del ReindexJobManager: stato su GET /api/admin/reindex.
+"""
+import asyncio
+import logging
+import random
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import IO, Any
+
+from app.core.config import get_settings, parse_schedule_times
+from app.infrastructure.search.indexer import _get_mysql_connection, plan_incremental
+from app.infrastructure.search.jobs import ReindexBusyError, job_manager
+
+try:
+    import fcntl
+except ImportError:  # Windows (sviluppo locale): nessun lock tra processi
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+
+def try_lock(name: str) -> IO | None:
+    """
+    Lock esclusivo non bloccante su INDEXER_STATE_DIR/<name>, per i loop da eseguire in un solo processo
+    anche con più worker uvicorn. Ritorna il file da tenere aperto (chiuderlo rilascia il lock) o None.
+    """
+    path = Path(get_settings().INDEXER_STATE_DIR) / name
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fh = open(path, "w")
+    if fcntl is not None:
+        try:
+            fcntl.flock(fh, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            fh.close()
+            return None
+    return fh
+
+
+def _next_full_at(now: datetime, times: list[tuple[int, int]]) -> datetime | None:
+    if not times:
+        return None
+    candidates = []
+    for h, m in times:
+        at = now.replace(hour=h, minute=m, second=0, microsecond=0)
+        candidates.append(at if at > now else at + timedelta(days=1))
+    return min(candidates)
+
+
+def _iso(value: datetime | None) -> str | None:
+    return value.isoformat(timespec="seconds") if value else None
+
+
+class ReindexScheduler:
+    def __init__(self) -> None:
+        self._task: asyncio.Task | None = None
+        self._lock_file: Any = None
+        self.leader = False
+        self.next_sync_at: datetime | None = None
+        self.next_full_at: datetime | None = None
+        self.last_sync: dict[str, Any] | None = None
+        self.last_full: dict[str, Any] | None = None
+
+    def start(self) -> None:
+        settings = get_settings()
+        if not settings.SCHEDULER_ENABLED:
+            return
+        if not self._acquire_leadership():
+            logger.info("Reindex scheduler: another process holds the scheduler lock, not scheduling here")
+            return
+        self._task = asyncio.create_task(self._loop(), name="reindex-scheduler")
+        logger.info("Reindex scheduler started")
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._lock_file is not None:
+            self._lock_file.close()
+            self._lock_file = None
+            self.leader = False
+
+    def _acquire_leadership(self) -> bool:
+        self._lock_file = try_lock("scheduler.lock")
+        self.leader = self._lock_file is not None
+        return self.leader
+
+    def status(self) -> dict[str, Any]:
+        settings = get_settings()
+        return {
+            "enabled": settings.SCHEDULER_ENABLED,
+            "leader": self.leader,
+            "sync_interval_seconds": settings.SCHEDULER_SYNC_INTERVAL_SECONDS,
+            "full_reindex_at": settings.SCHEDULER_FULL_REINDEX_AT,
+            "next_sync_at": _iso(self.next_sync_at),
+            "next_full_at": _iso(self.next_full_at),
+            "last_sync": self.last_sync,
+            "last_full": self.last_full,
+        }
+
+    def _jitter(self) -> timedelta:
+        return timedelta(seconds=random.uniform(0, get_settings().SCHEDULER_JITTER_SECONDS))
+
+    def _schedule_sync(self, now: datetime) -> None:
+        interval = get_settings().SCHEDULER_SYNC_INTERVAL_SECONDS
+        self.next_sync_at = now + timedelta(seconds=interval) + self._jitter() if interval > 0 else None
+
+    def _schedule_full(self, now: datetime) -> None:
+        at = _next_full_at(now, parse_schedule_times(get_settings().SCHEDULER_FULL_REINDEX_AT))
+        self.next_full_at = at + self._jitter() if at else None
+
+    async def _loop(self) -> None:
+        now = datetime.now(timezone.utc)
+        self._schedule_sync(now)
+        self._schedule_full(now)
+        while True:
+            due = [t for t in (self.next_sync_at, self.next_full_at) if t is not None]
+            if not due:
+                return
+            delay = (min(due) - datetime.now(timezone.utc)).total_seconds()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            now = datetime.now(timezone.utc)
+            full = self.next_full_at is not None and now >= self.next_full_at
+            try:
+                if full:
+                    self.last_full = self._run_full(now)
+                    self._schedule_full(now)
+                    # Il totale copre anche le righe nuove: il prossimo sync riparte da qui.
+                    self._schedule_sync(now)
+                elif self.next_sync_at is not None and now >= self.next_sync_at:
+                    self.last_sync = await self._run_sync(now)
+                    self._schedule_sync(now)
+            except Exception as e:
+                logger.exception("Reindex scheduler %s run failed", "full" if full else "sync")
+                error = {"at": _iso(now), "action": "error", "detail": str(e)}
+                if full:
+                    # Senza rischedulare, next_full_at resta nel passato e il loop ritenterebbe subito, a vuoto.
+                    self.last_full = error
+                    self._schedule_full(now)
+                else:
+                    self.last_sync = error
+                self._schedule_sync(now)
+
+    def _run_full(self, now: datetime) -> dict[str, Any]:
+        running = job_manager.current()
+        if running is not None:
+            logger.info("Scheduled full reindex skipped: job %s still running", running.id)
+            return {"at": _iso(now), "action": "skipped", "detail": f"job {running.id} in corso"}
+        job, _ = job_manager.submit(None)
+        logger.info("Scheduled full reindex started: job %s", job.id)
+        return {"at": _iso(now), "action": "started", "job_id": job.id}
+
+    async def _run_sync(self, now: datetime) -> dict[str, Any]:
+        running = job_manager.current()
+        if running is not None:
+            return {"at": _iso(now), "action": "skipped", "detail": f"job {running.id} in corso"}
+        scope = await asyncio.to_thread(_plan_incremental)
+        if scope is None:
+            logger.debug("Scheduled sync skipped: no new rows")
+            return {"at": _iso(now), "action": "skipped", "detail": "nessuna riga nuova"}
+        try:
+            job, _ = job_manager.submit(scope)
+        except ReindexBusyError as e:
+            return {"at": _iso(now), "action": "skipped", "detail": f"job {e.job.id} in corso"}
+        logger.info("Scheduled sync started: job %s %s", job.id, scope.to_dict())
+        return {"at": _iso(now), "action": "started", "job_id": job.id, "scope": scope.to_dict()}
+
+
+def _plan_incremental():
+    conn = _get_mysql_connection()
+    try:
+        return plan_incremental(conn)
+    finally:
+        conn.close()
+
+
+scheduler = ReindexScheduler()
@@ -0,0 +1,180 @@
+"""
+Search path verso Meilisearch: client HTTP asincrono condiviso (keep-alive) usato dalle route pubbliche.
+Il client meilisearch-python è sincrono e apre una connessione per richiesta: va bene per l'indexer, non per l'API.
+
+Single-flight: query identiche in volo nello stesso momento (es. uscita di un nuovo set) generano
+una sola chiamata a Meilisearch; le altre richieste attendono e condividono lo stesso risultato.
+Il coalescing sta sotto qualsiasi cache di risposta: copre i miss concorrenti sulla stessa chiave.
+"""
+import asyncio
+import json
+import logging
+import time
+from typing import Any
+
+import httpx
+
+from app.core.config import get_settings
+from app.infrastructure.search import server_timing
+from app.infrastructure.search.metrics import observe_meilisearch
+from app.infrastructure.search.tracing import span
+
+logger = logging.getLogger(__name__)
+
+_http_client: httpx.AsyncClient | None = None
+
+
+class SearchBackendError(Exception):
+    """Errore da Meilisearch (status_code 400 = query non valida, 502 = backend non raggiungibile)."""
+
+    def __init__(self, status_code: int, detail: str) -> None:
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """Client httpx condiviso, creato alla prima richiesta. Secrets via get_secret_value()."""
+    global _http_client
+    if _http_client is None:
+        settings = get_settings()
+        _http_client = httpx.AsyncClient(
+            base_url=settings.MEILISEARCH_URL.rstrip("/"),
+            headers={"Authorization": f"Bearer {settings.MEILISEARCH_MASTER_KEY.get_secret_value()}"},
+            timeout=settings.SEARCH_TIMEOUT_SECONDS,
+            limits=httpx.Limits(max_keepalive_connections=20, max_connections=50),
+        )
+    return _http_client
+
+
+async def close_http_client() -> None:
+    global _http_client
+    if _http_client is not None:
+        await _http_client.aclose()
+        _http_client = None
+
+
+async def multi_search(queries: list[dict[str, Any]]) -> list[dict[str, Any]]:
+    """
+    Esegue N query con una sola chiamata POST /multi-search.
+    Ogni query deve contenere già indexUid. Ritorna i risultati nello stesso ordine.
+    """
+    started = time.perf_counter()
+    try:
+        with span("meilisearch.multi_search", {"meilisearch.queries": len(queries)}):
+            response = await get_http_client().post("/multi-search", json={"queries": queries})
+    except httpx.HTTPError as e:
+        observe_meilisearch("multi-search", started, None)
+        logger.warning("Meilisearch multi-search failed: %s", e)
+        raise SearchBackendError(502, "Meilisearch non raggiungibile") from e
+    observe_meilisearch("multi-search", started, response.status_code)
+    if response.status_code >= 500:
+        logger.warning("Meilisearch multi-search error %d: %s", response.status_code, response.text[:500])
+        raise SearchBackendError(502, "Errore da Meilisearch")
+    if response.status_code >= 400:
+        body = response.json() if response.headers.get("content-type", "").startswith("application/json") else {}
+        raise SearchBackendError(400, body.get("message") or "Query di ricerca non valida")
+    return response.json()["results"]
+
+
+# Query in volo: chiave canonica -> future con il risultato Meilisearch (condiviso, da non modificare).
+_inflight: dict[str, asyncio.Future] = {}
+# Riferimenti forti ai task upstream (il loop tiene solo riferimenti deboli).
+_upstream_tasks: set[asyncio.Task] = set()
+
+
+def _query_key(query: dict[str, Any]) -> str:
+    return json.dumps(query, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+
+
+async def search_queries(queries: list[dict[str, Any]]) -> list[dict[str, Any]]:
+    """
+    multi_search con single-flight per singola query: le query già in volo (anche da altre richieste)
+    vengono attese, solo quelle nuove partono in un'unica multi-search. Ordine dei risultati preservato.
+    La chiamata upstream gira in un task separato: se il client che l'ha avviata si disconnette,
+    gli altri in attesa ricevono comunque il risultato.
+    """
+    if not get_settings().SEARCH_SINGLE_FLIGHT:
+        started = time.perf_counter()
+        results = await multi_search(queries)
+        _record_timing(started, results, shared=0)
+        return results
+
+    started = time.perf_counter()
+    loop = asyncio.get_running_loop()
+    keys = [_query_key(q) for q in queries]
+    pending: dict[str, asyncio.Future] = {}
+    new_queries: dict[str, dict[str, Any]] = {}
+    for key, query in zip(keys, queries):
+        if key in pending:
+            continue
+        fut = _inflight.get(key)
+        if fut is None:
+            fut = loop.create_future()
+            _inflight[key] = fut
+            new_queries[key] = query
+        pending[key] = fut
+
+    if new_queries:
+        task = asyncio.create_task(_upstream_search(list(new_queries.values())))
+        _upstream_tasks.add(task)
+        task.add_done_callback(_upstream_tasks.discard)
+        task.add_done_callback(lambda t: _resolve(t, list(new_queries)))
+
+    results = {key: await asyncio.shield(fut) for key, fut in pending.items()}
+    _record_timing(started, list(results.values()), shared=len(pending) - len(new_queries))
+    return [results[key] for key in keys]
+
+
+def _record_timing(started: float, results: list[dict[str, Any]], shared: int) -> None:
+    """Fasi upstream e meili (processingTimeMs) nel Server-Timing della richiesta corrente."""
+    server_timing.record(
+        "upstream", (time.perf_counter() - started) * 1000, f"shared {shared}/{len(results)}" if shared else None
+    )
+    server_timing.record("meili", sum(r.get("processingTimeMs") or 0 for r in results), "processingTimeMs")
+
+
+async def _upstream_search(queries: list[dict[str, Any]]) -> list[dict[str, Any] | SearchBackendError]:
+    """
+    multi_search della single-flight. Meilisearch rifiuta con 400 l'intera multi-search se anche una sola
+    query non è valida: in quel caso le query vengono rieseguite una per una, così l'errore arriva solo
+    a chi attende la query non valida e non alle richieste che si sono agganciate alle altre.
+    Ritorna, per ogni query, il risultato o il SearchBackendError della query.
+    """
+    try:
+        return await multi_search(queries)
+    except SearchBackendError as e:
+        if e.status_code != 400 or len(queries) == 1:
+            raise
+    logger.info("Meilisearch rejected a multi-search of %d queries, retrying them one by one", len(queries))
+    outcomes = await asyncio.gather(*(multi_search([q]) for q in queries), return_exceptions=True)
+    results: list[dict[str, Any] | SearchBackendError] = []
+    for outcome in outcomes:
+        if isinstance(outcome, SearchBackendError):
+            results.append(outcome)
+        elif isinstance(outcome, BaseException):
+            raise outcome
+        else:
+            results.append(outcome[0])
+    return results
+
+
+def _resolve(task: asyncio.Future, keys: list[str]) -> None:
+    """
+    Pubblica l'esito della multi-search sulle future delle query coinvolte e le rimuove da _inflight.
+    Errori della chiamata (5xx, rete, annullamento) vanno a tutte; un 400 solo alla query che l'ha causato.
+    """
+    if task.cancelled():
+        error: BaseException | None = SearchBackendError(502, "Ricerca annullata")
+    else:
+        error = task.exception()
+    for i, key in enumerate(keys):
+        fut = _inflight.pop(key)
+        if error is not None:
+            fut.set_exception(error)
+        elif isinstance(task.result()[i], SearchBackendError):
+            fut.set_exception(task.result()[i])
+        else:
+            fut.set_result(task.result()[i])
+        # Evita il warning "exception never retrieved" se nessuno è rimasto in attesa.
+        fut.add_done_callback(lambda f: f.cancelled() or f.exception())
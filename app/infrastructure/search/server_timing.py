@@ -0,0 +1,75 @@
+"""
+Header Server-Timing delle risposte: scomposizione della latenza visibile dai devtools del browser
+(Network → Timing) e nei log delle richieste lente.
+
+Il middleware in main.py apre un ServerTiming per richiesta (contextvar); route e searcher aggiungono le fasi:
+  cache     – lookup nella cache in-process (desc hit/miss, solo /api/sets)
+  upstream  – attesa dei risultati Meilisearch: rete, coda e processing (desc: query condivise dal single-flight)
+  meili     – processingTimeMs riportato da Meilisearch (somma delle query della multi-search)
+  serialize – serializzazione JSON della risposta
+  total     – tempo nel servizio fino agli header della risposta (aggiunto dal middleware)
+upstream - meili è il costo di rete e coda verso Meilisearch, total - upstream quello del servizio.
+Fuori da una richiesta (reindex, CDC, script) record() e measure() non fanno nulla.
+"""
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator
+
+_current: ContextVar["ServerTiming | None"] = ContextVar("server_timing", default=None)
+
+
+class ServerTiming:
+    """Fasi di una richiesta in millisecondi, nell'ordine in cui sono state registrate (ripetute = sommate)."""
+
+    def __init__(self) -> None:
+        self.started = time.perf_counter()
+        self._entries: dict[str, float] = {}
+        self._descriptions: dict[str, str] = {}
+
+    def add(self, name: str, ms: float, desc: str | None = None) -> None:
+        self._entries[name] = self._entries.get(name, 0.0) + ms
+        if desc:
+            self._descriptions[name] = desc
+
+    def elapsed_ms(self) -> float:
+        return (time.perf_counter() - self.started) * 1000
+
+    def as_dict(self) -> dict[str, float]:
+        return {name: round(ms, 2) for name, ms in self._entries.items()}
+
+    def header(self) -> str:
+        parts = []
+        for name, ms in self._entries.items():
+            part = f"{name};dur={ms:.2f}"
+            if name in self._descriptions:
+                part += f';desc="{self._descriptions[name]}"'
+            parts.append(part)
+        return ", ".join(parts)
+
+
+def start() -> ServerTiming:
+    """Nuovo ServerTiming corrente (una richiesta). I task figli lo vedono: il contesto è copiato, l'oggetto condiviso."""
+    timing = ServerTiming()
+    _current.set(timing)
+    return timing
+
+
+def current() -> ServerTiming | None:
+    return _current.get()
+
+
+def record(name: str, ms: float, desc: str | None = None) -> None:
+    timing = _current.get()
+    if timing is not None:
+        timing.add(name, ms, desc)
+
+
+@contextmanager
+def measure(name: str, desc: str | None = None) -> Iterator[None]:
+    """Registra la durata del blocco come fase name (anche se solleva)."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(name, (time.perf_counter() - started) * 1000, desc)
@@ -0,0 +1,389 @@
+"""
+Cattura delle query SQL di un run (reindex.py --sql-profile, POST /api/admin/reindex?sql_profile=true).
+Le connessioni di _get_mysql_connection() usano ProfilingCursor: durante capture_sql() ogni execute viene
+misurato (tempo, righe restituite, righe esaminate stimate dai contatori Handler_read_* della sessione) e,
+alla prima esecuzione di ogni statement, ne viene letto il piano con EXPLAIN.
+I piani con full scan, filesort, tabelle temporanee o join senza indice vengono segnalati con l'indice
+suggerito (euristica sulle colonne di JOIN, WHERE e ORDER BY della tabella). A fine run si controllano anche
+gli indici che le query dell'indexer e degli script di manutenzione danno per scontati (REQUIRED_INDEXES).
+Artefatti in INDEXER_STATE_DIR/profiles accanto a quelli di profiling.py: <run>.sql.txt e <run>.sql.json.
+Le query di misura e gli EXPLAIN girano sulla stessa connessione: i tempi "query+fetch" di StageTimings ne includono il costo.
+"""
+import json
+import logging
+import re
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Any, Iterator
+
+import pymysql
+import pymysql.cursors
+
+from app.infrastructure.search.profiling import profiles_dir, prune_profiles
+
+logger = logging.getLogger(__name__)
+
+# Sopra questa durata (max tra le esecuzioni) uno statement è "lento" nel report e nei log.
+SLOW_QUERY_MS = 100.0
+# Full scan segnalati solo da questa stima di righe (EXPLAIN rows): games, sets & co. si leggono interi.
+SCAN_ROWS_THRESHOLD = 1000
+_TOP_STATEMENTS = 30
+_EXPLAINABLE = ("SELECT", "UPDATE", "DELETE")
+
+# Indici su cui contano le JOIN dell'indexer, il fan-out degli aggiornamenti mirati e i lookup degli
+# script di manutenzione: (tabella, colonne, chi li usa). Basta un indice che li abbia come prefisso.
+REQUIRED_INDEXES: tuple[tuple[str, tuple[str, ...], str], ...] = (
+    ("cards_prints", ("oracle_id",), "JOIN cards (mtg), fan-out di card_translations"),
+    ("cards_prints", ("set_id",), "JOIN sets (mtg), reindex per set"),
+    ("cards", ("oracle_id",), "JOIN cards (mtg)"),
+    ("sets", ("game_id",), "JOIN games (tutte le sorgenti), reindex per gioco"),
+    ("sets", ("cardtrader_id",), "lookup degli script sui set (backfill_set_metadata, match_and_update_sets)"),
+    ("op_prints", ("card_id",), "JOIN op_cards (op)"),
+    ("op_prints", ("set_id",), "JOIN sets (op)"),
+    ("op_cards", ("card_id",), "JOIN op_cards (op)"),
+    ("pk_prints", ("card_id",), "JOIN pk_cards (pk)"),
+    ("pk_prints", ("set_id",), "JOIN sets (pk)"),
+    ("pk_cards", ("card_id",), "JOIN pk_cards (pk)"),
+    ("sealed_products", ("set_id",), "JOIN sets (sealed)"),
+    ("card_translations", ("game_slug", "entity_id"), "traduzioni per gioco, reindex parziale e CDC"),
+    ("set_translations", ("set_id",), "nomi localizzati dei set"),
+)
+
+_IN_LIST = re.compile(r"IN \((?:%s, )*%s\)", re.IGNORECASE)
+_TABLE_ALIAS = re.compile(
+    r"\b(?:FROM|JOIN|UPDATE)\s+(\w+)(?:\s+(?:AS\s+)?(?!(?:WHERE|INNER|LEFT|JOIN|ON|ORDER|LIMIT|SET)\b)(\w+))?",
+    re.IGNORECASE,
+)
+_JOIN_EQ = re.compile(r"\b(\w+)\.(\w+)\s*=\s*(\w+)\.(\w+)")
+_FILTER = re.compile(r"(?:\b(\w+)\.)?\b(\w+)\s*(=|IN\b|>=?|<=?)\s*(?:%s|\()", re.IGNORECASE)
+_ORDER_BY = re.compile(r"\bORDER BY\s+(?:(\w+)\.)?(\w+)", re.IGNORECASE)
+
+_recorder: "_Recorder | None" = None
+
+
+def normalize(sql: str) -> str:
+    """Statement su una riga, con le liste IN (%s, ...) accorpate: stessa forma = stessa voce del report."""
+    return _IN_LIST.sub("IN (...)", " ".join(sql.split()))
+
+
+def _handler_reads(conn: pymysql.Connection) -> int:
+    """Somma dei contatori Handler_read_* della sessione: righe lette dallo storage engine (stima delle esaminate)."""
+    with conn.cursor(pymysql.cursors.Cursor) as cur:
+        cur.execute("SHOW SESSION STATUS LIKE 'Handler_read%'")
+        return sum(int(value) for _, value in cur.fetchall())
+
+
+class ProfilingCursor(pymysql.cursors.DictCursor):
+    """DictCursor; durante capture_sql() misura ogni execute e registra piano e righe esaminate."""
+
+    def execute(self, query: str, args: Any = None) -> int:
+        recorder = _recorder
+        if recorder is None:
+            return super().execute(query, args)
+        before = _handler_reads(self.connection)
+        started = time.perf_counter()
+        result = super().execute(query, args)
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        examined = _handler_reads(self.connection) - before
+        recorder.record(self.connection, query, args, elapsed_ms, max(self.rowcount, 0), examined)
+        return result
+
+
+def _aliases(sql: str) -> dict[str, str]:
+    """alias (o nome) -> tabella, dalle clausole FROM / JOIN."""
+    out = {}
+    for table, alias in _TABLE_ALIAS.findall(sql):
+        out[alias or table] = table
+        out[table] = table
+    return out
+
+
+def _candidate_columns(
+    sql: str,
+    alias: str,
+    preceding: set[str],
+    single_table: bool,
+    with_order: bool,
+) -> list[str]:
+    """
+    Colonne di un indice utile per la tabella alias: uguaglianze (WHERE e JOIN con le tabelle che la
+    precedono nel piano, preceding: sono quelle da cui arrivano i valori), poi range o ORDER BY.
+    """
+    equality: list[str] = []
+    ranges: list[str] = []
+    for left_alias, left_col, right_alias, right_col in _JOIN_EQ.findall(sql):
+        if left_alias == alias and right_alias in preceding:
+            equality.append(left_col)
+        elif right_alias == alias and left_alias in preceding:
+            equality.append(right_col)
+    where = sql.partition(" WHERE ")[2]
+    for col_alias, column, op in _FILTER.findall(where):
+        if col_alias == alias or (not col_alias and single_table):
+            (equality if op.upper() in ("=", "IN") else ranges).append(column)
+    order = _ORDER_BY.search(sql)
+    if with_order and order and (order.group(1) == alias or (not order.group(1) and single_table)):
+        ranges.insert(0, order.group(2))
+    columns: list[str] = []
+    for column in equality + ranges[:1]:
+        if column not in columns:
+            columns.append(column)
+    return columns
+
+
+def _covering_index(indexes: dict[str, list[str]], columns: list[str]) -> str | None:
+    """Nome di un indice che ha columns (o almeno la prima) come prefisso, se esiste."""
+    for name, indexed in indexes.items():
+        if indexed[: len(columns)] == columns:
+            return name
+    for name, indexed in indexes.items():
+        if indexed[:1] == columns[:1]:
+            return name
+    return None
+
+
+def analyze_plan(
+    sql: str,
+    plan: list[dict[str, Any]],
+    indexes: dict[str, dict[str, list[str]]],
+) -> list[dict[str, Any]]:
+    """
+    Problemi nel piano di EXPLAIN (una riga per tabella): full scan su tabelle non piccole, full index scan
+    (tranne la scansione ordinata della PRIMARY della paginazione keyset), filesort, tabelle temporanee, join buffer.
+    indexes: tabella -> {nome indice: colonne}. Ogni problema ha suggestion (CREATE INDEX) o la nota sull'indice esistente.
+    """
+    aliases = _aliases(sql)
+    single_table = len(set(aliases.values())) == 1
+    findings = []
+    preceding: set[str] = set()
+    for row in plan:
+        alias = row.get("table") or ""
+        table = aliases.get(alias)
+        if table is None:  # <derived2>, <union1,2>, ...
+            continue
+        preceding.add(alias)
+        access, key, extra = row.get("type"), row.get("key"), row.get("Extra") or ""
+        rows = int(row.get("rows") or 0)
+        problems = []
+        if access == "ALL" and rows >= SCAN_ROWS_THRESHOLD:
+            problems.append("full table scan")
+        if access == "index" and key != "PRIMARY" and rows >= SCAN_ROWS_THRESHOLD:
+            problems.append("full index scan")
+        if "Using join buffer" in extra:
+            problems.append("join senza indice (join buffer)")
+        if "Using filesort" in extra:
+            problems.append("filesort")
+        if "Using temporary" in extra:
+            problems.append("tabella temporanea")
+        if not problems:
+            continue
+        finding: dict[str, Any] = {"table": table, "alias": alias, "type": access, "key": key, "rows": rows, "problems": problems}
+        order = _ORDER_BY.search(sql)
+        order_alias = order.group(1) if order else None
+        scan = any(p in problems for p in ("full table scan", "full index scan", "join senza indice (join buffer)"))
+        if not scan and order and not single_table and order_alias != alias:
+            # Filesort segnalato sulla prima tabella del join: l'ordinamento riguarda un'altra tabella.
+            finding["note"] = (
+                f"il join parte da {table} e ordina tutto il risultato per {order_alias}.{order.group(2)}: "
+                f"controllare gli indici di JOIN di {aliases.get(order_alias, order_alias)} (indici richiesti)"
+            )
+            findings.append(finding)
+            continue
+        columns = _candidate_columns(sql, alias, preceding - {alias}, single_table, with_order="filesort" in problems)
+        existing = _covering_index(indexes.get(table, {}), columns) if columns else None
+        if not columns:
+            finding["note"] = "nessuna colonna filtrata o in JOIN su questa tabella: piano da rivedere a mano"
+        elif existing and existing == key:
+            finding["note"] = f"usa {existing} ma legge ~{rows} righe: filtro poco selettivo"
+        elif existing:
+            finding["note"] = (
+                f"l'indice {existing} esiste ma non è usato: statistiche vecchie (ANALYZE TABLE {table}) "
+                "o colonna poco selettiva"
+            )
+        else:
+            finding["suggestion"] = f"CREATE INDEX idx_{table}_{'_'.join(columns)} ON {table} ({', '.join(columns)})"
+        findings.append(finding)
+    return findings
+
+
+def _load_indexes(conn: pymysql.Connection, tables: list[str]) -> dict[str, dict[str, list[str]]]:
+    """tabella -> {nome indice: colonne in ordine}, da information_schema dello schema corrente."""
+    if not tables:
+        return {}
+    out: dict[str, dict[str, list[str]]] = {}
+    with conn.cursor(pymysql.cursors.DictCursor) as cur:
+        cur.execute(
+            "SELECT TABLE_NAME AS t, INDEX_NAME AS i, COLUMN_NAME AS c FROM information_schema.STATISTICS"
+            f" WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME IN ({', '.join(['%s'] * len(tables))})"
+            " ORDER BY TABLE_NAME, INDEX_NAME, SEQ_IN_INDEX",
+            tables,
+        )
+        for row in cur.fetchall():
+            out.setdefault(row["t"], {}).setdefault(row["i"], []).append(row["c"])
+    return out
+
+
+def check_required_indexes(conn: pymysql.Connection) -> list[dict[str, Any]]:
+    """REQUIRED_INDEXES assenti (tabelle esistenti senza un indice con quelle colonne come prefisso), con CREATE INDEX."""
+    tables = sorted({table for table, _, _ in REQUIRED_INDEXES})
+    indexes = _load_indexes(conn, tables)
+    missing = []
+    for table, columns, used_by in REQUIRED_INDEXES:
+        if table not in indexes:  # tabella assente (es. set_translations non ancora creata)
+            continue
+        if any(indexed[: len(columns)] == list(columns) for indexed in indexes[table].values()):
+            continue
+        missing.append({
+            "table": table,
+            "columns": list(columns),
+            "used_by": used_by,
+            "suggestion": f"CREATE INDEX idx_{table}_{'_'.join(columns)} ON {table} ({', '.join(columns)})",
+        })
+    return missing
+
+
+class _Recorder:
+    """Statistiche per statement normalizzato, condivise tra i thread delle partizioni."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.statements: dict[str, dict[str, Any]] = {}
+        self._indexes: dict[str, dict[str, list[str]]] = {}
+
+    def record(
+        self,
+        conn: pymysql.Connection,
+        query: str,
+        args: Any,
+        elapsed_ms: float,
+        rows: int,
+        examined: int,
+    ) -> None:
+        key = normalize(query)
+        with self._lock:
+            entry = self.statements.get(key)
+            first = entry is None
+            if first:
+                entry = self.statements[key] = {
+                    "statement": key, "calls": 0, "total_ms": 0.0, "max_ms": 0.0,
+                    "rows": 0, "rows_examined": 0, "slowest_args": None, "plan": None, "findings": [],
+                }
+            entry["calls"] += 1
+            entry["total_ms"] += elapsed_ms
+            entry["rows"] += rows
+            entry["rows_examined"] += examined
+            if elapsed_ms >= entry["max_ms"]:
+                entry["max_ms"] = elapsed_ms
+                entry["slowest_args"] = repr(args)[:300] if args else None
+        if first and key.split(" ", 1)[0].upper() in _EXPLAINABLE:
+            self._explain(conn, query, args, entry)
+
+    def _explain(self, conn: pymysql.Connection, query: str, args: Any, entry: dict[str, Any]) -> None:
+        try:
+            with conn.cursor(pymysql.cursors.DictCursor) as cur:
+                cur.execute("EXPLAIN " + query, args)
+                plan = list(cur.fetchall())
+            tables = sorted(set(_aliases(normalize(query)).values()) - set(self._indexes))
+            if tables:
+                loaded = _load_indexes(conn, tables)
+                with self._lock:
+                    self._indexes.update({table: loaded.get(table, {}) for table in tables})
+        except pymysql.MySQLError as e:
+            logger.warning("EXPLAIN failed for %s: %s", entry["statement"][:200], e)
+            return
+        entry["plan"] = plan
+        entry["findings"] = analyze_plan(entry["statement"], plan, self._indexes)
+
+
+def _report_text(statements: list[dict[str, Any]], missing: list[dict[str, Any]] | None) -> str:
+    total_ms = sum(s["total_ms"] for s in statements)
+    lines = [
+        f"Statement distinti: {len(statements)} | esecuzioni: {sum(s['calls'] for s in statements)}"
+        f" | tempo in MySQL: {total_ms / 1000:.2f} s",
+        "",
+    ]
+    if missing is None:
+        lines.append("Indici richiesti: controllo non riuscito (vedi log)")
+    elif missing:
+        lines.append("Indici richiesti mancanti:")
+        lines += [f"  {m['suggestion']};  -- {m['used_by']}" for m in missing]
+    else:
+        lines.append("Indici richiesti: tutti presenti")
+    flagged = [s for s in statements if s["findings"]]
+    lines += ["", f"Statement con piano da rivedere: {len(flagged)}"]
+    for s in flagged:
+        lines.append(f"  {s['statement'][:300]}")
+        for f in s["findings"]:
+            lines.append(f"    {f['table']} ({f['alias']}): {', '.join(f['problems'])}, ~{f['rows']} righe stimate")
+            lines.append(f"      -> {f.get('suggestion') or f.get('note')}")
+    lines += ["", f"Top {_TOP_STATEMENTS} statement per tempo totale:"]
+    lines.append(f"  {'calls':>7} {'total ms':>10} {'max ms':>9} {'rows':>10} {'examined':>11}  statement")
+    for s in statements[:_TOP_STATEMENTS]:
+        slow = " [LENTO]" if s["max_ms"] >= SLOW_QUERY_MS else ""
+        lines.append(
+            f"  {s['calls']:>7} {s['total_ms']:>10.1f} {s['max_ms']:>9.1f} {s['rows']:>10} {s['rows_examined']:>11}"
+            f"  {s['statement'][:200]}{slow}"
+        )
+        for row in s["plan"] or []:
+            lines.append(
+                f"{'':>52}{row.get('table')}: type={row.get('type')} key={row.get('key')}"
+                f" rows={row.get('rows')} {row.get('Extra') or ''}".rstrip()
+            )
+    return "\n".join(lines) + "\n"
+
+
+def _required_indexes_or_none() -> list[dict[str, Any]] | None:
+    # Import locale: indexer importa questo modulo per ProfilingCursor.
+    from app.infrastructure.search.indexer import _get_mysql_connection
+
+    try:
+        conn = _get_mysql_connection()
+        try:
+            return check_required_indexes(conn)
+        finally:
+            conn.close()
+    except pymysql.MySQLError as e:
+        logger.warning("Could not check required indexes: %s", e)
+        return None
+
+
+@contextmanager
+def capture_sql(label: str) -> Iterator[list[str]]:
+    """
+    Registra le query del blocco (tutti i thread del processo). La lista restituita contiene i nomi
+    degli artefatti dopo l'uscita dal blocco (anche se il blocco solleva).
+    """
+    global _recorder
+    prefix = f"{datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%SZ')}-{label}"
+    artifacts: list[str] = []
+    recorder = _recorder = _Recorder()
+    try:
+        yield artifacts
+    finally:
+        _recorder = None
+        statements = sorted(recorder.statements.values(), key=lambda s: s["total_ms"], reverse=True)
+        for s in statements:
+            s["total_ms"], s["max_ms"] = round(s["total_ms"], 2), round(s["max_ms"], 2)
+            if s["findings"] or s["max_ms"] >= SLOW_QUERY_MS:
+                logger.warning(
+                    "SQL %s: %d calls, max %.0f ms, %s",
+                    s["statement"][:200], s["calls"], s["max_ms"],
+                    "; ".join(f.get("suggestion") or ", ".join(f["problems"]) for f in s["findings"]) or "lento",
+                )
+        missing = _required_indexes_or_none()
+        for m in missing or []:
+            logger.warning("Missing index on %s(%s): %s", m["table"], ", ".join(m["columns"]), m["used_by"])
+        try:
+            directory = profiles_dir()
+            directory.mkdir(parents=True, exist_ok=True)
+            (directory / f"{prefix}.sql.txt").write_text(_report_text(statements, missing), encoding="utf-8")
+            (directory / f"{prefix}.sql.json").write_text(
+                json.dumps({"statements": statements, "missing_indexes": missing}, ensure_ascii=False, indent=1, default=str),
+                encoding="utf-8",
+            )
+            artifacts += [f"{prefix}.sql.txt", f"{prefix}.sql.json"]
+            prune_profiles()
+            logger.info("SQL profile written to %s: %s", directory, artifacts)
+        except OSError:
+            logger.exception("Failed to write SQL profile artifacts")
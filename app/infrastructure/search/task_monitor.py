@@ -0,0 +1,251 @@
+"""
+Monitor dei task Meilisearch dei nostri indici (carte e set): coda (enqueued/processing, età del più vecchio,
+documenti in attesa), task falliti e durate dei task recenti con documenti indicizzati al secondo.
+summarize_tasks() è usata da GET /api/admin/tasks; il poller (TASK_MONITOR_INTERVAL_SECONDS) la esegue
+periodicamente in un solo processo (lock su INDEXER_STATE_DIR/task_monitor.lock), aggiorna le metriche
+Prometheus e logga un warning quando la coda o i fallimenti superano le soglie TASK_MONITOR_*.
+"""
+import asyncio
+import logging
+import re
+import time
+from datetime import datetime, timedelta, timezone
+from typing import IO, Any
+
+import httpx
+
+from app.core.config import get_settings
+from app.infrastructure.search.metrics import (
+    MEILISEARCH_INDEXING_DOCS_PER_SECOND,
+    MEILISEARCH_OLDEST_TASK_AGE_SECONDS,
+    MEILISEARCH_TASKS,
+    observe_meilisearch,
+)
+from app.infrastructure.search.scheduler import try_lock
+from app.infrastructure.search.searcher import SearchBackendError, get_http_client
+
+logger = logging.getLogger(__name__)
+
+# Task letti al massimo per interrogazione (pagine da 1000): una coda più lunga è già un allarme.
+MAX_TASKS = 5000
+# Task più lenti e fallimenti più recenti riportati nel dettaglio.
+TOP_TASKS = 5
+
+_DURATION = re.compile(r"P(?:(?P<d>\d+)D)?(?:T(?:(?P<h>\d+)H)?(?:(?P<m>\d+)M)?(?:(?P<s>[\d.]+)S)?)?")
+
+
+def _parse_duration(value: str | None) -> float | None:
+    """Durata ISO 8601 di Meilisearch (es. PT1.25S, PT2M3.1S) in secondi."""
+    match = _DURATION.fullmatch(value or "")
+    if not value or not match:
+        return None
+    d, h, m, s = (match.group(k) for k in ("d", "h", "m", "s"))
+    return int(d or 0) * 86400 + int(h or 0) * 3600 + int(m or 0) * 60 + float(s or 0)
+
+
+def _parse_time(value: str | None) -> datetime | None:
+    return datetime.fromisoformat(value.replace("Z", "+00:00")) if value else None
+
+
+def _iso(value: datetime) -> str:
+    return value.isoformat(timespec="seconds")
+
+
+def _index_uids() -> list[str]:
+    settings = get_settings()
+    return [settings.MEILISEARCH_INDEX_NAME, settings.MEILISEARCH_SETS_INDEX_NAME]
+
+
+async def _list_tasks(params: dict[str, Any]) -> tuple[list[dict[str, Any]], int]:
+    """GET /tasks filtrato sui nostri indici, seguendo il cursore next fino a MAX_TASKS. Ritorna (task, totale)."""
+    query = {"indexUids": ",".join(_index_uids()), "limit": 1000, **params}
+    tasks: list[dict[str, Any]] = []
+    while True:
+        started = time.perf_counter()
+        try:
+            response = await get_http_client().get("/tasks", params=query)
+        except httpx.HTTPError as e:
+            observe_meilisearch("tasks", started, None)
+            raise SearchBackendError(502, "Meilisearch non raggiungibile") from e
+        observe_meilisearch("tasks", started, response.status_code)
+        if response.status_code >= 400:
+            logger.warning("Meilisearch tasks error %d: %s", response.status_code, response.text[:500])
+            raise SearchBackendError(502, "Errore da Meilisearch")
+        body = response.json()
+        tasks.extend(body["results"])
+        if body.get("next") is None or len(tasks) >= MAX_TASKS:
+            return tasks, body.get("total", len(tasks))
+        query["from"] = body["next"]
+
+
+def _task_summary(task: dict[str, Any]) -> dict[str, Any]:
+    details = task.get("details") or {}
+    out = {
+        "uid": task["uid"],
+        "index": task.get("indexUid"),
+        "type": task.get("type"),
+        "enqueued_at": task.get("enqueuedAt"),
+        "finished_at": task.get("finishedAt"),
+        "duration_seconds": _parse_duration(task.get("duration")),
+        "documents": details.get("indexedDocuments", details.get("receivedDocuments")),
+    }
+    if task.get("error"):
+        out["error"] = task["error"].get("message")
+    return out
+
+
+def _percentile(values: list[float], pct: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(int(len(ordered) * pct / 100), len(ordered) - 1)]
+
+
+async def summarize_tasks(window_seconds: float | None = None) -> dict[str, Any]:
+    """
+    Stato della coda e task degli ultimi window_seconds (default TASK_MONITOR_WINDOW_SECONDS):
+    backlog, falliti, durate e documenti al secondo dei task di indicizzazione riusciti, alert sulle soglie.
+    SearchBackendError se Meilisearch non risponde.
+    """
+    settings = get_settings()
+    window = window_seconds or settings.TASK_MONITOR_WINDOW_SECONDS
+    now = datetime.now(timezone.utc)
+    since = _iso(now - timedelta(seconds=window))
+    (pending, pending_total), (failed, failed_total), (done, done_total) = await asyncio.gather(
+        _list_tasks({"statuses": "enqueued,processing"}),
+        _list_tasks({"statuses": "failed", "afterFinishedAt": since}),
+        _list_tasks({"statuses": "succeeded", "types": "documentAdditionOrUpdate", "afterFinishedAt": since}),
+    )
+
+    enqueued = [t for t in pending if t["status"] == "enqueued"]
+    oldest = min((_parse_time(t["enqueuedAt"]) for t in enqueued), default=None)
+    processing = len(pending) - len(enqueued)
+    backlog = {
+        "enqueued": pending_total - processing,
+        "processing": processing,
+        # Oltre MAX_TASKS si leggono i task più recenti: età del più vecchio e documenti sono per difetto.
+        "truncated": pending_total > len(pending),
+        "documents": sum((t.get("details") or {}).get("receivedDocuments") or 0 for t in pending),
+        "oldest_enqueued_at": _iso(oldest) if oldest else None,
+        "oldest_enqueued_age_seconds": round((now - oldest).total_seconds(), 1) if oldest else 0.0,
+    }
+
+    durations = [d for d in (_parse_duration(t.get("duration")) for t in done) if d is not None]
+    documents = sum((t.get("details") or {}).get("indexedDocuments") or 0 for t in done)
+    busy = sum(durations)
+    recent = {
+        "succeeded": done_total,
+        "failed": failed_total,
+        "documents": documents,
+        # Throughput di Meilisearch mentre elabora (non diluito dai momenti di coda vuota).
+        "docs_per_sec": round(documents / busy, 1) if busy else None,
+        "duration_seconds": {
+            "p50": round(_percentile(durations, 50), 3),
+            "p95": round(_percentile(durations, 95), 3),
+            "max": round(max(durations), 3),
+        } if durations else None,
+        "slowest": [
+            _task_summary(t)
+            for t in sorted(done, key=lambda t: _parse_duration(t.get("duration")) or 0.0, reverse=True)[:TOP_TASKS]
+        ],
+    }
+
+    alerts = []
+    if backlog["enqueued"] > settings.TASK_MONITOR_MAX_ENQUEUED:
+        alerts.append(f"{backlog['enqueued']} task in coda (soglia {settings.TASK_MONITOR_MAX_ENQUEUED})")
+    if backlog["oldest_enqueued_age_seconds"] > settings.TASK_MONITOR_MAX_ENQUEUED_AGE_SECONDS:
+        alerts.append(
+            f"task più vecchio in coda da {backlog['oldest_enqueued_age_seconds']:.0f}s "
+            f"(soglia {settings.TASK_MONITOR_MAX_ENQUEUED_AGE_SECONDS:.0f}s)"
+        )
+    if failed_total > settings.TASK_MONITOR_MAX_FAILED:
+        alerts.append(f"{failed_total} task falliti negli ultimi {window:.0f}s (soglia {settings.TASK_MONITOR_MAX_FAILED})")
+
+    return {
+        "indexes": _index_uids(),
+        "checked_at": _iso(now),
+        "window_seconds": window,
+        "backlog": backlog,
+        "recent": recent,
+        "failed": [_task_summary(t) for t in failed[:TOP_TASKS]],
+        "alerts": alerts,
+    }
+
+
+class TaskMonitor:
+    """Poller del task monitor: ultimo riepilogo in memoria (GET /api/admin/tasks), metriche e warning nei log."""
+
+    def __init__(self) -> None:
+        self._task: asyncio.Task | None = None
+        self._lock_file: IO | None = None
+        self.last: dict[str, Any] | None = None
+        self.last_error: str | None = None
+        self._logged_failed_uid = -1  # i task falliti restano nella finestra: ognuno è loggato una volta
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None
+
+    def start(self) -> None:
+        if get_settings().TASK_MONITOR_INTERVAL_SECONDS <= 0:
+            return
+        self._lock_file = try_lock("task_monitor.lock")
+        if self._lock_file is None:
+            logger.info("Task monitor: another process holds the monitor lock, not polling here")
+            return
+        self._task = asyncio.create_task(self._loop(), name="task-monitor")
+        logger.info("Meilisearch task monitor started")
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._lock_file is not None:
+            self._lock_file.close()
+            self._lock_file = None
+
+    async def _loop(self) -> None:
+        while True:
+            try:
+                await self.poll()
+            except Exception as e:
+                # Un errore inatteso (risposta malformata, bug) non deve fermare il monitor in silenzio.
+                logger.exception("Task monitor poll failed")
+                self.last_error = str(e) or type(e).__name__
+            await asyncio.sleep(get_settings().TASK_MONITOR_INTERVAL_SECONDS)
+
+    async def poll(self) -> None:
+        try:
+            summary = await summarize_tasks()
+        except SearchBackendError as e:
+            self.last_error = e.detail
+            logger.warning("Task monitor: %s", e.detail)
+            return
+        self.last, self.last_error = summary, None
+        backlog, recent = summary["backlog"], summary["recent"]
+        MEILISEARCH_TASKS.labels("enqueued").set(backlog["enqueued"])
+        MEILISEARCH_TASKS.labels("processing").set(backlog["processing"])
+        MEILISEARCH_TASKS.labels("failed").set(recent["failed"])
+        MEILISEARCH_OLDEST_TASK_AGE_SECONDS.set(backlog["oldest_enqueued_age_seconds"])
+        MEILISEARCH_INDEXING_DOCS_PER_SECOND.set(recent["docs_per_sec"] or 0.0)
+        for alert in summary["alerts"]:
+            logger.warning("Meilisearch task backlog: %s", alert)
+        for task in summary["failed"]:
+            if task["uid"] > self._logged_failed_uid:
+                logger.warning("Meilisearch task %s (%s, %s) failed: %s", task["uid"], task["index"], task["type"], task.get("error"))
+        self._logged_failed_uid = max([self._logged_failed_uid, *(t["uid"] for t in summary["failed"])])
+
+    def status(self) -> dict[str, Any]:
+        settings = get_settings()
+        return {
+            "enabled": settings.TASK_MONITOR_INTERVAL_SECONDS > 0,
+            "running": self.running,
+            "interval_seconds": settings.TASK_MONITOR_INTERVAL_SECONDS,
+            "last": self.last,
+            "last_error": self.last_error,
+        }
+
+
+task_monitor = TaskMonitor()
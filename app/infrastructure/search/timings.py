@@ -0,0 +1,61 @@
+"""
+Tempi per fase del reindex, per sorgente: query MySQL (execute + fetchall in una sola fase: il cursore
+è bufferizzato, execute() trasferisce già tutte le righe della pagina), caricamento del contesto
+(traduzioni), trasformazione riga → documento, serializzazione JSON, invio a Meilisearch, attesa del task.
+Con le partizioni parallele i tempi sono sommati tra i worker (possono superare il wall clock).
+Insieme al picco di memoria finiscono nel risultato di run_indexer() e nell'output di reindex.py.
+Con il tracing attivo ogni fase misurata è anche uno span (vedi tracing.py).
+"""
+import sys
+import time
+from contextlib import contextmanager
+from typing import Any, Iterator
+
+from app.infrastructure.search.tracing import span
+
+try:
+    import resource
+except ImportError:  # Windows (sviluppo locale): picco di memoria non disponibile
+    resource = None
+
+STAGES = ("query+fetch", "context", "transform", "serialize", "send", "task")
+# Nome dello span di ogni fase: il sistema coinvolto si legge direttamente nella traccia.
+_SPAN_NAMES = {
+    "query+fetch": "mysql.query",
+    "context": "indexer.context",
+    "transform": "indexer.transform",
+    "serialize": "indexer.serialize",
+    "send": "meilisearch.add_documents",
+    "task": "meilisearch.wait_for_task",
+}
+
+
+class StageTimings:
+    def __init__(self, source: str | None = None) -> None:
+        self.source = source
+        self.seconds: dict[str, float] = dict.fromkeys(STAGES, 0.0)
+
+    @contextmanager
+    def measure(self, stage: str, attributes: dict[str, Any] | None = None) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            with span(_SPAN_NAMES[stage], {"indexer.source": self.source, **(attributes or {})}):
+                yield
+        finally:
+            self.seconds[stage] += time.perf_counter() - started
+
+    def merge(self, other: "StageTimings") -> None:
+        for stage, seconds in other.seconds.items():
+            self.seconds[stage] += seconds
+
+    def to_dict(self) -> dict[str, float]:
+        return {stage: round(seconds, 3) for stage, seconds in self.seconds.items()}
+
+
+def peak_memory_mb() -> float | None:
+    """Picco di memoria residente (RSS) del processo, in MB."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss: kilobyte su Linux, byte su macOS
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
@@ -0,0 +1,106 @@
+"""
+Tracing OpenTelemetry (opzionale): uno span per richiesta HTTP, per job e run di reindex, per sorgente e
+partizione, e per ogni fase misurata da StageTimings (query MySQL con lettura delle righe, traduzioni, trasformazione,
+serializzazione, add_documents, attesa del task). Un run lento diventa una sola traccia con il percorso critico.
+
+TRACING_EXPORTER: vuoto = spento, "console" = span JSON su stdout, "otlp" = collector locale via OTLP/HTTP
+(TRACING_OTLP_ENDPOINT, richiede opentelemetry-exporter-otlp-proto-http).
+Spento, o senza i pacchetti opentelemetry, span() non fa nulla e il costo è trascurabile.
+Il reindex lanciato dall'API gira in un altro processo: il contesto passa come carrier W3C
+(inject_context() nel processo API, attach_context() nel worker).
+"""
+import logging
+from collections.abc import Mapping
+from contextlib import contextmanager
+from typing import Any, Iterator
+
+from app.core.config import get_settings
+
+try:
+    from opentelemetry import context as otel_context
+    from opentelemetry import propagate, trace
+except ImportError:  # opentelemetry-sdk non installato: tracing non disponibile
+    trace = None
+
+logger = logging.getLogger(__name__)
+
+_tracer: Any = None
+_provider: Any = None
+
+
+def setup_tracing(service_name: str | None = None) -> bool:
+    """Configura exporter e tracer del processo (una volta). Ritorna True se il tracing è attivo."""
+    global _tracer, _provider
+    if _tracer is not None:
+        return True
+    settings = get_settings()
+    exporter_name = settings.TRACING_EXPORTER.strip().lower()
+    if not exporter_name:
+        return False
+    if trace is None:
+        logger.warning("TRACING_EXPORTER=%s but opentelemetry-sdk is not installed, tracing disabled", exporter_name)
+        return False
+
+    from opentelemetry.sdk.resources import Resource
+    from opentelemetry.sdk.trace import TracerProvider
+    from opentelemetry.sdk.trace.export import BatchSpanProcessor, ConsoleSpanExporter
+
+    if exporter_name == "console":
+        exporter = ConsoleSpanExporter()
+    elif exporter_name == "otlp":
+        try:
+            from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+        except ImportError:
+            logger.warning("TRACING_EXPORTER=otlp needs opentelemetry-exporter-otlp-proto-http, tracing disabled")
+            return False
+        exporter = OTLPSpanExporter(endpoint=settings.TRACING_OTLP_ENDPOINT)
+    else:
+        logger.warning("Unknown TRACING_EXPORTER %r (console, otlp), tracing disabled", exporter_name)
+        return False
+
+    _provider = TracerProvider(resource=Resource.create({"service.name": service_name or settings.TRACING_SERVICE_NAME}))
+    _provider.add_span_processor(BatchSpanProcessor(exporter))
+    _tracer = _provider.get_tracer(__name__)
+    logger.info("Tracing enabled (%s exporter)", exporter_name)
+    return True
+
+
+def shutdown_tracing() -> None:
+    """Esporta gli span ancora in coda. Da chiamare prima che il processo esca (worker di reindex, shutdown API)."""
+    if _provider is not None:
+        _provider.force_flush()
+
+
+@contextmanager
+def span(name: str, attributes: dict[str, Any] | None = None) -> Iterator[Any]:
+    """
+    Span figlio di quello corrente (None se il tracing è spento). Le eccezioni vengono registrate
+    sullo span e rilanciate. Attributi None ignorati.
+    """
+    if _tracer is None:
+        yield None
+        return
+    attrs = {k: v for k, v in (attributes or {}).items() if v is not None}
+    with _tracer.start_as_current_span(name, attributes=attrs) as current:
+        yield current
+
+
+def inject_context() -> dict[str, str]:
+    """Contesto corrente come carrier W3C (traceparent), da passare a un altro thread o processo."""
+    carrier: dict[str, str] = {}
+    if _tracer is not None:
+        propagate.inject(carrier)
+    return carrier
+
+
+@contextmanager
+def attach_context(carrier: Mapping[str, str] | None) -> Iterator[None]:
+    """Rende corrente il contesto di inject_context() (o di header HTTP in ingresso): gli span aperti qui ne sono figli."""
+    if _tracer is None or not carrier:
+        yield
+        return
+    token = otel_context.attach(propagate.extract(carrier))
+    try:
+        yield
+    finally:
+        otel_context.detach(token)
@@ -0,0 +1,285 @@
+"""
+Aggiornamenti mirati dell'indice (push dal backend marketplace, CDC): niente reindex del catalogo.
+
+ChangeBatch raccoglie id da reindicizzare, cancellazioni, set e oracle_id modificati (fan-out
+sulle stampe) e patch parziali. ChangeCoalescer accoda le richieste, le accorpa in una finestra
+breve (PUSH_COALESCE_WINDOW_MS) e le applica con apply_changes(), che riusa index_scope()
+e quindi la stessa logica riga → documento del reindex.
+"""
+import asyncio
+import json
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Any
+
+import pymysql
+from meilisearch import Client
+
+from app.core.config import get_settings
+from app.infrastructure.search.indexer import (
+    _SOURCES,
+    ReindexScope,
+    _get_meilisearch_client,
+    _get_mysql_connection,
+    _indexable_ids,
+    index_scope,
+    parse_doc_id,
+)
+from app.infrastructure.search.tracing import span
+
+logger = logging.getLogger(__name__)
+
+# Tentativi per batch prima di scartarlo (errore loggato), con attesa crescente tra un tentativo e l'altro
+# (2, 4, 8, 16 s): copre un riavvio di Meilisearch o MySQL.
+MAX_FLUSH_ATTEMPTS = 5
+FLUSH_RETRY_BACKOFF_SECONDS = 2.0
+
+# Max oracle_id per query di fan-out.
+_FANOUT_CHUNK = 1000
+
+
+@dataclass
+class ChangeBatch:
+    upserts: set[str] = field(default_factory=set)  # id documento da rileggere da MySQL
+    deletes: set[str] = field(default_factory=set)  # id documento da rimuovere
+    set_ids: set[int] = field(default_factory=set)  # set modificati: set + tutte le sue stampe/prodotti
+    set_deletes: set[int] = field(default_factory=set)  # set rimossi: documento del set + sue stampe/prodotti
+    oracle_ids: set[str] = field(default_factory=set)  # traduzioni MTG modificate: tutte le stampe dell'oracle
+    patches: dict[str, dict[str, Any]] = field(default_factory=dict)  # id -> campi (update parziale)
+    attempts: int = 0
+
+    def __len__(self) -> int:
+        return (
+            len(self.upserts) + len(self.deletes) + len(self.set_ids) + len(self.set_deletes)
+            + len(self.oracle_ids) + len(self.patches)
+        )
+
+    def merge(self, other: "ChangeBatch") -> None:
+        """L'ultima operazione vince (tra invii separati): upsert dopo delete annulla la delete e viceversa."""
+        for doc_id in other.deletes:
+            self.upserts.discard(doc_id)
+            self.patches.pop(doc_id, None)
+        for doc_id in other.upserts:
+            self.deletes.discard(doc_id)
+        self.upserts |= other.upserts
+        self.deletes |= other.deletes
+        self.set_ids |= other.set_ids
+        self.set_deletes |= other.set_deletes
+        self.oracle_ids |= other.oracle_ids
+        for doc_id, fields in other.patches.items():
+            self.deletes.discard(doc_id)
+            self.patches.setdefault(doc_id, {}).update(fields)
+        self.attempts = max(self.attempts, other.attempts)
+
+    def summary(self) -> dict[str, int]:
+        return {
+            "upserts": len(self.upserts),
+            "deletes": len(self.deletes),
+            "set_ids": len(self.set_ids),
+            "set_deletes": len(self.set_deletes),
+            "oracle_ids": len(self.oracle_ids),
+            "patches": len(self.patches),
+        }
+
+
+def _mtg_doc_ids_for_oracles(conn: pymysql.Connection, oracle_ids: set[str]) -> set[str]:
+    """Fan-out di una modifica a card_translations: id documento di tutte le stampe MTG dell'oracle_id."""
+    doc_ids: set[str] = set()
+    ordered = sorted(oracle_ids)
+    with conn.cursor() as cur:
+        for i in range(0, len(ordered), _FANOUT_CHUNK):
+            chunk = ordered[i:i + _FANOUT_CHUNK]
+            cur.execute(
+                f"SELECT id FROM cards_prints WHERE oracle_id IN ({', '.join(['%s'] * len(chunk))})",
+                tuple(chunk),
+            )
+            doc_ids.update(f"mtg_{row['id']}" for row in cur.fetchall())
+    return doc_ids
+
+
+def _indexed_doc_ids(index: Any, doc_ids: set[str]) -> set[str]:
+    """Id già presenti nell'indice delle stampe (id è filterable)."""
+    found: set[str] = set()
+    ordered = sorted(doc_ids)
+    for i in range(0, len(ordered), _FANOUT_CHUNK):
+        chunk = ordered[i:i + _FANOUT_CHUNK]
+        result = index.get_documents({"filter": f"id IN {json.dumps(chunk)}", "fields": ["id"], "limit": len(chunk)})
+        found.update(str(doc.id) for doc in result.results)
+    return found
+
+
+def _delete_set_documents(index: Any, set_ids: set[int]) -> None:
+    """
+    Fan-out di un set rimosso sull'indice delle stampe: le righe cancellate in cascata (ON DELETE CASCADE)
+    non compaiono nel binlog, quindi stampe e prodotti del set si cancellano per filtro su set_id.
+    """
+    if "set_id" not in (index.get_filterable_attributes() or []):
+        logger.warning(
+            "set_id is not filterable yet (run a full reindex): documents of deleted sets %s stay in the index",
+            sorted(set_ids),
+        )
+        return
+    index.delete_documents(filter=f"set_id IN {json.dumps(sorted(set_ids))}")
+
+
+def _doc_ids_in_mysql(conn: pymysql.Connection, doc_ids: set[str]) -> set[str]:
+    """Id documento la cui riga esiste (ed è indicizzabile) in MySQL."""
+    by_source: dict[str, list[int]] = {}
+    for doc_id in doc_ids:
+        source, row_id = parse_doc_id(doc_id)
+        by_source.setdefault(source, []).append(row_id)
+    return {
+        f"{source}_{row_id}"
+        for source, ids in by_source.items()
+        for row_id in _indexable_ids(conn, _SOURCES[source], sorted(ids))
+    }
+
+
+def apply_changes(conn: pymysql.Connection, client: Client, batch: ChangeBatch) -> dict[str, int]:
+    """
+    Applica un batch: cancellazioni, upsert riletti da MySQL (con fan-out), poi patch parziali.
+    Una patch su un id non ancora indicizzato creerebbe un documento parziale (senza nome né immagine)
+    visibile nelle ricerche: quegli id vengono prima ricostruiti da MySQL, e patchati solo se la riga esiste.
+    """
+    with span("updates.apply", batch.summary()):
+        settings = get_settings()
+        index = client.index(settings.MEILISEARCH_INDEX_NAME)
+        counts: dict[str, int] = {"deleted": 0, "upserted": 0, "patched": 0}
+
+        if batch.deletes:
+            index.delete_documents(sorted(batch.deletes))
+            counts["deleted"] += len(batch.deletes)
+
+        patch_ids = set(batch.patches) - batch.deletes
+        unindexed = patch_ids - _indexed_doc_ids(index, patch_ids) if patch_ids else set()
+        upserts = set(batch.upserts) | unindexed
+        if batch.oracle_ids:
+            upserts |= _mtg_doc_ids_for_oracles(conn, batch.oracle_ids)
+        upserts -= batch.deletes
+        if upserts:
+            result = index_scope(conn, client, ReindexScope(doc_ids=sorted(upserts)))
+            counts["upserted"] += sum(v for k, v in result.items() if k not in ("deleted", "sets", "journaled"))
+            counts["deleted"] += result.get("deleted", 0)
+        if batch.set_ids:
+            result = index_scope(conn, client, ReindexScope(set_ids=sorted(batch.set_ids)))
+            counts["upserted"] += sum(v for k, v in result.items() if k not in ("deleted", "sets", "journaled"))
+        if batch.set_deletes:
+            client.index(settings.MEILISEARCH_SETS_INDEX_NAME).delete_documents(sorted(batch.set_deletes))
+            counts["deleted"] += len(batch.set_deletes)
+            _delete_set_documents(index, batch.set_deletes)
+
+        if unindexed:
+            absent = unindexed - _doc_ids_in_mysql(conn, unindexed)
+            if absent:
+                logger.info("Dropping patches for %d documents not in MySQL: %s", len(absent), sorted(absent)[:20])
+                patch_ids -= absent
+        if patch_ids:
+            # Accodata dopo gli upsert: Meilisearch applica i task in ordine, la patch va sul documento completo.
+            index.update_documents([{"id": doc_id, **batch.patches[doc_id]} for doc_id in sorted(patch_ids)])
+            counts["patched"] += len(patch_ids)
+        return counts
+
+
+class ChangeCoalescer:
+    """
+    Coda in memoria delle modifiche push. La prima modifica apre una finestra di
+    PUSH_COALESCE_WINDOW_MS: tutto ciò che arriva nel frattempo finisce nello stesso flush.
+    Se le modifiche in coda superano PUSH_MAX_PENDING il flush parte subito.
+    """
+
+    def __init__(self) -> None:
+        self._pending = ChangeBatch()
+        self._wakeup: asyncio.Event | None = None
+        self._task: asyncio.Task | None = None
+        self._conn: pymysql.Connection | None = None
+        self._client: Client | None = None
+        self.stats: dict[str, Any] = {
+            "flushes": 0,
+            "last_flush_at": None,
+            "last_flush": None,
+            "last_error": None,
+            "dropped_batches": 0,
+        }
+
+    @property
+    def pending(self) -> int:
+        return len(self._pending)
+
+    def submit(self, batch: ChangeBatch) -> None:
+        self._pending.merge(batch)
+        self._ensure_running()
+        self._wakeup.set()
+
+    def _ensure_running(self) -> None:
+        if self._task is None or self._task.done():
+            self._wakeup = asyncio.Event()
+            self._task = asyncio.create_task(self._loop(), name="push-coalescer")
+
+    async def stop(self) -> None:
+        """Flush finale e chiusura (lifespan dell'app)."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        if len(self._pending):
+            await self._flush(self._take(), final=True)
+        if self._conn is not None:
+            self._conn.close()
+
+    def _take(self) -> ChangeBatch:
+        batch, self._pending = self._pending, ChangeBatch()
+        return batch
+
+    async def _loop(self) -> None:
+        settings = get_settings()
+        while True:
+            await self._wakeup.wait()
+            self._wakeup.clear()
+            deadline = time.monotonic() + settings.PUSH_COALESCE_WINDOW_MS / 1000
+            while len(self._pending) < settings.PUSH_MAX_PENDING and time.monotonic() < deadline:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=deadline - time.monotonic())
+                    self._wakeup.clear()
+                except asyncio.TimeoutError:
+                    break
+            if len(self._pending):
+                await self._flush(self._take())
+
+    def _apply(self, batch: ChangeBatch) -> dict[str, int]:
+        """Gira in un thread: MySQL e client Meilisearch sono sincroni. Connessione riusata tra i flush."""
+        if self._conn is None:
+            self._conn = _get_mysql_connection()
+            self._client = _get_meilisearch_client()
+        self._conn.ping(reconnect=True)
+        return apply_changes(self._conn, self._client, batch)
+
+    async def _flush(self, batch: ChangeBatch, final: bool = False) -> None:
+        """final: flush di chiusura, niente nuovi tentativi."""
+        try:
+            counts = await asyncio.to_thread(self._apply, batch)
+        except Exception as e:
+            batch.attempts += 1
+            self.stats["last_error"] = str(e)
+            if batch.attempts < MAX_FLUSH_ATTEMPTS and not final:
+                delay = FLUSH_RETRY_BACKOFF_SECONDS * 2 ** (batch.attempts - 1)
+                logger.warning("Push flush failed (attempt %d), retrying in %.0fs: %s", batch.attempts, delay, e)
+                # Rimette in coda sotto le modifiche arrivate nel frattempo (più recenti). In coda già durante
+                # l'attesa: se il servizio si ferma, stop() lo include nel flush finale.
+                batch.merge(self._pending)
+                self._pending = batch
+                await asyncio.sleep(delay)
+                self._wakeup.set()
+            else:
+                logger.error("Push flush dropped after %d attempts: %s (%s)", batch.attempts, batch.summary(), e)
+                self.stats["dropped_batches"] += 1
+            return
+        self.stats["flushes"] += 1
+        self.stats["last_flush_at"] = time.time()
+        self.stats["last_flush"] = {"batch": batch.summary(), "result": counts}
+        logger.info("Push flush: %s -> %s", batch.summary(), counts)
+
+
+coalescer = ChangeCoalescer()
@@ -0,0 +1,35 @@
+"""
+Watermark per sorgente: id massimo della tabella principale già coperto dall'ultimo run riuscito
+(totale o incrementale). Il sync incrementale indicizza solo le righe con id > watermark.
+Salvati in INDEXER_STATE_DIR/watermarks.json, condiviso tra API, worker e reindex.py.
+"""
+import json
+import os
+from pathlib import Path
+
+from app.core.config import get_settings
+
+WATERMARKS_FILENAME = "watermarks.json"
+
+
+def _watermarks_path() -> Path:
+    return Path(get_settings().INDEXER_STATE_DIR) / WATERMARKS_FILENAME
+
+
+def load_watermarks() -> dict[str, int]:
+    try:
+        return json.loads(_watermarks_path().read_text(encoding="utf-8"))
+    except (FileNotFoundError, ValueError):
+        return {}
+
+
+def save_watermarks(updates: dict[str, int]) -> None:
+    """Aggiorna i watermark delle sorgenti indicate (le altre restano invariate). Scrittura atomica."""
+    if not updates:
+        return
+    marks = {**load_watermarks(), **updates}
+    path = _watermarks_path()
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(".json.tmp")
+    tmp.write_text(json.dumps(marks), encoding="utf-8")
+    os.replace(tmp, path)
@@ -1,10 +1,19 @@
 import logging
+import time
+from contextlib import asynccontextmanager
 
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 
-from app.api.routes import admin, health
+from app.api.routes import admin, facets, health, metrics, search, sets
 from app.core.config import get_settings
+from app.infrastructure.search import server_timing
+from app.infrastructure.search.metrics import HTTP_REQUEST_SECONDS
+from app.infrastructure.search.scheduler import scheduler
+from app.infrastructure.search.searcher import close_http_client
+from app.infrastructure.search.task_monitor import task_monitor
+from app.infrastructure.search.tracing import attach_context, setup_tracing, shutdown_tracing, span
+from app.infrastructure.search.updates import coalescer
 
 settings = get_settings()
 logging.basicConfig(
@@ -13,12 +22,27 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    setup_tracing()
+    scheduler.start()
+    task_monitor.start()
+    yield
+    await task_monitor.stop()
+    await scheduler.stop()
+    await coalescer.stop()
+    await close_http_client()
+    shutdown_tracing()
+
+
 app = FastAPI(
     title=settings.APP_NAME,
     version=settings.APP_VERSION,
     description="Search microservice: Meilisearch indexer for Trading Card Marketplace",
     docs_url="/docs" if settings.DEBUG else None,
     redoc_url="/redoc" if settings.DEBUG else None,
+    lifespan=lifespan,
 )
 
 def _cors_origins() -> list[str]:
@@ -37,10 +61,61 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["Server-Timing"],
 )
 
+
+@app.middleware("http")
+async def request_metrics(request: Request, call_next):
+    """Latenza per route template (non per path: /api/admin/reindex/{job_id} è una sola serie)."""
+    started = time.perf_counter()
+    status_code = 500
+    try:
+        response = await call_next(request)
+        status_code = response.status_code
+        return response
+    finally:
+        route = request.scope.get("route")
+        HTTP_REQUEST_SECONDS.labels(
+            request.method, getattr(route, "path", "unmatched"), str(status_code)
+        ).observe(time.perf_counter() - started)
+
+
+@app.middleware("http")
+async def request_tracing(request: Request, call_next):
+    """Span per richiesta (figlio del traceparent in ingresso, se c'è), rinominato col route template."""
+    with attach_context(request.headers), span(f"{request.method} {request.url.path}") as current:
+        response = await call_next(request)
+        if current is not None:
+            route = request.scope.get("route")
+            current.update_name(f"{request.method} {getattr(route, 'path', 'unmatched')}")
+            current.set_attribute("http.route", getattr(route, "path", "unmatched"))
+            current.set_attribute("http.status_code", response.status_code)
+        return response
+
+
+@app.middleware("http")
+async def request_server_timing(request: Request, call_next):
+    """Header Server-Timing (fasi registrate da route e searcher + total); log delle ricerche lente con le fasi."""
+    if not settings.SERVER_TIMING_ENABLED:
+        return await call_next(request)
+    timing = server_timing.start()
+    response = await call_next(request)
+    total_ms = timing.elapsed_ms()
+    phases = timing.header()
+    timing.add("total", total_ms)
+    response.headers["Server-Timing"] = timing.header()
+    if phases and settings.SEARCH_SLOW_LOG_MS and total_ms >= settings.SEARCH_SLOW_LOG_MS:
+        logger.warning("Slow request %s %s (%.0f ms): %s", request.method, request.url.path, total_ms, phases)
+    return response
+
+
 app.include_router(health.router)
+app.include_router(metrics.router)
 app.include_router(admin.router)
+app.include_router(facets.router)
+app.include_router(search.router)
+app.include_router(sets.router)
 
 
 @app.get("/")
@@ -0,0 +1,106 @@
+"""
+Micro-benchmark delle funzioni riga → documento dell'indexer (_clean_image_path, _build_keywords_localized,
+_parse_available_languages, _build_*_doc) e della serializzazione JSON di un batch, su righe reali lette
+dal catalogo sintetico con le stesse query di _SOURCES. Riporta ns per chiamata (migliore di --repeat giri).
+
+Uso (dalla root del progetto):
+  python -m benchmarks.bench_builders
+  python -m benchmarks.bench_builders --rows 50000 --json builders.json
+  python -m benchmarks.bench_builders --baseline builders.json --max-regression 0.1
+"""
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+from typing import Any, Callable
+
+from app.infrastructure.search import indexer
+from benchmarks.catalog import CatalogSize, connect, ensure_catalog
+from benchmarks.report import check_baseline, print_table, write_json
+
+
+def _load_rows(path: Path, rows: int) -> dict[str, Any]:
+    conn = connect(path)
+    try:
+        out: dict[str, Any] = {"mtg_context": indexer._load_mtg_context(conn, None)}
+        out["sets_context"] = indexer._get_set_translations(conn, None)
+        with conn.cursor() as cur:
+            for name in ("mtg", "op", "sealed", "sets"):
+                sql, params = indexer._source_query(indexer._SOURCES[name], None, limit=rows)
+                cur.execute(sql, params)
+                out[name] = cur.fetchall()
+        return out
+    finally:
+        conn.close()
+
+
+def _time(fn: Callable[[], Any], calls: int, repeat: int) -> float:
+    """ns per chiamata, il migliore dei giri (meno rumore di scheduler e GC)."""
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter_ns()
+        fn()
+        best = min(best, time.perf_counter_ns() - started)
+    return best / calls
+
+
+def run(data: dict[str, Any], repeat: int) -> list[dict[str, Any]]:
+    mtg, op, sealed, sets = data["mtg"], data["op"], data["sealed"], data["sets"]
+    trans_map, set_trans = data["mtg_context"], data["sets_context"]
+    images = [row["image_path"] for row in mtg]
+    keywords = [(row["printed_name"], trans_map.get(row["oracle_id"], [])) for row in mtg]
+    languages = [row["available_languages"] for row in mtg]
+    batch = [indexer._build_mtg_doc(row, trans_map) for row in mtg]
+
+    cases: list[tuple[str, int, Callable[[], Any]]] = [
+        ("clean_image_path", len(images), lambda: [indexer._clean_image_path(p) for p in images]),
+        ("build_keywords_localized", len(keywords), lambda: [indexer._build_keywords_localized(n, t) for n, t in keywords]),
+        ("parse_available_languages", len(languages), lambda: [indexer._parse_available_languages(v) for v in languages]),
+        ("build_mtg_doc", len(mtg), lambda: [indexer._build_mtg_doc(row, trans_map) for row in mtg]),
+        ("build_single_doc", len(op), lambda: [indexer._build_single_doc(row, "op", "op") for row in op]),
+        ("build_sealed_doc", len(sealed), lambda: [indexer._build_sealed_doc(row) for row in sealed]),
+        ("build_set_doc", len(sets), lambda: [indexer._build_set_doc(row, set_trans) for row in sets]),
+        # Come _BatchWriter._add_documents: un batch serializzato per intero (ns per documento).
+        ("serialize_batch", len(batch), lambda: json.dumps(batch, ensure_ascii=False).encode("utf-8")),
+    ]
+    results = []
+    for name, calls, fn in cases:
+        if not calls:
+            continue
+        ns = _time(fn, calls, repeat)
+        results.append({"case": name, "calls": calls, "ns_per_call": round(ns, 1), "calls_per_sec": round(1e9 / ns)})
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Micro-benchmark riga → documento dell'indexer.")
+    parser.add_argument("--rows", type=int, default=20_000, help="Righe per sorgente lette dal catalogo.")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--data-dir", type=Path, default=Path(".bench"), help="Cartella dei cataloghi generati.")
+    parser.add_argument("--json", type=Path, help="Salva i risultati (utilizzabile come --baseline).")
+    parser.add_argument("--baseline", type=Path, help="JSON di un run precedente da confrontare.")
+    parser.add_argument("--max-regression", type=float, default=0.10, help="Peggioramento tollerato (0.10 = 10%%).")
+    args = parser.parse_args()
+
+    size = CatalogSize(prints=max(args.rows, CatalogSize().prints))
+    path, _ = ensure_catalog(args.data_dir, size)
+    results = run(_load_rows(path, args.rows), args.repeat)
+    print_table(results, ["case", "calls", "ns_per_call", "calls_per_sec"])
+
+    metrics = {f"{r['case']}_ns": r["ns_per_call"] for r in results}
+    if args.json:
+        write_json(args.json, {"rows": args.rows, "results": results, "metrics": metrics})
+        print(f"Risultati in {args.json}")
+    if args.baseline:
+        regressions = check_baseline(args.baseline, metrics, args.max_regression, higher_is_better=set())
+        if regressions:
+            print("REGRESSIONE rispetto a", args.baseline, file=sys.stderr)
+            for line in regressions:
+                print("  " + line, file=sys.stderr)
+            sys.exit(1)
+        print(f"Nessuna regressione oltre {args.max_regression:.0%} rispetto a {args.baseline}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,197 @@
+"""
+Benchmark end-to-end del reindex totale, offline: catalogo sintetico SQLite (o un MySQL locale con --mysql)
+e Meilisearch finto su 127.0.0.1. Ogni ripetizione gira in un processo nuovo (spawn) con run_indexer(),
+così il picco di memoria è quello del solo indexer. Riporta righe/s, byte inviati, picco di memoria e tempi
+per fase (query+fetch, context, transform, serialize, send, task).
+
+Uso (dalla root del progetto):
+  python -m benchmarks.bench_indexer --prints 200000 --repeat 3
+  python -m benchmarks.bench_indexer --prints 2000000 --workers 4 --stub-indexing-rate 50000
+  python -m benchmarks.bench_indexer --json bench.json                        # salva la baseline
+  python -m benchmarks.bench_indexer --baseline bench.json --max-regression 0.1  # exit 1 se peggiora
+"""
+import argparse
+import logging
+import multiprocessing
+import os
+import queue
+import shutil
+import sys
+import tempfile
+import time
+from dataclasses import asdict
+from pathlib import Path
+from typing import Any
+
+from app.infrastructure.search.timings import STAGES
+from benchmarks.catalog import CatalogSize, connect, ensure_catalog
+from benchmarks.report import check_baseline, median, print_table, write_json
+from benchmarks.stub_meilisearch import StubMeilisearch
+
+
+def run_once(db_path: str | None, events: Any) -> None:
+    """Processo figlio: un reindex totale da zero contro il catalogo e il Meilisearch finto."""
+    logging.basicConfig(level=os.environ.get("BENCH_LOG_LEVEL", "ERROR"))
+    from app.infrastructure.search import indexer
+
+    if db_path is not None:
+        indexer._get_mysql_connection = lambda: connect(Path(db_path))
+    started = time.perf_counter()
+    result = indexer.run_indexer(resume=False, force=True)
+    result["wall_seconds"] = time.perf_counter() - started
+    events.put(result)
+
+
+def wait_result(proc: Any, events: Any) -> dict[str, Any]:
+    while True:
+        try:
+            return events.get(timeout=1.0)
+        except queue.Empty:
+            if not proc.is_alive():
+                return {"error": f"processo di benchmark terminato senza risultato (exit code {proc.exitcode})"}
+
+
+def parse_args() -> argparse.Namespace:
+    defaults = CatalogSize()
+    parser = argparse.ArgumentParser(description="Benchmark offline del reindex totale.")
+    parser.add_argument("--prints", type=int, default=defaults.prints, help="Stampe MTG (cards_prints).")
+    parser.add_argument("--prints-per-card", type=int, default=defaults.prints_per_card)
+    parser.add_argument("--translations", type=int, default=defaults.translations, help="Lingue tradotte per carta.")
+    parser.add_argument("--sets", type=int, default=defaults.sets)
+    parser.add_argument("--op-prints", type=int, default=defaults.op_prints)
+    parser.add_argument("--pk-prints", type=int, default=defaults.pk_prints)
+    parser.add_argument("--sealed", type=int, default=defaults.sealed)
+    parser.add_argument("--repeat", type=int, default=3, help="Ripetizioni (si riporta la mediana).")
+    parser.add_argument("--batch-size", type=int, default=5000, help="INDEXER_BATCH_SIZE")
+    parser.add_argument("--page-size", type=int, default=5000, help="INDEXER_PAGE_SIZE")
+    parser.add_argument("--workers", type=int, default=1, help="INDEXER_WORKERS (partizioni MTG in parallelo)")
+    parser.add_argument(
+        "--stub-indexing-rate",
+        type=float,
+        default=0.0,
+        help="Documenti/s elaborati dal Meilisearch finto (0 = task istantanei).",
+    )
+    parser.add_argument("--data-dir", type=Path, default=Path(".bench"), help="Cartella dei cataloghi generati.")
+    parser.add_argument("--mysql", action="store_true", help="Usa il MySQL di .env (MYSQL_*) invece del catalogo sintetico.")
+    parser.add_argument("--json", type=Path, help="Salva i risultati (utilizzabile come --baseline).")
+    parser.add_argument("--baseline", type=Path, help="JSON di un run precedente da confrontare.")
+    parser.add_argument("--max-regression", type=float, default=0.10, help="Peggioramento tollerato (0.10 = 10%%).")
+    return parser.parse_args()
+
+
+def configure_env(
+    meilisearch_url: str,
+    state_dir: str,
+    *,
+    master_key: str = "bench",
+    batch_size: int = 5000,
+    page_size: int = 5000,
+    workers: int = 1,
+    mysql: bool = False,
+) -> None:
+    """Settings del processo figlio: letti da pydantic-settings all'avvio, le variabili d'ambiente vincono su .env."""
+    if not mysql:
+        for name, value in (("MYSQL_HOST", "bench"), ("MYSQL_USER", "bench"), ("MYSQL_PASSWORD", "bench"), ("MYSQL_DATABASE", "bench")):
+            os.environ.setdefault(name, value)
+    os.environ.update({
+        "MEILISEARCH_URL": meilisearch_url,
+        "MEILISEARCH_MASTER_KEY": master_key,
+        "INDEXER_STATE_DIR": state_dir,
+        "INDEXER_BATCH_SIZE": str(batch_size),
+        "INDEXER_PAGE_SIZE": str(page_size),
+        "INDEXER_WORKERS": str(workers),
+        "INDEXER_SKIP_UNCHANGED": "false",
+    })
+    os.environ.pop("PROMETHEUS_MULTIPROC_DIR", None)
+
+
+def main() -> None:
+    args = parse_args()
+    size = CatalogSize(
+        prints=args.prints,
+        prints_per_card=args.prints_per_card,
+        translations=args.translations,
+        sets=args.sets,
+        op_prints=args.op_prints,
+        pk_prints=args.pk_prints,
+        sealed=args.sealed,
+    )
+    db_path = None
+    if not args.mysql:
+        path, generated = ensure_catalog(args.data_dir, size)
+        db_path = str(path)
+        print(f"Catalogo: {path}" + (f" (generato in {generated:.1f}s)" if generated is not None else " (cache)"))
+
+    stub = StubMeilisearch(indexing_rate=args.stub_indexing_rate).start()
+    ctx = multiprocessing.get_context("spawn")
+    runs = []
+    try:
+        for i in range(args.repeat):
+            state_dir = tempfile.mkdtemp(prefix="bench-state-")
+            configure_env(
+                stub.url, state_dir,
+                batch_size=args.batch_size, page_size=args.page_size, workers=args.workers, mysql=args.mysql,
+            )
+            before = stub.stats()
+            events = ctx.Queue()
+            proc = ctx.Process(target=run_once, args=(db_path, events), name=f"bench-{i}")
+            proc.start()
+            result = wait_result(proc, events)
+            proc.join()
+            shutil.rmtree(state_dir, ignore_errors=True)
+            if result.get("error"):
+                print("ERRORE:", result["error"], file=sys.stderr)
+                sys.exit(1)
+            after = stub.stats()
+            docs = result["total"] + result["sets"]
+            sent = after["bytes_received"] - before["bytes_received"]
+            runs.append({
+                "run": i + 1,
+                "seconds": round(result["wall_seconds"], 3),
+                "documents": docs,
+                "docs_per_sec": round(docs / result["wall_seconds"], 1),
+                "mb_sent": round(sent / 1024 / 1024, 2),
+                "bytes_per_doc": round(sent / docs, 1) if docs else 0.0,
+                "requests": after["requests"] - before["requests"],
+                "peak_memory_mb": result.get("peak_memory_mb"),
+                "timings": result.get("timings", {}),
+            })
+    finally:
+        stub.stop()
+
+    print_table(runs, ["run", "seconds", "documents", "docs_per_sec", "mb_sent", "bytes_per_doc", "requests", "peak_memory_mb"])
+    typical = sorted(runs, key=lambda r: r["seconds"])[len(runs) // 2]
+    print(f"\nTempi per fase (s), run {typical['run']} (mediana):")
+    print_table(
+        [{"source": name, **t} for name, t in typical["timings"].items()],
+        ["source", *STAGES, "total"],
+    )
+
+    metrics = {
+        "seconds": median([r["seconds"] for r in runs]),
+        "docs_per_sec": median([r["docs_per_sec"] for r in runs]),
+        "bytes_per_doc": median([r["bytes_per_doc"] for r in runs]),
+        "peak_memory_mb": max((r["peak_memory_mb"] or 0.0) for r in runs),
+    }
+    print("\nMediana: " + " | ".join(f"{k}: {v:,.1f}" for k, v in metrics.items()))
+    if args.json:
+        write_json(args.json, {
+            "catalog": None if args.mysql else asdict(size),
+            "settings": {"batch_size": args.batch_size, "page_size": args.page_size, "workers": args.workers,
+                         "stub_indexing_rate": args.stub_indexing_rate},
+            "runs": runs,
+            "metrics": metrics,
+        })
+        print(f"Risultati in {args.json}")
+    if args.baseline:
+        regressions = check_baseline(args.baseline, metrics, args.max_regression, higher_is_better={"docs_per_sec"})
+        if regressions:
+            print("REGRESSIONE rispetto a", args.baseline, file=sys.stderr)
+            for line in regressions:
+                print("  " + line, file=sys.stderr)
+            sys.exit(1)
+        print(f"Nessuna regressione oltre {args.max_regression:.0%} rispetto a {args.baseline}")
+
+
+if __name__ == "__main__":
+    main()
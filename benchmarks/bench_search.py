@@ -0,0 +1,264 @@
+"""
+Load test della ricerca con un mix di query realistico (prefissi, nomi completi, errori di battitura, nomi
+italiani/francesi/tedeschi) derivato da data_vecchio_db/lang-maps. Le query sono inviate a un Meilisearch
+locale (POST /multi-search, come searcher.py) o attraverso l'API (POST /api/search/multi) e si riportano
+throughput e latenza p50/p95/p99 per tipo di query, più la quota di query che trovano la carta attesa.
+
+--load genera il catalogo sintetico con i nomi reali delle lang-maps e lo indicizza con run_indexer()
+nell'indice --index (default bench_cards, mai quello di produzione). --during-reindex ripete la misura
+mentre gira un reindex totale dello stesso catalogo, per vedere quanto degrada la ricerca.
+
+Uso (dalla root del progetto, Meilisearch locale es. docker run -p 7700:7700 getmeili/meilisearch):
+  python -m benchmarks.bench_search --load --prints 200000
+  python -m benchmarks.bench_search --duration 60 --concurrency 16
+  python -m benchmarks.bench_search --during-reindex --json search.json
+  python -m benchmarks.bench_search --baseline search.json --max-regression 0.1
+  python -m benchmarks.bench_search --api http://localhost:8000 --index cards
+"""
+import argparse
+import asyncio
+import itertools
+import multiprocessing
+import os
+import shutil
+import sys
+import tempfile
+import time
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+import httpx
+
+from benchmarks.bench_indexer import configure_env, run_once, wait_result
+from benchmarks.catalog import CatalogSize, ensure_catalog
+from benchmarks.corpus import DEFAULT_MIX, Query, build_queries, load_lang_maps, parse_mix
+from benchmarks.report import check_baseline, percentile, print_table, write_json
+
+COLUMNS = ["kind", "requests", "errors", "qps", "p50_ms", "p95_ms", "p99_ms", "max_ms", "meili_p50_ms", "found_pct", "zero_hits_pct"]
+
+
+@dataclass
+class Sample:
+    kind: str
+    seconds: float
+    ok: bool
+    found: bool | None = None  # carta attesa tra i risultati (solo query con expected)
+    hits: int = 0
+    processing_ms: float | None = None  # processingTimeMs di Meilisearch
+
+
+Sender = Callable[[Query, float], Awaitable[Sample]]
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Load test della ricerca (Meilisearch o API).")
+    parser.add_argument("--url", default=os.environ.get("MEILISEARCH_URL", "http://127.0.0.1:7700"), help="Meilisearch locale.")
+    parser.add_argument("--key", default=os.environ.get("MEILISEARCH_MASTER_KEY", ""), help="Master key di Meilisearch.")
+    parser.add_argument("--index", default="bench_cards", help="Indice carte interrogato (e scritto da --load / --during-reindex).")
+    parser.add_argument("--api", help="Base URL dell'API (es. http://localhost:8000): misura /api/search/multi invece di Meilisearch.")
+    parser.add_argument("--load", action="store_true", help="Genera e indicizza il catalogo sintetico prima della misura.")
+    parser.add_argument("--during-reindex", action="store_true", help="Misura anche durante un reindex totale del catalogo.")
+    parser.add_argument("--prints", type=int, default=CatalogSize().prints, help="Stampe MTG del catalogo sintetico.")
+    parser.add_argument("--workers", type=int, default=1, help="INDEXER_WORKERS del reindex.")
+    parser.add_argument("--queries", type=int, default=5000, help="Query distinte nel corpus (ripetute ciclicamente).")
+    parser.add_argument("--mix", type=parse_mix, default=DEFAULT_MIX, help="Pesi per tipo, es. prefix=35,full=20,localized=20,typo=15,word=10")
+    parser.add_argument("--duration", type=float, default=30.0, help="Secondi di misura a indice fermo.")
+    parser.add_argument("--warmup", type=float, default=3.0, help="Secondi iniziali scartati.")
+    parser.add_argument("--concurrency", type=int, default=8, help="Richieste in parallelo.")
+    parser.add_argument("--rate", type=float, default=0.0, help="Richieste/s totali a ritmo fisso (0 = il più veloce possibile).")
+    parser.add_argument("--limit", type=int, default=20, help="Risultati per query.")
+    parser.add_argument("--data-dir", type=Path, default=Path(".bench"), help="Cartella dei cataloghi generati.")
+    parser.add_argument("--json", type=Path, help="Salva i risultati (utilizzabile come --baseline).")
+    parser.add_argument("--baseline", type=Path, help="JSON di un run precedente da confrontare.")
+    parser.add_argument("--max-regression", type=float, default=0.10, help="Peggioramento tollerato (0.10 = 10%%).")
+    return parser.parse_args()
+
+
+def _sender(client: httpx.AsyncClient, args: argparse.Namespace) -> Sender:
+    async def send(query: Query, sent_at: float) -> Sample:
+        if args.api:
+            body = {"queries": [{"q": query.q, "limit": args.limit}]}
+            path = "/api/search/multi"
+        else:
+            body = {"queries": [{"indexUid": args.index, "q": query.q, "limit": args.limit}]}
+            path = "/multi-search"
+        try:
+            response = await client.post(path, json=body)
+        except httpx.HTTPError:
+            return Sample(query.kind, time.perf_counter() - sent_at, ok=False)
+        seconds = time.perf_counter() - sent_at
+        if response.status_code != 200:
+            return Sample(query.kind, seconds, ok=False)
+        result = response.json()["results"][0]
+        hits = result.get("hits") or []
+        found = None
+        if query.expected:
+            found = query.expected.lower() in {(h.get("name") or "").lower() for h in hits}
+        return Sample(query.kind, seconds, True, found, len(hits), result.get("processingTimeMs"))
+
+    return send
+
+
+async def replay(
+    send: Sender,
+    queries: list[Query],
+    duration: float,
+    concurrency: int,
+    rate: float = 0.0,
+    stop: Callable[[], bool] | None = None,
+) -> tuple[list[Sample], float]:
+    """
+    Invia le query in ciclo da concurrency worker fino a duration secondi (o finché stop() è vero).
+    Con rate > 0 ogni worker parte a istanti fissi e la latenza si misura dall'istante previsto,
+    così un backend lento non riduce il carico (niente coordinated omission).
+    """
+    counter = itertools.count()
+    samples: list[Sample] = []
+    started = time.perf_counter()
+    deadline = started + duration
+    interval = concurrency / rate if rate > 0 else 0.0
+
+    async def worker(n: int) -> None:
+        next_at = started + interval * n / concurrency
+        while True:
+            now = time.perf_counter()
+            if now >= deadline or (stop is not None and stop()):
+                return
+            sent_at = now
+            if interval:
+                if next_at > now:
+                    await asyncio.sleep(next_at - now)
+                sent_at, next_at = next_at, next_at + interval
+            samples.append(await send(queries[next(counter) % len(queries)], sent_at))
+
+    await asyncio.gather(*(worker(i) for i in range(concurrency)))
+    return samples, time.perf_counter() - started
+
+
+def summarize(samples: list[Sample], elapsed: float) -> list[dict[str, Any]]:
+    rows = []
+    groups = sorted({s.kind for s in samples})
+    for kind in [*groups, "all"]:
+        group = [s for s in samples if kind == "all" or s.kind == kind]
+        ok = [s for s in group if s.ok]
+        ms = [s.seconds * 1000 for s in ok]
+        checked = [s.found for s in ok if s.found is not None]
+        processing = [s.processing_ms for s in ok if s.processing_ms is not None]
+        rows.append({
+            "kind": kind,
+            "requests": len(group),
+            "errors": len(group) - len(ok),
+            "qps": round(len(group) / elapsed, 1) if elapsed else 0.0,
+            "p50_ms": round(percentile(ms, 50), 2),
+            "p95_ms": round(percentile(ms, 95), 2),
+            "p99_ms": round(percentile(ms, 99), 2),
+            "max_ms": round(max(ms, default=0.0), 2),
+            "meili_p50_ms": round(percentile(processing, 50), 2) if processing else None,
+            "found_pct": round(100 * sum(checked) / len(checked), 1) if checked else None,
+            "zero_hits_pct": round(100 * sum(1 for s in ok if not s.hits) / len(ok), 1) if ok else None,
+        })
+    return rows
+
+
+def _start_reindex(args: argparse.Namespace, db_path: str) -> tuple[Any, Any, str]:
+    """Reindex totale del catalogo in un processo figlio (spawn), verso --url e --index."""
+    state_dir = tempfile.mkdtemp(prefix="bench-state-")
+    configure_env(args.url, state_dir, master_key=args.key, workers=args.workers)
+    os.environ["MEILISEARCH_INDEX_NAME"] = args.index
+    os.environ["MEILISEARCH_SETS_INDEX_NAME"] = f"{args.index}_sets"
+    ctx = multiprocessing.get_context("spawn")
+    events = ctx.Queue()
+    proc = ctx.Process(target=run_once, args=(db_path, events), name="bench-reindex")
+    proc.start()
+    return proc, events, state_dir
+
+
+def _finish_reindex(proc: Any, events: Any, state_dir: str) -> dict[str, Any]:
+    result = wait_result(proc, events)
+    proc.join()
+    shutil.rmtree(state_dir, ignore_errors=True)
+    if result.get("error"):
+        print("ERRORE reindex:", result["error"], file=sys.stderr)
+        sys.exit(1)
+    return result
+
+
+async def _measure(args: argparse.Namespace, queries: list[Query], db_path: str | None) -> dict[str, list[dict[str, Any]]]:
+    base_url = (args.api or args.url).rstrip("/")
+    headers = {} if args.api or not args.key else {"Authorization": f"Bearer {args.key}"}
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    phases: dict[str, list[dict[str, Any]]] = {}
+    async with httpx.AsyncClient(base_url=base_url, headers=headers, limits=limits, timeout=30.0) as client:
+        send = _sender(client, args)
+        if args.warmup > 0:
+            await replay(send, queries, args.warmup, args.concurrency, args.rate)
+        samples, elapsed = await replay(send, queries, args.duration, args.concurrency, args.rate)
+        phases["idle"] = summarize(samples, elapsed)
+        print(f"\nIndice fermo: {len(samples):,} richieste in {elapsed:.1f}s")
+        print_table(phases["idle"], COLUMNS)
+
+        if args.during_reindex:
+            proc, events, state_dir = _start_reindex(args, db_path)
+            samples, elapsed = await replay(
+                send, queries, float("inf"), args.concurrency, args.rate, stop=lambda: not proc.is_alive(),
+            )
+            result = _finish_reindex(proc, events, state_dir)
+            phases["reindex"] = summarize(samples, elapsed)
+            print(f"\nDurante il reindex ({result['total'] + result['sets']:,} documenti): {len(samples):,} richieste in {elapsed:.1f}s")
+            print_table(phases["reindex"], COLUMNS)
+    return phases
+
+
+def main() -> None:
+    args = parse_args()
+    size = CatalogSize(prints=args.prints, lang_maps=True)
+    cards = load_lang_maps()
+    # Solo le carte presenti nel catalogo: oracle-N usa la voce N delle lang-maps.
+    cards = cards[: max(1, min(len(cards), args.prints // size.prints_per_card))]
+    queries = build_queries(cards, args.queries, args.mix)
+
+    db_path = None
+    if args.load or args.during_reindex:
+        path, generated = ensure_catalog(args.data_dir, size)
+        db_path = str(path)
+        print(f"Catalogo: {path}" + (f" (generato in {generated:.1f}s)" if generated is not None else " (cache)"))
+    if args.load:
+        started = time.perf_counter()
+        result = _finish_reindex(*_start_reindex(args, db_path))
+        print(f"Indice {args.index} caricato: {result['total'] + result['sets']:,} documenti in {time.perf_counter() - started:.1f}s")
+
+    target = f"{args.api.rstrip('/')}/api/search/multi" if args.api else f"{args.url.rstrip('/')} (indice {args.index})"
+    print(f"Target: {target} | {len(queries):,} query | concorrenza {args.concurrency}"
+          + (f" | {args.rate:g} req/s" if args.rate else ""))
+    phases = asyncio.run(_measure(args, queries, db_path))
+
+    metrics: dict[str, float] = {}
+    for phase, rows in phases.items():
+        total = rows[-1]
+        metrics.update({f"{phase}_{k}": total[k] for k in ("qps", "p50_ms", "p95_ms", "p99_ms") if total[k]})
+        if total["found_pct"] is not None:
+            metrics[f"{phase}_found_pct"] = total["found_pct"]
+    if args.json:
+        write_json(args.json, {
+            "target": target,
+            "settings": {"prints": args.prints, "queries": args.queries, "mix": args.mix, "concurrency": args.concurrency,
+                         "rate": args.rate, "duration": args.duration, "limit": args.limit},
+            "phases": phases,
+            "metrics": metrics,
+        })
+        print(f"Risultati in {args.json}")
+    if args.baseline:
+        higher = {name for name in metrics if name.endswith(("_qps", "_found_pct"))}
+        regressions = check_baseline(args.baseline, metrics, args.max_regression, higher_is_better=higher)
+        if regressions:
+            print("REGRESSIONE rispetto a", args.baseline, file=sys.stderr)
+            for line in regressions:
+                print("  " + line, file=sys.stderr)
+            sys.exit(1)
+        print(f"Nessuna regressione oltre {args.max_regression:.0%} rispetto a {args.baseline}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,264 @@
+"""
+Catalogo sintetico per i benchmark: le tabelle e le colonne lette dall'indexer (cards_prints, cards,
+card_translations, sets, set_translations, games, op_*, pk_*, sealed_products) in un file SQLite,
+generato una volta per dimensione e riusato. Nomi MTG inventati, o reali dalle lang-maps con lang_maps=True.
+connect() ritorna un adattatore con l'interfaccia di una connessione pymysql con DictCursor: le query di
+_SOURCES girano invariate, senza rete né MySQL.
+"""
+import json
+import random
+import sqlite3
+import time
+from dataclasses import asdict, dataclass
+from datetime import date
+from pathlib import Path
+from typing import Any, Iterator
+
+import pymysql
+
+from benchmarks.corpus import load_lang_maps
+
+LANGUAGES = ("it", "fr", "de", "es", "pt", "ja", "ko", "zh")
+RARITIES = ("common", "common", "common", "uncommon", "uncommon", "rare", "mythic")
+_SYLLABLES = ("vor", "tha", "lem", "bri", "os", "kar", "dun", "ael", "mir", "zu", "gor", "sel", "quin", "tor", "ya")
+_TITLES = ("Dragon", "Knight", "Bolt", "Oracle", "Golem", "Rebirth", "Archive", "Warden", "Tide", "Ember", "Pact")
+# Prefissi per lingua: nomi tradotti di lunghezza e alfabeto plausibili.
+_LANG_PREFIX = {
+    "it": "Il", "fr": "Le", "de": "Der", "es": "El", "pt": "O", "ja": "竜の", "ko": "용의", "zh": "龙之",
+}
+# Forme del path immagine viste in produzione: prefisso legacy /img/ o img/, oppure già pulito.
+_IMAGE_FORMATS = ("/img/cards/{set}/{id}.jpg", "img/cards/{set}/{id}.jpg", "cards/{set}/{id}.jpg")
+
+# Converter esplicito: quelli predefiniti di sqlite3 sono deprecati da Python 3.12.
+sqlite3.register_converter("DATE", lambda raw: date.fromisoformat(raw.decode()))
+
+SCHEMA = """
+CREATE TABLE games (id INTEGER PRIMARY KEY, slug TEXT);
+CREATE TABLE sets (
+    id INTEGER PRIMARY KEY, game_id INTEGER, name TEXT, code TEXT, release_date DATE, set_icon_uri TEXT
+);
+CREATE TABLE set_translations (
+    id INTEGER PRIMARY KEY, set_id INTEGER, language_code TEXT, translated_name TEXT
+);
+CREATE TABLE cards (oracle_id TEXT PRIMARY KEY, name TEXT);
+CREATE TABLE cards_prints (
+    id INTEGER PRIMARY KEY, cardtrader_id INTEGER, oracle_id TEXT, set_id INTEGER, image_path TEXT,
+    collector_number TEXT, rarity TEXT, available_languages TEXT
+);
+CREATE TABLE card_translations (
+    id INTEGER PRIMARY KEY, game_slug TEXT, entity_id TEXT, language_code TEXT, translated_name TEXT
+);
+CREATE INDEX card_translations_entity ON card_translations (game_slug, entity_id);
+CREATE TABLE op_cards (card_id TEXT PRIMARY KEY, name_en TEXT);
+CREATE TABLE op_prints (id INTEGER PRIMARY KEY, cardtrader_id INTEGER, card_id TEXT, set_id INTEGER, image_path TEXT);
+CREATE TABLE pk_cards (card_id TEXT PRIMARY KEY, name_en TEXT);
+CREATE TABLE pk_prints (id INTEGER PRIMARY KEY, cardtrader_id INTEGER, card_id TEXT, set_id INTEGER, image_url TEXT);
+CREATE TABLE sealed_products (
+    id INTEGER PRIMARY KEY, cardtrader_id INTEGER, name_en TEXT, name_it TEXT, category_id INTEGER,
+    set_id INTEGER, image_path TEXT
+);
+"""
+
+
+@dataclass(frozen=True)
+class CatalogSize:
+    prints: int = 100_000  # cards_prints (MTG)
+    prints_per_card: int = 4  # stampe per oracle_id
+    translations: int = 4  # lingue tradotte per carta MTG
+    sets: int = 800
+    op_prints: int = 5_000
+    pk_prints: int = 5_000
+    sealed: int = 2_000
+    lang_maps: bool = False  # nomi e traduzioni MTG reali da data_vecchio_db/lang-maps (per il load test della ricerca)
+
+    def key(self) -> str:
+        return "-".join(f"{v}" for v in asdict(self).values())
+
+
+def _name(rng: random.Random) -> str:
+    word = "".join(rng.choice(_SYLLABLES) for _ in range(rng.randint(2, 4))).capitalize()
+    return f"{word} {rng.choice(_TITLES)}"
+
+
+def _image(rng: random.Random, set_id: int, row_id: int) -> str:
+    return rng.choice(_IMAGE_FORMATS).format(set=set_id, id=row_id)
+
+
+def _set_rows(size: CatalogSize, rng: random.Random) -> Iterator[tuple]:
+    for set_id in range(1, size.sets + 1):
+        # 70% MTG, il resto diviso tra One Piece e Pokémon
+        game_id = 1 if set_id % 10 < 7 else (2 if set_id % 10 < 9 else 3)
+        year = 1993 + set_id % 33
+        yield (
+            set_id, game_id, f"{_name(rng)} Set", f"S{set_id:04d}", f"{year}-{set_id % 12 + 1:02d}-01",
+            f"https://cdn.example/icons/{set_id}.svg" if set_id % 3 else None,
+        )
+
+
+def _sets_by_game(size: CatalogSize) -> dict[int, list[int]]:
+    out: dict[int, list[int]] = {1: [], 2: [], 3: []}
+    for set_id in range(1, size.sets + 1):
+        out[1 if set_id % 10 < 7 else (2 if set_id % 10 < 9 else 3)].append(set_id)
+    return {game: ids or [1] for game, ids in out.items()}
+
+
+def _lang_map_names(cards: int, languages: tuple[str, ...]) -> tuple[list[str], list[list[tuple[str, str]]]]:
+    """Nomi dalle lang-maps nello stesso ordine di corpus.load_lang_maps() (ciclici se cards le supera)."""
+    entries = load_lang_maps()
+    picked = [entries[i % len(entries)] for i in range(cards)]
+    return (
+        [card.name for card in picked],
+        [[(lang, card.translations[lang]) for lang in languages if lang in card.translations] for card in picked],
+    )
+
+
+def generate(path: Path, size: CatalogSize, seed: int = 42) -> float:
+    """Crea il catalogo in path (sovrascrive). Ritorna i secondi impiegati."""
+    started = time.perf_counter()
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.unlink(missing_ok=True)
+    rng = random.Random(seed)
+    sets = _sets_by_game(size)
+    cards = max(size.prints // max(size.prints_per_card, 1), 1)
+    db = sqlite3.connect(path)
+    try:
+        db.execute("PRAGMA journal_mode = OFF")
+        db.execute("PRAGMA synchronous = OFF")
+        db.executescript(SCHEMA)
+        db.executemany("INSERT INTO games VALUES (?, ?)", [(1, "mtg"), (2, "op"), (3, "pk")])
+        db.executemany("INSERT INTO sets VALUES (?, ?, ?, ?, ?, ?)", _set_rows(size, rng))
+        db.executemany(
+            "INSERT INTO set_translations (set_id, language_code, translated_name) VALUES (?, ?, ?)",
+            (
+                (set_id, lang, f"{_LANG_PREFIX[lang]} set {set_id}")
+                for set_id in range(1, size.sets + 1)
+                for lang in LANGUAGES[:3]
+            ),
+        )
+        if size.lang_maps:
+            names, translations = _lang_map_names(cards, LANGUAGES[:size.translations])
+        else:
+            names = [_name(rng) for _ in range(cards)]
+            translations = [
+                [(lang, f"{_LANG_PREFIX[lang]} {name}") for lang in LANGUAGES[:size.translations]] for name in names
+            ]
+        db.executemany("INSERT INTO cards VALUES (?, ?)", ((f"oracle-{i:08d}", names[i]) for i in range(cards)))
+        db.executemany(
+            "INSERT INTO card_translations (game_slug, entity_id, language_code, translated_name) VALUES ('mtg', ?, ?, ?)",
+            ((f"oracle-{i:08d}", lang, name) for i in range(cards) for lang, name in translations[i]),
+        )
+        db.executemany(
+            "INSERT INTO cards_prints VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (
+                (
+                    i, 100_000 + i, f"oracle-{rng.randrange(cards):08d}", set_id, _image(rng, set_id, i),
+                    str(rng.randint(1, 400)), rng.choice(RARITIES),
+                    json.dumps(["en", *rng.sample(LANGUAGES, rng.randint(0, 4))]),
+                )
+                for i in range(1, size.prints + 1)
+                for set_id in (rng.choice(sets[1]),)
+            ),
+        )
+        for game_id, prefix, table, image_column in ((2, "op", "op_prints", "image_path"), (3, "pk", "pk_prints", "image_url")):
+            count = size.op_prints if prefix == "op" else size.pk_prints
+            card_count = max(count // 2, 1)
+            db.executemany(
+                f"INSERT INTO {prefix}_cards VALUES (?, ?)",
+                ((f"{prefix}-{i}", _name(rng)) for i in range(card_count)),
+            )
+            db.executemany(
+                f"INSERT INTO {table} (id, cardtrader_id, card_id, set_id, {image_column}) VALUES (?, ?, ?, ?, ?)",
+                (
+                    (i, 500_000 + i, f"{prefix}-{rng.randrange(card_count)}", set_id, _image(rng, set_id, i))
+                    for i in range(1, count + 1)
+                    for set_id in (rng.choice(sets[game_id]),)
+                ),
+            )
+        db.executemany(
+            "INSERT INTO sealed_products VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (
+                (
+                    i, 900_000 + i, f"{_name(rng)} Booster Box" if i % 5 else None, f"Box {i}",
+                    rng.choice((2, 3, 4, 5)), set_id, _image(rng, set_id, i),
+                )
+                for i in range(1, size.sealed + 1)
+                for set_id in (rng.randint(1, size.sets),)
+            ),
+        )
+        db.commit()
+    finally:
+        db.close()
+    return time.perf_counter() - started
+
+
+def ensure_catalog(data_dir: Path, size: CatalogSize) -> tuple[Path, float | None]:
+    """Catalogo per questa dimensione, generato se manca. Ritorna (percorso, secondi di generazione o None)."""
+    path = data_dir / f"catalog-{size.key()}.sqlite"
+    if path.exists():
+        return path, None
+    tmp = path.with_suffix(".tmp")
+    seconds = generate(tmp, size)
+    tmp.replace(path)
+    return path, seconds
+
+
+class Cursor:
+    """Cursore con l'interfaccia di pymysql DictCursor usata dall'indexer (execute, fetchone, fetchall)."""
+
+    def __init__(self, db: sqlite3.Connection) -> None:
+        self._cur = db.cursor()
+        self.rowcount = 0
+
+    def __enter__(self) -> "Cursor":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
+
+    def execute(self, sql: str, params: Any = None) -> int:
+        try:
+            self._cur.execute(sql.replace("%s", "?"), tuple(params or ()))
+        except sqlite3.OperationalError as e:
+            # Stessi errori di pymysql: tabelle mancanti e statement solo MySQL (information_schema,
+            # SET SESSION) seguono i rami di fallback dell'indexer.
+            if "no such table" in str(e):
+                raise pymysql.err.ProgrammingError(1146, str(e)) from e
+            raise pymysql.err.OperationalError(1064, str(e)) from e
+        self.rowcount = self._cur.rowcount
+        return self.rowcount
+
+    def _columns(self) -> list[str]:
+        return [d[0] for d in self._cur.description or ()]
+
+    def fetchone(self) -> dict[str, Any] | None:
+        row = self._cur.fetchone()
+        return None if row is None else dict(zip(self._columns(), row))
+
+    def fetchall(self) -> list[dict[str, Any]]:
+        columns = self._columns()
+        return [dict(zip(columns, row)) for row in self._cur.fetchall()]
+
+    def close(self) -> None:
+        self._cur.close()
+
+
+class Connection:
+    def __init__(self, path: Path) -> None:
+        # PARSE_DECLTYPES: le colonne DATE tornano come datetime.date, come da pymysql.
+        self._db = sqlite3.connect(path, detect_types=sqlite3.PARSE_DECLTYPES, check_same_thread=False)
+
+    def cursor(self) -> Cursor:
+        return Cursor(self._db)
+
+    def ping(self, reconnect: bool = True) -> None:
+        pass
+
+    def commit(self) -> None:
+        self._db.commit()
+
+    def close(self) -> None:
+        self._db.close()
+
+
+def connect(path: Path) -> Connection:
+    return Connection(path)
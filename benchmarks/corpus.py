@@ -0,0 +1,152 @@
+"""
+Corpus di query realistiche per il load test della ricerca, dai nomi carta MTG in data_vecchio_db/lang-maps
+(un file per lingua: id, nome inglese, nome localizzato "preferred"). Stessi nomi usati dal catalogo
+sintetico con CatalogSize(lang_maps=True), così le query trovano davvero i documenti.
+
+Tipi di query (mix configurabile):
+  prefix    – primi 2-8 caratteri di un nome inglese o localizzato (search-as-you-type)
+  full      – nome inglese completo
+  localized – nome completo in it/fr/de (fallback sulle altre lingue disponibili)
+  typo      – nome con un errore di battitura in una parola di almeno 5 lettere
+  word      – una sola parola del nome (ricerca parziale)
+"""
+import json
+import random
+from dataclasses import dataclass
+from pathlib import Path
+
+LANG_MAPS_DIR = Path(__file__).resolve().parent.parent / "data_vecchio_db" / "lang-maps"
+QUERY_LANGUAGES = ("it", "fr", "de")
+DEFAULT_MIX = {"prefix": 35, "full": 20, "localized": 20, "typo": 15, "word": 10}
+_KEYBOARD_NEIGHBOURS = "qwertyuiopasdfghjklzxcvbnm"
+
+
+@dataclass(frozen=True)
+class CardNames:
+    name: str  # nome inglese (campo name del documento)
+    translations: dict[str, str]  # lingua -> nome localizzato, solo se diverso dall'inglese
+
+
+@dataclass(frozen=True)
+class Query:
+    kind: str
+    lang: str
+    q: str
+    expected: str | None  # nome inglese atteso tra i risultati (None per prefix/word: troppo ambigue)
+
+
+def titled(name: str) -> str:
+    """Le lang-maps sono in minuscolo: iniziali maiuscole come nei nomi stampati, apostrofi intatti."""
+    return " ".join(word[:1].upper() + word[1:] for word in name.split(" "))
+
+
+def load_lang_maps(directory: Path = LANG_MAPS_DIR) -> list[CardNames]:
+    """Una voce per carta (ordinata per id, quindi stabile tra run), con le traduzioni di tutte le lingue."""
+    names: dict[str, str] = {}
+    translations: dict[str, dict[str, str]] = {}
+    for path in sorted(directory.glob("*.json")):
+        lang = path.stem
+        for entry in json.loads(path.read_text(encoding="utf-8")):
+            name = (entry.get("name") or "").strip()
+            if not name:
+                continue
+            names.setdefault(entry["id"], name)
+            preferred = (entry.get("preferred") or "").strip()
+            if lang != "en" and preferred and preferred != name:
+                translations.setdefault(entry["id"], {})[lang] = preferred
+    if not names:
+        raise FileNotFoundError(f"Nessuna lang-map in {directory}")
+    return [
+        CardNames(titled(names[card_id]), {lang: titled(t) for lang, t in sorted(translations.get(card_id, {}).items())})
+        for card_id in sorted(names)
+    ]
+
+
+def _typo(rng: random.Random, text: str) -> str | None:
+    """Un errore (scambio, omissione, sostituzione, inserimento) in una parola >= 5 lettere, mai sulla prima lettera."""
+    words = text.split(" ")
+    candidates = [i for i, w in enumerate(words) if len(w) >= 5 and w.isalpha()]
+    if not candidates:
+        return None
+    i = rng.choice(candidates)
+    word = words[i]
+    pos = rng.randrange(1, len(word) - 1)
+    op = rng.randrange(4)
+    if op == 0:
+        word = word[:pos] + word[pos + 1] + word[pos] + word[pos + 2:]
+    elif op == 1:
+        word = word[:pos] + word[pos + 1:]
+    elif op == 2:
+        word = word[:pos] + rng.choice(_KEYBOARD_NEIGHBOURS) + word[pos + 1:]
+    else:
+        word = word[:pos] + rng.choice(_KEYBOARD_NEIGHBOURS) + word[pos:]
+    words[i] = word
+    return " ".join(words)
+
+
+def _localized(rng: random.Random, card: CardNames) -> tuple[str, str] | None:
+    langs = [lang for lang in QUERY_LANGUAGES if lang in card.translations] or list(card.translations)
+    if not langs:
+        return None
+    lang = rng.choice(langs)
+    return lang, card.translations[lang]
+
+
+def _make_query(rng: random.Random, kind: str, card: CardNames) -> Query | None:
+    if kind == "full":
+        return Query(kind, "en", card.name, card.name)
+    if kind == "localized":
+        picked = _localized(rng, card)
+        return Query(kind, picked[0], picked[1], card.name) if picked else None
+    # prefix / typo / word: metà sul nome inglese, metà su quello localizzato (se c'è)
+    lang, text = ("en", card.name)
+    if rng.random() < 0.5:
+        lang, text = _localized(rng, card) or (lang, text)
+    if kind == "prefix":
+        return Query(kind, lang, text[: rng.randint(2, 8)].rstrip(), None)
+    if kind == "typo":
+        q = _typo(rng, text)
+        return Query(kind, lang, q, card.name) if q else None
+    if kind == "word":
+        words = [w for w in text.replace(",", "").split(" ") if len(w) >= 4]
+        return Query(kind, lang, rng.choice(words), None) if words else None
+    raise ValueError(f"Tipo di query sconosciuto: {kind}")
+
+
+def build_queries(
+    cards: list[CardNames],
+    count: int,
+    mix: dict[str, int] | None = None,
+    seed: int = 7,
+) -> list[Query]:
+    """
+    count query secondo il mix (pesi per tipo). Popolarità sbilanciata come nel traffico reale:
+    l'80% delle query riguarda il 20% delle carte.
+    """
+    mix = mix or DEFAULT_MIX
+    rng = random.Random(seed)
+    order = list(range(len(cards)))
+    rng.shuffle(order)
+    popular = order[: max(len(order) // 5, 1)]
+    kinds, weights = list(mix), list(mix.values())
+    queries: list[Query] = []
+    while len(queries) < count:
+        card = cards[rng.choice(popular) if rng.random() < 0.8 else rng.choice(order)]
+        query = _make_query(rng, rng.choices(kinds, weights)[0], card)
+        if query and query.q:
+            queries.append(query)
+    return queries
+
+
+def parse_mix(raw: str) -> dict[str, int]:
+    """"prefix=35,full=20,..." -> pesi; i tipi non indicati hanno peso 0."""
+    mix = {}
+    for part in raw.split(","):
+        kind, _, weight = part.partition("=")
+        kind = kind.strip()
+        if kind not in DEFAULT_MIX:
+            raise ValueError(f"Tipo di query sconosciuto: {kind} (validi: {', '.join(DEFAULT_MIX)})")
+        mix[kind] = int(weight)
+    if not any(mix.values()):
+        raise ValueError("Il mix deve avere almeno un peso > 0")
+    return mix
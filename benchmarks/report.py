@@ -0,0 +1,66 @@
+"""Output comune dei benchmark: tabella a terminale, JSON dei risultati e confronto con una baseline."""
+import json
+import statistics
+from pathlib import Path
+from typing import Any
+
+
+def median(values: list[float]) -> float:
+    return statistics.median(values) if values else 0.0
+
+
+def percentile(values: list[float], pct: float) -> float:
+    """Percentile con interpolazione lineare (pct tra 0 e 100); 0.0 se non ci sono valori."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = (len(ordered) - 1) * pct / 100
+    low = int(rank)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+
+def print_table(rows: list[dict[str, Any]], columns: list[str]) -> None:
+    widths = {c: max(len(c), *(len(_fmt(r.get(c))) for r in rows)) for c in columns}
+    print("  ".join(c.rjust(widths[c]) if i else c.ljust(widths[c]) for i, c in enumerate(columns)))
+    for row in rows:
+        print("  ".join(
+            _fmt(row.get(c)).rjust(widths[c]) if i else _fmt(row.get(c)).ljust(widths[c])
+            for i, c in enumerate(columns)
+        ))
+
+
+def _fmt(value: Any) -> str:
+    if isinstance(value, float):
+        return f"{value:,.3f}" if value < 100 else f"{value:,.0f}"
+    if isinstance(value, int):
+        return f"{value:,}"
+    return "" if value is None else str(value)
+
+
+def write_json(path: Path, payload: dict[str, Any]) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(payload, indent=2, ensure_ascii=False), encoding="utf-8")
+
+
+def check_baseline(
+    baseline_path: Path,
+    current: dict[str, float],
+    max_regression: float,
+    higher_is_better: set[str],
+) -> list[str]:
+    """
+    Confronta le metriche correnti con quelle di un JSON salvato con --json (chiave "metrics").
+    Ritorna le regressioni oltre max_regression (0.10 = 10%); metriche assenti nella baseline ignorate.
+    """
+    baseline = json.loads(baseline_path.read_text(encoding="utf-8")).get("metrics", {})
+    regressions = []
+    for name, value in current.items():
+        base = baseline.get(name)
+        if not base:
+            continue
+        change = (value - base) / base
+        worse = -change if name in higher_is_better else change
+        if worse > max_regression:
+            regressions.append(f"{name}: {base:,.3f} -> {value:,.3f} ({change:+.1%})")
+    return regressions
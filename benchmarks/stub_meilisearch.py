@@ -0,0 +1,132 @@
+"""
+Meilisearch finto per i benchmark: risponde alle chiamate fatte dall'indexer (indici, settings,
+add_documents, task, stats) su 127.0.0.1, senza indicizzare nulla. Conta richieste, documenti e byte
+ricevuti. indexing_rate (documenti/s, 0 = istantaneo) simula il tempo di elaborazione dei task, così
+l'attesa dei task nel checkpoint non è nulla.
+"""
+import json
+import re
+import threading
+import time
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any
+
+_NOW = datetime.now(timezone.utc).isoformat().replace("+00:00", "Z")
+
+
+class StubMeilisearch:
+    def __init__(self, indexing_rate: float = 0.0) -> None:
+        self.indexing_rate = indexing_rate
+        self.requests = 0
+        self.documents = 0
+        self.bytes_received = 0
+        self._lock = threading.Lock()
+        self._tasks: dict[int, tuple[str, float]] = {}  # uid -> (indice, istante di completamento)
+        self._index_docs: dict[str, int] = {}
+        self._last_done = 0.0
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), _handler(self))
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, name="stub-meilisearch", daemon=True)
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "StubMeilisearch":
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            return {"requests": self.requests, "documents": self.documents, "bytes_received": self.bytes_received}
+
+    def enqueue(self, index_uid: str, documents: int = 0) -> dict[str, Any]:
+        with self._lock:
+            uid = len(self._tasks) + 1
+            seconds = documents / self.indexing_rate if self.indexing_rate > 0 else 0.0
+            # I task di Meilisearch sono elaborati in serie: ognuno finisce dopo il precedente.
+            self._last_done = max(self._last_done, time.monotonic()) + seconds
+            self._tasks[uid] = (index_uid, self._last_done)
+            self._index_docs[index_uid] = self._index_docs.get(index_uid, 0) + documents
+        return {
+            "taskUid": uid, "indexUid": index_uid, "status": "enqueued",
+            "type": "documentAdditionOrUpdate", "enqueuedAt": _NOW,
+        }
+
+    def task(self, uid: int) -> dict[str, Any] | None:
+        with self._lock:
+            entry = self._tasks.get(uid)
+        if entry is None:
+            return None
+        index_uid, done_at = entry
+        status = "succeeded" if time.monotonic() >= done_at else "processing"
+        return {"uid": uid, "indexUid": index_uid, "status": status, "type": "documentAdditionOrUpdate", "enqueuedAt": _NOW}
+
+    def index_documents(self, index_uid: str) -> int:
+        with self._lock:
+            return self._index_docs.get(index_uid, 0)
+
+
+def _handler(stub: StubMeilisearch) -> type[BaseHTTPRequestHandler]:
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"  # keep-alive, come un Meilisearch reale
+
+        def log_message(self, *args: Any) -> None:
+            pass
+
+        def _reply(self, code: int, payload: Any) -> None:
+            body = json.dumps(payload).encode()
+            self.send_response(code)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _body(self) -> bytes:
+            body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+            with stub._lock:
+                stub.requests += 1
+                stub.bytes_received += len(body)
+            return body
+
+        def _write(self) -> None:
+            body = self._body()
+            path = self.path.split("?", 1)[0]
+            match = re.fullmatch(r"/indexes/([^/]+)/documents", path)
+            if match:
+                count = len(json.loads(body)) if body else 0
+                with stub._lock:
+                    stub.documents += count
+                return self._reply(202, stub.enqueue(match.group(1), count))
+            if path == "/indexes":
+                return self._reply(202, stub.enqueue(json.loads(body).get("uid", "")))
+            match = re.match(r"/indexes/([^/]+)", path)
+            return self._reply(202, stub.enqueue(match.group(1) if match else ""))
+
+        do_POST = do_PUT = do_PATCH = do_DELETE = _write
+
+        def do_GET(self) -> None:
+            self._body()
+            path = self.path.split("?", 1)[0]
+            match = re.fullmatch(r"/tasks/(\d+)", path)
+            if match:
+                task = stub.task(int(match.group(1)))
+                return self._reply(200, task) if task else self._reply(404, {"message": "task not found"})
+            match = re.fullmatch(r"/indexes/([^/]+)/stats", path)
+            if match:
+                docs = stub.index_documents(match.group(1))
+                return self._reply(200, {"numberOfDocuments": docs, "isIndexing": False, "fieldDistribution": {}})
+            match = re.fullmatch(r"/indexes/([^/]+)", path)
+            if match:
+                return self._reply(200, {
+                    "uid": match.group(1), "primaryKey": "id", "createdAt": _NOW, "updatedAt": _NOW,
+                })
+            self._reply(200, {})
+
+    return Handler
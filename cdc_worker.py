@@ -0,0 +1,38 @@
+#!/usr/bin/env python3
+"""
+Worker CDC: segue il binlog MySQL e applica all'indice le modifiche a stampe, prodotti sealed,
+set e traduzioni MTG, senza reindex. Processo separato dall'API (uno solo per database).
+
+Uso (dalla cartella search_engine):
+  python cdc_worker.py
+
+Requisiti: mysql-replication installato, binlog_format=ROW e binlog_row_image=FULL,
+utente MySQL con REPLICATION SLAVE e REPLICATION CLIENT. Vedi docs/REINDEX.md.
+"""
+import logging
+import sys
+
+# Assicura che il package app sia importabile dalla root del progetto
+sys.path.insert(0, ".")
+
+try:
+    import pymysqlreplication  # noqa: F401
+except ImportError:
+    print("ERRORE: mysql-replication non installato (pip install mysql-replication).")
+    sys.exit(1)
+
+
+def main() -> None:
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    from app.infrastructure.search.cdc import run_cdc_worker
+    from app.infrastructure.search.tracing import setup_tracing
+
+    setup_tracing()
+    try:
+        run_cdc_worker()
+    except KeyboardInterrupt:
+        print("Interrotto.")
+
+
+if __name__ == "__main__":
+    main()
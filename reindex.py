@@ -5,26 +5,194 @@ senza passare dall'API HTTP. Da usare sul server (AWS o locale).
 
 Uso (dalla cartella search_engine):
   python reindex.py
+  python reindex.py --games op,pk            # solo i giochi indicati
+  python reindex.py --set-ids 812,813        # solo i set indicati (sets.id)
+  python reindex.py --ids mtg_123,sealed_7   # solo i documenti indicati
+  python reindex.py --no-resume              # ignora il checkpoint di un run interrotto
+  python reindex.py --incremental            # solo le righe nuove dall'ultimo run (watermark)
+  python reindex.py --force                  # reindicizza anche le sorgenti invariate (fingerprint)
+  python reindex.py --retry-journal          # reinvia solo i batch falliti registrati nel journal
+  python reindex.py --profile                # profilo CPU/allocazioni in INDEXER_STATE_DIR/profiles
+  python reindex.py --sql-profile            # query SQL con tempi, piani EXPLAIN e indici suggeriti (stessa cartella)
+  python reindex.py --check-indexes          # solo controllo degli indici MySQL richiesti, senza reindex
 
-Richiede .env con MySQL e Meilisearch configurati.
+I filtri si combinano in AND. Un reindex totale interrotto riprende dall'ultimo batch confermato. Richiede .env con MySQL e Meilisearch configurati.
 """
+import argparse
 import sys
 
 # Assicura che il package app sia importabile dalla root del progetto
 sys.path.insert(0, ".")
 
 
+def _csv(value: str) -> list[str]:
+    return [v.strip() for v in value.split(",") if v.strip()]
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Reindex MySQL -> Meilisearch (totale o parziale).")
+    parser.add_argument("--games", type=_csv, default=[], help="Slug dei giochi separati da virgola (es. mtg,op).")
+    parser.add_argument(
+        "--set-ids",
+        type=lambda v: [int(x) for x in _csv(v)],
+        default=[],
+        help="sets.id separati da virgola.",
+    )
+    parser.add_argument("--ids", type=_csv, default=[], help="Id documento separati da virgola (es. mtg_123,sealed_7).")
+    parser.add_argument(
+        "--no-resume",
+        action="store_true",
+        help="Reindex totale da zero, scartando il checkpoint di un run interrotto.",
+    )
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="Reindex totale di tutte le sorgenti, anche quelle invariate dall'ultimo run.",
+    )
+    parser.add_argument(
+        "--retry-journal",
+        action="store_true",
+        help="Reinvia i documenti dei batch falliti (INDEXER_STATE_DIR/failed_batches.jsonl), riletti da MySQL.",
+    )
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="Solo righe con id oltre il watermark dell'ultimo run riuscito (come il sync dello scheduler).",
+    )
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="Esegue sotto profiler (cProfile, stack campionati, tracemalloc): artefatti in INDEXER_STATE_DIR/profiles.",
+    )
+    parser.add_argument(
+        "--sql-profile",
+        action="store_true",
+        help="Registra tempi, righe esaminate e piani EXPLAIN delle query MySQL: report in INDEXER_STATE_DIR/profiles.",
+    )
+    parser.add_argument(
+        "--check-indexes",
+        action="store_true",
+        help="Controlla solo gli indici MySQL su cui contano indexer e script (CREATE INDEX per quelli mancanti).",
+    )
+    return parser.parse_args()
+
+
+def print_timings(result: dict) -> None:
+    """Tempi per fase di ogni sorgente indicizzata e picco di memoria del processo."""
+    from app.infrastructure.search.timings import STAGES
+
+    columns = (*STAGES, "total")
+    if result.get("timings"):
+        print("Tempi per fase (s):")
+        widths = [max(10, len(c) + 1) for c in columns]
+        print(f"  {'':<7}" + "".join(f"{c:>{w}}" for c, w in zip(columns, widths)))
+        for name, timings in result["timings"].items():
+            print(f"  {name:<7}" + "".join(f"{timings[c]:>{w}.2f}" for c, w in zip(columns, widths)))
+    if result.get("peak_memory_mb") is not None:
+        print(f"Picco memoria: {result['peak_memory_mb']} MB")
+
+
 def main() -> None:
-    from app.infrastructure.search.indexer import run_indexer
+    args = parse_args()
+    from app.infrastructure.search.tracing import setup_tracing
+
+    # TRACING_EXPORTER (console / otlp): una traccia per run, esportata all'uscita del processo.
+    setup_tracing()
+    if args.check_indexes:
+        check_indexes()
+        return
+    if not (args.profile or args.sql_profile):
+        run(args)
+        return
+    from contextlib import ExitStack
+
+    from app.infrastructure.search.profiling import profile_run, profiles_dir
+    from app.infrastructure.search.sql_profile import capture_sql
+
+    artifacts: list[list[str]] = []
+    try:
+        with ExitStack() as stack:
+            if args.profile:
+                artifacts.append(stack.enter_context(profile_run("reindex")))
+            if args.sql_profile:
+                artifacts.append(stack.enter_context(capture_sql("reindex")))
+            run(args)
+    finally:
+        names = [name for group in artifacts for name in group]
+        print(f"Profilo in {profiles_dir()}: {', '.join(names) or 'nessun artefatto'}")
+
+
+def check_indexes() -> None:
+    """Indici richiesti mancanti, con il CREATE INDEX da eseguire. Exit code 1 se ne manca qualcuno."""
+    from app.infrastructure.search.indexer import _get_mysql_connection
+    from app.infrastructure.search.sql_profile import check_required_indexes
+
+    conn = _get_mysql_connection()
+    try:
+        missing = check_required_indexes(conn)
+    finally:
+        conn.close()
+    if not missing:
+        print("OK | Indici richiesti presenti")
+        return
+    print(f"Indici mancanti: {len(missing)}")
+    for m in missing:
+        print(f"  {m['suggestion']};  -- {m['used_by']}")
+    sys.exit(1)
 
-    print("Avvio reindicizzazione...")
-    result = run_indexer()
+
+def run(args: argparse.Namespace) -> None:
+    from app.infrastructure.search.indexer import (
+        ReindexScope,
+        _get_mysql_connection,
+        plan_incremental,
+        retry_journal,
+        run_indexer,
+    )
+
+    if args.retry_journal:
+        result = retry_journal()
+        if result["error"]:
+            print("ERRORE:", result["error"], file=sys.stderr)
+            sys.exit(1)
+        print(
+            f"OK | Batch nel journal: {result['entries']} | Documenti: {result['documents']} | Set: {result['sets']}"
+            f" | Rimossi: {result['deleted']} | Di nuovo nel journal: {result['journaled']}"
+        )
+        return
+
+    if args.incremental:
+        conn = _get_mysql_connection()
+        try:
+            scope = plan_incremental(conn)
+        finally:
+            conn.close()
+        if scope is None:
+            print("OK | Nessuna riga nuova dall'ultimo run")
+            return
+    else:
+        try:
+            scope = ReindexScope(games=args.games, set_ids=args.set_ids, doc_ids=args.ids)
+        except ValueError as e:
+            print("ERRORE:", e, file=sys.stderr)
+            sys.exit(2)
+
+    print("Avvio reindicizzazione..." if scope.is_full else f"Avvio reindicizzazione parziale: {scope.to_dict()}")
+    result = run_indexer(scope=scope, resume=not args.no_resume, force=args.force)
     if result.get("error"):
         print("ERRORE:", result["error"], file=sys.stderr)
         sys.exit(1)
-    print(
-        f"OK | MTG: {result['mtg']} | OP: {result['op']} | PK: {result['pk']} | Sealed: {result['sealed']} | Totale: {result['total']}"
-    )
+    summary = f"OK | MTG: {result['mtg']} | OP: {result['op']} | PK: {result['pk']} | Sealed: {result['sealed']} | Totale: {result['total']} | Set: {result['sets']}"
+    if "deleted" in result:
+        summary += f" | Rimossi: {result['deleted']}"
+    if result.get("journaled"):
+        summary += f" | Nel journal: {result['journaled']} (python reindex.py --retry-journal)"
+    if result.get("skipped"):
+        summary += f" | Invariati: {', '.join(result['skipped'])}"
+    if result.get("resumed"):
+        summary += " | Ripreso da checkpoint"
+    print(summary)
+    print_timings(result)
 
 
 if __name__ == "__main__":
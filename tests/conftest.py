@@ -0,0 +1,12 @@
+import os
+
+# Settings obbligatorie: i test non si collegano a MySQL né a Meilisearch.
+for name, value in {
+    "MYSQL_HOST": "localhost",
+    "MYSQL_USER": "test",
+    "MYSQL_PASSWORD": "test",
+    "MYSQL_DATABASE": "test",
+    "MEILISEARCH_URL": "http://127.0.0.1:7700",
+    "MEILISEARCH_MASTER_KEY": "test",
+}.items():
+    os.environ.setdefault(name, value)
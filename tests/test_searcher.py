@@ -0,0 +1,66 @@
+"""Single-flight di search_queries: un 400 di una query non deve fallire le richieste agganciate alle altre."""
+import asyncio
+
+import pytest
+
+from app.infrastructure.search import searcher
+from app.infrastructure.search.searcher import SearchBackendError, search_queries
+
+BAD = {"indexUid": "cards", "q": "", "filter": "nope ="}
+Q1 = {"indexUid": "cards", "q": "bolt"}
+
+
+@pytest.fixture(autouse=True)
+def _single_flight(monkeypatch):
+    monkeypatch.setenv("SEARCH_SINGLE_FLIGHT", "true")
+    searcher.get_settings.cache_clear()
+    yield
+    searcher.get_settings.cache_clear()
+
+
+def _fake_multi_search(calls):
+    async def multi_search(queries):
+        calls.append(queries)
+        await asyncio.sleep(0.01)  # le richieste concorrenti si agganciano mentre la chiamata è in volo
+        if BAD in queries:
+            raise SearchBackendError(400, "Invalid filter")
+        return [{"hits": [], "query": q["q"], "processingTimeMs": 1} for q in queries]
+
+    return multi_search
+
+
+def test_bad_query_fails_only_the_request_that_sent_it(monkeypatch):
+    calls = []
+    monkeypatch.setattr(searcher, "multi_search", _fake_multi_search(calls))
+
+    async def run():
+        a = asyncio.create_task(search_queries([BAD, Q1]))
+        await asyncio.sleep(0)  # A avvia la multi-search, B si aggancia a Q1
+        b = asyncio.create_task(search_queries([Q1]))
+        return await asyncio.gather(a, b, return_exceptions=True)
+
+    result_a, result_b = asyncio.run(run())
+
+    assert isinstance(result_a, SearchBackendError) and result_a.status_code == 400
+    assert result_b == [{"hits": [], "query": "bolt", "processingTimeMs": 1}]
+    # Una sola multi-search condivisa, poi le query rieseguite una per una.
+    assert calls == [[BAD, Q1], [BAD], [Q1]]
+    assert not searcher._inflight
+
+
+def test_backend_errors_are_shared(monkeypatch):
+    async def multi_search(queries):
+        await asyncio.sleep(0.01)
+        raise SearchBackendError(502, "Errore da Meilisearch")
+
+    monkeypatch.setattr(searcher, "multi_search", multi_search)
+
+    async def run():
+        a = asyncio.create_task(search_queries([Q1]))
+        await asyncio.sleep(0)
+        b = asyncio.create_task(search_queries([Q1]))
+        return await asyncio.gather(a, b, return_exceptions=True)
+
+    for result in asyncio.run(run()):
+        assert isinstance(result, SearchBackendError) and result.status_code == 502
+